@@ -0,0 +1,50 @@
+"""
+test_benchmark.py
+
+Unit tests for the benchmark baseline comparison.
+"""
+
+import unittest
+from benchmark import compare_results
+
+
+class TestCompareResults(unittest.TestCase):
+
+    def test_flags_only_regressions_over_threshold(self):
+        """
+        Slower or larger results beyond the threshold are reported.
+        """
+        baseline = {"results": {"1000": {
+            "load_tasks": {"seconds": 1.0, "peak_bytes": 100},
+            "save_tasks": {"seconds": 1.0}}}}
+        results = {"results": {"1000": {
+            "load_tasks": {"seconds": 1.1, "peak_bytes": 200},
+            "save_tasks": {"seconds": 1.5},
+            "delete_task": {"seconds": 9.0}}}}
+
+        regressions = compare_results(results, baseline, threshold=0.2)
+        self.assertEqual(
+            sorted((name, metric) for _, name, metric, _, _
+                   in regressions),
+            [("load_tasks", "peak_bytes"), ("save_tasks", "seconds")])
+
+    def test_ignores_small_timing_changes(self):
+        """
+        Millisecond timings that double are not reported.
+        """
+        baseline = {"results": {"1000": {
+            "delete_task": {"seconds": 0.001},
+            "save_tasks": {"seconds": 0.004}}}}
+        results = {"results": {"1000": {
+            "delete_task": {"seconds": 0.002},
+            "save_tasks": {"seconds": 0.012}}}}
+
+        regressions = compare_results(results, baseline, threshold=0.2)
+        self.assertEqual([name for _, name, _, _, _ in regressions],
+                         ["save_tasks"])
+        self.assertEqual(compare_results(results, baseline, threshold=0.2,
+                                         min_seconds=0.01), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
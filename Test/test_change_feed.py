@@ -0,0 +1,149 @@
+"""
+test_change_feed.py
+
+Unit tests for the ChangeFeed class and the events published by
+TaskManager and UserManager.
+
+Uses a temporary directory for the change log and data files.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+from change_feed import (ChangeFeed, TASK_ADDED, TASK_COMPLETED,
+                         TASK_DELETED, TASK_REASSIGNED, TASK_RESCHEDULED,
+                         USER_REGISTERED)
+from task_manager_build import Task, TaskManager
+from user_manager import User, UserManager
+
+
+def collect(received, done, count):
+    """
+    Returns a subscriber callback that records events and sets done
+    once count have arrived.
+    """
+    def callback(event):
+        received.append(event)
+        if len(received) >= count:
+            done.set()
+    return callback
+
+
+class TestChangeFeed(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.log_file = os.path.join(self.tmp.name, "changes.jsonl")
+        self.feed = ChangeFeed(self.log_file)
+
+    def tearDown(self):
+        self.feed.close()
+        self.tmp.cleanup()
+
+    def test_replay_from_offset(self):
+        """
+        Logged events can be read back starting at any event's offset.
+        """
+        events = [self.feed.publish(USER_REGISTERED, username=name)
+                  for name in ("alice", "bob", "carol")]
+        self.assertEqual(events[0].offset, 0)
+        self.assertEqual(events[1].offset, events[0].next_offset)
+        replayed = list(ChangeFeed(self.log_file).replay(events[1].offset))
+        self.assertEqual([event.data["username"] for event in replayed],
+                         ["bob", "carol"])
+        self.assertEqual(replayed[-1].next_offset,
+                         os.path.getsize(self.log_file))
+        with self.assertRaises(ValueError):
+            self.feed.publish("task_renamed")
+
+    def test_named_subscriber_catches_up(self):
+        """
+        A named subscriber receives the events it missed while it was
+        not subscribed, and only those.
+        """
+        received, done = [], threading.Event()
+        self.feed.subscribe(collect(received, done, 1), name="audit")
+        self.feed.publish(USER_REGISTERED, username="alice")
+        self.assertTrue(done.wait(5))
+        self.feed.close()
+
+        self.feed.publish(USER_REGISTERED, username="bob")
+        self.feed.publish(USER_REGISTERED, username="carol")
+        received, done = [], threading.Event()
+        self.feed.subscribe(collect(received, done, 3), name="audit")
+        self.feed.publish(USER_REGISTERED, username="dave")
+        self.assertTrue(done.wait(5))
+        self.assertEqual([event.data["username"] for event in received],
+                         ["bob", "carol", "dave"])
+
+    def test_events_from_other_processes_delivered(self):
+        """
+        Events another feed appended to the same log between this
+        feed's own events are delivered in log order, and the saved
+        position only moves past events that were delivered.
+        """
+        other = ChangeFeed(self.log_file)
+        received, done = [], threading.Event()
+        self.feed.subscribe(collect(received, done, 4), name="audit")
+        self.feed.publish(USER_REGISTERED, username="alice")
+        other.publish(USER_REGISTERED, username="bob")
+        other.publish(USER_REGISTERED, username="carol")
+        self.feed.publish(USER_REGISTERED, username="dave")
+        self.assertTrue(done.wait(5))
+        self.feed.close()
+        other.close()
+        self.assertEqual([event.data["username"] for event in received],
+                         ["alice", "bob", "carol", "dave"])
+        self.assertEqual(self.feed.consumer_offset("audit"),
+                         os.path.getsize(self.log_file))
+
+    def test_slow_subscriber_does_not_block(self):
+        """
+        Publishing returns while a subscriber is still busy.
+        """
+        release = threading.Event()
+        received, done = [], threading.Event()
+        self.feed.subscribe(lambda event: release.wait(5))
+        self.feed.subscribe(collect(received, done, 20))
+        started = time.perf_counter()
+        for number in range(20):
+            self.feed.publish(USER_REGISTERED, username=f"user{number}")
+        self.assertLess(time.perf_counter() - started, 1)
+        self.assertTrue(done.wait(5))
+        release.set()
+
+    def test_managers_publish_typed_events(self):
+        """
+        TaskManager and UserManager changes appear in the log once
+        they are saved.
+        """
+        task_file = os.path.join(self.tmp.name, "tasks.txt")
+        task_manager = TaskManager(task_file)
+        task_manager.change_feed = self.feed
+        user_manager = UserManager(os.path.join(self.tmp.name, "user.txt"))
+        user_manager.change_feed = self.feed
+
+        user_manager.add_user(User("alice", "pass"))
+        task_manager.add_task(Task("alice", "Task", "D", "01 Jan 2024",
+                                   "01 Feb 2024"))
+        task = task_manager.tasks[0]
+        task_manager.complete_task(task)
+        task_manager.reassign_task(task, "bob")
+        task_manager.reschedule_task(task, "02 Feb 2024")
+        self.assertEqual(len(list(self.feed.replay())), 2)
+        task_manager.save_tasks()
+        task_manager.delete_task(0)
+
+        events = list(self.feed.replay())
+        self.assertEqual([event.kind for event in events],
+                         [USER_REGISTERED, TASK_ADDED, TASK_COMPLETED,
+                          TASK_REASSIGNED, TASK_RESCHEDULED, TASK_DELETED])
+        self.assertEqual(events[3].data["from_user"], "alice")
+        self.assertEqual(events[4].data["previous_due"], "01 Feb 2024")
+        self.assertEqual(events[5].data["task_file"], task_file)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,107 @@
+"""
+test_columnar_export.py
+
+Unit tests for the ColumnarExport class and open_columns.
+
+Uses a temporary directory for the task file and its export.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from columnar_export import ColumnarExport, open_columns
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+
+def task_line(number):
+    status = "Yes" if number % 3 == 0 else "No"
+    return (f"user{number % 4}, Task {number}, Déscription {number}, "
+            f"01 Jan 2024, {number % 28 + 1:02d} Feb 2024, {status}\n")
+
+
+def read_string(views, string_id):
+    offsets = views["strings"]
+    return bytes(views["strings.bin"][offsets[string_id]:
+                                      offsets[string_id + 1]]).decode()
+
+
+class TestColumnarExport(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            for number in range(50):
+                f.write(task_line(number))
+        self.exporter = ColumnarExport(self.task_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def assertExported(self, count):
+        """
+        Checks the mapped columns against the task lines.
+        """
+        views = open_columns(self.exporter.directory)
+        self.assertEqual(len(views["completed"]), count)
+        for number in range(count):
+            user = views["users"][views["user_code"][number]]
+            self.assertEqual(read_string(views, user), f"user{number % 4}")
+            self.assertEqual(read_string(views, views["description"][number]),
+                             f"Déscription {number}")
+            self.assertEqual(
+                views["date_due"][number],
+                datetime.date(2024, 2, number % 28 + 1).toordinal())
+            self.assertEqual(views["completed"][number], number % 3 == 0)
+
+    def test_export_matches_tasks(self):
+        """
+        Every task is exported, with the header skipped and usernames
+        stored once each.
+        """
+        self.assertEqual(self.exporter.refresh(), (50, 50))
+        self.assertExported(50)
+        self.assertEqual(len(open_columns(self.exporter.directory)["users"]),
+                         4)
+        self.assertTrue(os.path.isdir(
+            os.path.join(self.tmp.name, "tasks_columns")))
+
+    def test_refresh_appends_new_tasks_only(self):
+        """
+        Tasks appended to the file are added to the export; a last line
+        without its newline waits for the next refresh.
+        """
+        self.exporter.refresh()
+        date_path = os.path.join(self.exporter.directory, "date_add.i32")
+        before = os.stat(date_path).st_ino
+        with open(self.task_file, "a") as f:
+            f.write(task_line(50))
+            f.write(task_line(51)[:-1])
+        self.assertEqual(self.exporter.refresh(), (51, 1))
+        with open(self.task_file, "a") as f:
+            f.write("\n")
+        self.assertEqual(self.exporter.refresh(), (52, 1))
+        self.assertEqual(self.exporter.refresh(), (52, 0))
+        self.assertEqual(os.stat(date_path).st_ino, before)
+        self.assertExported(52)
+
+    def test_rewritten_file_is_exported_again(self):
+        """
+        A task file changed other than by appending gets a full export.
+        """
+        self.exporter.refresh()
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            for number in range(30):
+                f.write(task_line(number))
+        self.assertEqual(self.exporter.refresh(), (30, 30))
+        self.assertExported(30)
+        self.assertEqual(self.exporter.refresh(full=True), (30, 30))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+test_data_generator.py
+
+Unit tests for the synthetic dataset generator used by the benchmarks.
+"""
+
+import os
+import tempfile
+import unittest
+from data_generator import generate_dataset, make_usernames
+from task_manager_build import TaskManager
+from user_manager import UserManager
+
+
+class TestDataGenerator(unittest.TestCase):
+
+    def test_usernames_unique(self):
+        """
+        Generated usernames are distinct and start with the admin.
+        """
+        names = make_usernames(250)
+        self.assertEqual(len(set(names)), 250)
+        self.assertEqual(names[0], "admin")
+
+    def test_dataset_is_reproducible_and_loadable(self):
+        """
+        The same seed produces identical files that the managers load.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            first = generate_dataset(os.path.join(tmp, "a"), 500, seed=7)
+            second = generate_dataset(os.path.join(tmp, "b"), 500, seed=7)
+            for path_a, path_b in zip(first[:2], second[:2]):
+                with open(path_a) as a, open(path_b) as b:
+                    self.assertEqual(a.read(), b.read())
+
+            self.assertEqual(len(TaskManager(first[0]).tasks), 500)
+            users = UserManager(first[1])
+            self.assertTrue(users.authenticate("admin", "adm1n"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+test_instrumentation.py
+
+Unit tests for the operation statistics collector and timed decorator.
+"""
+
+import unittest
+from unittest.mock import mock_open, patch
+from instrumentation import Stats, stats, timed
+from task_manager_build import Task, TaskManager
+
+
+class TestStats(unittest.TestCase):
+
+    def setUp(self):
+        stats.reset()
+
+    def tearDown(self):
+        stats.disable()
+        stats.reset()
+
+    def test_timed_records_nothing_when_disabled(self):
+        """
+        A timed function runs normally and records nothing while off.
+        """
+        @timed("test.op")
+        def op():
+            return 42
+
+        self.assertEqual(op(), 42)
+        self.assertEqual(stats.operations, {})
+
+    def test_timed_records_calls_when_enabled(self):
+        """
+        Calls are counted and placed in a histogram bucket.
+        """
+        @timed("test.op")
+        def op():
+            return 42
+
+        stats.enable()
+        op()
+        op()
+        self.assertEqual(stats.operations["test.op"].calls, 2)
+        self.assertEqual(sum(stats.operations["test.op"].histogram), 2)
+
+    def test_count_tracks_rewrites(self):
+        """
+        Counters accumulate and rewrites appear in the recent writes.
+        """
+        local = Stats()
+        local.count("save", rows=10, bytes_written=500, rewrites=1,
+                    path="tasks.txt")
+        local.count("save", rows=10, bytes_written=500, rewrites=1,
+                    path="tasks.txt")
+        self.assertEqual(local.operations["save"].bytes_written, 1000)
+        self.assertIn("save rewrote tasks.txt (500 bytes)", local.report())
+
+    @patch("os.path.getsize", return_value=123)
+    @patch("builtins.open", new_callable=mock_open)
+    def test_save_tasks_counts_rewrite(self, mock_file, mock_size):
+        """
+        save_tasks reports a full-file rewrite with its size.
+        """
+        manager = TaskManager()
+        manager.tasks = [Task("a", "T", "D", "01 Jan 2023", "02 Jan 2023")]
+        stats.enable()
+        manager.save_tasks()
+        save = stats.operations["TaskManager.save_tasks"]
+        self.assertEqual((save.calls, save.rewrites, save.bytes_written),
+                         (1, 1, 123))
+
+
+if __name__ == '__main__':
+    unittest.main()
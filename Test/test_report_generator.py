@@ -7,7 +7,7 @@ about users and tasks. Uses mocking to simulate file I/O and filesystem behavior
 
 import unittest
 from unittest.mock import mock_open, patch
-from report_generator import ReportGenerator
+from report_generator import ReportGenerator, ReportJob, wilson_interval
 from task_manager_build import Task
 from user_manager import User
 import datetime
@@ -15,7 +15,6 @@ import datetime
 
 class TestReportGenerator(unittest.TestCase):
 
-
     def setUp(self):
         """
         Set up shared test data: two users and three tasks (1 overdue, 1 complete).
@@ -37,7 +36,6 @@ class TestReportGenerator(unittest.TestCase):
         # Initialize ReportGenerator with mock data
         self.report = ReportGenerator(MockTaskManager(), MockUserManager())
 
-
     @patch("builtins.open", new_callable=mock_open)
     def test_write_task_overview(self, mock_file):
         """
@@ -54,7 +52,6 @@ class TestReportGenerator(unittest.TestCase):
         self.assertIn("Total number of completed tasks   : 1", written)
         self.assertIn("Total number of overdue tasks     : 1", written)
 
-
     @patch("builtins.open", new_callable=mock_open)
     def test_write_user_overview(self, mock_file):
         """
@@ -70,6 +67,60 @@ class TestReportGenerator(unittest.TestCase):
         self.assertIn("User: bob", content)
         self.assertIn("Tasks assigned", content)
 
+    def test_parallel_user_overview_matches_serial(self):
+        """
+        The user overview built in a process pool is byte-identical.
+        """
+        self.users.extend(User(f"user{i}", "pw") for i in range(20))
+        self.tasks.extend(
+            Task(f"user{i % 7}", "T", "D", "01 Jan 2023", "01 Jan 2022",
+                 "Yes" if i % 3 else "No") for i in range(50))
+        written = []
+        for workers in (1, 2):
+            with patch("builtins.open", new_callable=mock_open) as mock_file:
+                self.report.write_user_overview(workers=workers)
+            handle = mock_file()
+            written.append("".join(call.args[0]
+                                   for call in handle.write.call_args_list))
+        self.assertIn("User: user19", written[0])
+        self.assertEqual(written[0], written[1])
+
+    def test_approximate_statistics(self):
+        """
+        Sampled estimates bracket the exact percentages.
+        """
+        self.tasks.extend(
+            Task("bob", "T", "D", "01 Jan 2023", "01 Jan 2022",
+                 "Yes" if i % 4 else "No") for i in range(400))
+        exact = self.report.approximate_statistics(sample_size=10000)
+        self.assertTrue(exact["exact"])
+        self.assertEqual(exact["completed"]["low"],
+                         exact["completed"]["high"])
+
+        estimate = self.report.approximate_statistics(sample_size=200,
+                                                      seed=1)
+        self.assertFalse(estimate["exact"])
+        self.assertEqual(estimate["sample_size"], 200)
+        for name in ("completed", "overdue"):
+            self.assertLessEqual(estimate[name]["low"],
+                                 exact[name]["percent"])
+            self.assertGreaterEqual(estimate[name]["high"],
+                                    exact[name]["percent"])
+        bob = estimate["users"]["bob"]["completed"]
+        self.assertLess(bob["low"], 75.25)
+        self.assertGreater(bob["high"], 75.25)
+
+    def test_wilson_interval(self):
+        """
+        The Wilson interval stays within [0, 1] and narrows with trials.
+        """
+        low, high = wilson_interval(0, 10)
+        self.assertAlmostEqual(low, 0.0)
+        self.assertGreater(high, 0.0)
+        narrow = wilson_interval(500, 1000)
+        wide = wilson_interval(5, 10)
+        self.assertLess(narrow[1] - narrow[0], wide[1] - wide[0])
+        self.assertAlmostEqual(sum(narrow) / 2, 0.5)
 
     @patch("builtins.open", new_callable=mock_open)
     def test_generate_calls_both_reports(self, mock_file):
@@ -82,7 +133,6 @@ class TestReportGenerator(unittest.TestCase):
             mock_task.assert_called_once()
             mock_user.assert_called_once()
 
-
     @patch("os.path.exists", return_value=False)
     @patch("builtins.open", new_callable=mock_open)
     def test_display_statistics_generates_if_missing(self, mock_file, mock_exists):
@@ -93,7 +143,6 @@ class TestReportGenerator(unittest.TestCase):
             self.report.display_statistics()
             mock_gen.assert_called_once()
 
-
     @patch("os.path.exists", return_value=True)
     @patch("builtins.open", new_callable=mock_open, read_data="Fake content")
     def test_display_statistics_prints_files(self, mock_file, mock_exists):
@@ -107,6 +156,115 @@ class TestReportGenerator(unittest.TestCase):
                 mock_print.mock_calls
             )
 
+    def test_aging_statistics(self):
+        """
+        Overdue tasks are bucketed by age and upcoming ones by week.
+        """
+        today = datetime.date(2022, 1, 10)
+        self.tasks.extend([
+            Task("alice", "Task 4", "Desc", "01 Jan 2021", "01 Jan 2021",
+                 "No"),
+            Task("bob", "Task 5", "Desc", "01 Jan 2022", "09 Jan 2022", "No"),
+            Task("bob", "Task 6", "Desc", "01 Jan 2022", "17 Jan 2022", "No"),
+            Task("bob", "Task 7", "Desc", "01 Jan 2022", "bad date", "No"),
+        ])
+        aging = self.report.aging_statistics(today)
+
+        self.assertEqual(aging["overdue_buckets"],
+                         {"1-7": 1, "8-30": 1, "31-90": 0, "90+": 1})
+        self.assertEqual(aging["overdue_total"], 3)
+        self.assertEqual([week["tasks"] for week in aging["due_per_week"][:3]],
+                         [1, 0, 0])
+        self.assertEqual(aging["users"]["alice"],
+                         {"overdue": 2, "median_days_overdue": 192.5})
+        self.assertEqual(aging["users"]["bob"],
+                         {"overdue": 1, "median_days_overdue": 2})
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_aging_matches_overview_for_tasks_due_today(self, mock_file):
+        """
+        A task due today is overdue in the aging report, as it is in
+        the task overview.
+        """
+        today = datetime.date.today().strftime("%d %b %Y")
+        self.tasks[1] = Task("alice", "Task 2", "Desc", "01 Jan 2023",
+                             today, "No")
+        aging = self.report.aging_statistics()
+        self.assertEqual(aging["overdue_total"], 2)
+        self.assertEqual(aging["overdue_buckets"]["1-7"], 1)
+        self.assertEqual(aging["users"]["alice"]["overdue"], 2)
+
+        self.report.write_task_overview()
+        content = "".join(call.args[0] for call
+                          in mock_file().write.call_args_list)
+        self.assertIn("Total number of overdue tasks     : 2", content)
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_write_aging_report(self, mock_file):
+        """
+        The aging report is written as text and JSON.
+        """
+        self.report.write_aging_report(datetime.date(2022, 1, 10))
+        mock_file.assert_any_call("task_aging.txt", "w")
+        mock_file.assert_any_call("task_aging.json", "w")
+
+        handle = mock_file()
+        content = "".join(call.args[0] for call in handle.write.call_args_list)
+        self.assertIn("8-30 days   : 1", content)
+        self.assertIn('"overdue_total": 1', content)
+
+    def test_snapshot_is_isolated(self):
+        """
+        Changes made after a snapshot do not appear in its reports,
+        which record the data version they were taken at.
+        """
+        snapshot = self.report.snapshot()
+        self.tasks[0].mark_complete()
+        self.tasks.append(Task("bob", "Task 4", "Desc", "01 Jan 2023",
+                               "01 Jan 2099", "No"))
+        with patch("builtins.open", new_callable=mock_open) as mock_file:
+            snapshot.write_task_overview()
+        handle = mock_file()
+        written = "".join(call.args[0] for call in handle.write.call_args_list)
+        self.assertIn("Total number of tasks             : 3", written)
+        self.assertIn("Total number of overdue tasks     : 1", written)
+        self.assertIn("Data version                      : tasks 0, "
+                      "users 0", written)
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_report_job(self, mock_file):
+        """
+        A ReportJob writes both reports on a worker thread, and a
+        cancelled job stops before writing anything.
+        """
+        job = ReportJob(self.report.snapshot()).start()
+        self.assertTrue(job.wait(5))
+        self.assertTrue(job.succeeded)
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(mock_file.call_count, 2)
+
+        mock_file.reset_mock()
+        job = ReportJob(self.report.snapshot())
+        job.cancel()
+        job.start()
+        self.assertTrue(job.wait(5))
+        self.assertTrue(job.cancelled)
+        self.assertFalse(job.succeeded)
+        mock_file.assert_not_called()
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_report_job_released(self, mock_file):
+        """
+        A generator run as a job reports its results again once the
+        job is over.
+        """
+        job = ReportJob(self.report).start()
+        self.assertTrue(job.wait(5))
+        self.assertIsNone(self.report.job)
+        with patch("builtins.print") as mock_print:
+            self.report.generate()
+        mock_print.assert_called_once()
+
 
 # Run the tests
 if __name__ == '__main__':
@@ -0,0 +1,166 @@
+"""
+test_stress_test.py
+
+Unit tests for sessions sharing data files through locked(), and a
+short run of the stress test harness.
+
+Uses temporary directories for the data files.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from report_generator import ReportGenerator
+from stress_test import run_stress
+from task_manager_build import Task, TaskManager
+from user_input import delete_task_input
+from user_manager import User, UserManager
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+
+class TestLockedSessions(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            f.write("alice, Task 1, D, 01 Jan 2024, 01 Feb 2024, No\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def titles(self):
+        return [(task.title, task.completed)
+                for task in TaskManager(self.task_file).tasks]
+
+    def test_unlocked_save_loses_update(self):
+        """
+        A session saving a stale task list drops another's new task.
+        """
+        first, second = TaskManager(self.task_file), \
+            TaskManager(self.task_file)
+        first.add_task(Task("bob", "Task 2", "D", "01 Jan 2024",
+                            "01 Feb 2024"))
+        second.complete_task(second.tasks[0])
+        second.save_tasks()
+        self.assertEqual(self.titles(), [("Task 1", "Yes")])
+
+    def test_locked_sessions_keep_every_update(self):
+        """
+        Under the lock each session reloads the other's changes first.
+        """
+        first, second = TaskManager(self.task_file), \
+            TaskManager(self.task_file)
+        with first.locked():
+            first.add_task(Task("bob", "Task 2", "D", "01 Jan 2024",
+                                "01 Feb 2024"))
+        with second.locked():
+            self.assertEqual(len(second.tasks), 2)
+            second.complete_task(second.tasks[0])
+            second.save_tasks()
+        with first.locked():
+            first.delete_task(1)
+        self.assertEqual(self.titles(), [("Task 1", "Yes")])
+        self.assertEqual(first.tasks[0].completed, "Yes")
+
+    def test_first_lock_keeps_fresh_load(self):
+        """
+        Taking the lock right after loading does not read the files
+        again, unless another session saved them in between.
+        """
+        manager = TaskManager(self.task_file)
+        with patch.object(manager, "reload_tasks") as reload:
+            with manager.locked():
+                pass
+            reload.assert_not_called()
+        with TaskManager(self.task_file).locked() as other:
+            other.delete_task(0)
+        with manager.locked():
+            self.assertEqual(len(manager.tasks), 0)
+
+        user_file = os.path.join(self.tmp.name, "user.txt")
+        with open(user_file, "w") as f:
+            f.write("admin, pass\n")
+        users = UserManager(user_file)
+        with patch.object(users, "read_users") as read:
+            with users.locked():
+                pass
+            read.assert_not_called()
+
+    def test_reload_updates_list_in_place(self):
+        """
+        Reloading under the lock keeps the list reports hold, also
+        when tasks are paged from disk.
+        """
+        for budget in (0, 256):
+            first = TaskManager(self.task_file, cache_budget=budget)
+            report = ReportGenerator(first, UserManager(os.devnull))
+            tasks = first.tasks
+            with TaskManager(self.task_file).locked() as second:
+                second.add_task(Task("bob", f"Added {budget}", "D",
+                                     "01 Jan 2024", "01 Feb 2024"))
+            with first.locked():
+                self.assertIs(first.tasks, tasks)
+            self.assertEqual(report.tasks[-1].title, f"Added {budget}")
+            if first.paged:
+                first.file_index.close()
+
+    def test_menu_delete_finds_moved_task(self):
+        """
+        The delete menu removes the task that was listed, even if
+        another session removed one before it in the meantime.
+        """
+        with open(self.task_file, "a") as f:
+            f.write("bob, Task 2, D, 01 Jan 2024, 01 Feb 2024, No\n")
+        first, second = TaskManager(self.task_file), \
+            TaskManager(self.task_file)
+
+        def remove_first_task(prompt):
+            with second.locked():
+                second.delete_task(0)
+            return "2"
+
+        with patch("builtins.input", side_effect=remove_first_task), \
+                patch("builtins.print"):
+            delete_task_input(first)
+        self.assertEqual(self.titles(), [])
+
+    def test_locked_user_registration(self):
+        """
+        Users registered by two sessions are both kept.
+        """
+        user_file = os.path.join(self.tmp.name, "user.txt")
+        with open(user_file, "w") as f:
+            f.write("admin, pass\n")
+        first, second = UserManager(user_file), UserManager(user_file)
+        with first.locked():
+            first.add_user(User("alice", "a"))
+        with second.locked():
+            second.add_user(User("bob", "b"))
+        self.assertEqual([user.username
+                          for user in UserManager(user_file).users],
+                         ["admin", "alice", "bob"])
+        self.assertTrue(second.has_user("alice"))
+
+
+class TestStressHarness(unittest.TestCase):
+
+    def test_concurrent_writers_consistent(self):
+        """
+        Locked writers in separate processes lose no changes.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            report = run_stress(writers=3, operations=15, tasks=50,
+                                data_dir=tmp)
+        self.assertTrue(report["consistent"], report["problems"])
+        self.assertEqual(report["operations"], 45)
+        self.assertEqual(report["missing"], 0)
+        self.assertGreater(report["ops_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,105 @@
+"""
+test_task_archive.py
+
+Unit tests for the TaskArchive class and archiving completed tasks.
+
+Uses a temporary directory for the task file and its archive.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from unittest.mock import mock_open, patch
+from report_generator import ReportGenerator
+from task_archive import TaskArchive
+from task_manager_build import Task, TaskManager
+from user_manager import User
+
+
+class TestTaskArchive(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_append_and_read_back(self):
+        """
+        Appended tasks are read back in order and counted per user.
+        """
+        archive = TaskArchive(self.task_file)
+        archive.append([Task("alice", "T1", "D", "01 Jan 2023",
+                             "02 Jan 2023", "Yes")])
+        archive.append([Task("bob", "T2", "D", "01 Jan 2023",
+                             "03 Jan 2023", "Yes")])
+
+        self.assertEqual([t.title for t in archive.iter_tasks()],
+                         ["T1", "T2"])
+        reopened = TaskArchive(self.task_file)
+        self.assertEqual(reopened.total, 2)
+        self.assertEqual(reopened.user_counts(), {"alice": 1, "bob": 1})
+
+    def test_stats_rebuilt_when_missing(self):
+        """
+        Aggregates are recomputed from the archive if their file is lost.
+        """
+        archive = TaskArchive(self.task_file)
+        archive.append([Task("alice", "T1", "D", "01 Jan 2023",
+                             "02 Jan 2023", "Yes")])
+        os.remove(archive.stats_path)
+        self.assertEqual(TaskArchive(self.task_file).total, 1)
+
+    def test_archive_completed_moves_old_tasks(self):
+        """
+        Only completed tasks due before the cutoff leave the hot file.
+        """
+        with open(self.task_file, "w") as f:
+            f.write("username, title, description, date_add, date_due, "
+                    "Completed\n"
+                    "alice, Old, D, 01 Jan 2023, 01 Feb 2023, Yes\n"
+                    "alice, Open, D, 01 Jan 2023, 01 Feb 2023, No\n"
+                    "alice, Recent, D, 01 Jan 2023, 25 Feb 2023, Yes\n")
+        manager = TaskManager(self.task_file)
+        count = manager.archive_completed(
+            30, today=datetime.date(2023, 3, 10))
+
+        self.assertEqual(count, 1)
+        self.assertEqual([t.title for t in TaskManager(self.task_file).tasks],
+                         ["Open", "Recent"])
+        self.assertEqual(manager.archive.total, 1)
+
+
+class TestReportsWithArchive(unittest.TestCase):
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_task_overview_counts_archive(self, mock_file):
+        """
+        Archived tasks count as completed tasks in the task overview.
+        """
+        class FakeArchive:
+            total = 2
+
+            def user_counts(self):
+                return {"alice": 2}
+
+        class MockTaskManager:
+            tasks = [Task("alice", "T", "D", "01 Jan 2023", "01 Jan 2099",
+                          "No")]
+            archive = FakeArchive()
+
+        class MockUserManager:
+            users = [User("alice", "pass")]
+
+        report = ReportGenerator(MockTaskManager(), MockUserManager())
+        report.write_task_overview()
+        written = "".join(call.args[0]
+                          for call in mock_file().write.call_args_list)
+        self.assertIn("Total number of tasks             : 3", written)
+        self.assertIn("Total number of completed tasks   : 2", written)
+
+
+if __name__ == '__main__':
+    unittest.main()
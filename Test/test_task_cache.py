@@ -0,0 +1,140 @@
+"""
+test_task_cache.py
+
+Unit tests for the PagedTaskList class and TaskManager in paged mode.
+
+Each test runs the same changes on a paged and a fully loaded
+TaskManager and compares the resulting task files.
+"""
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+from task_cache import PAGE_SIZE
+from task_manager_build import Task, TaskManager
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+TASKS = PAGE_SIZE * 3 + 10
+
+BUDGET = PAGE_SIZE * 2
+
+
+def task_line(number):
+    status = "Yes" if number % 4 == 0 else "No"
+    return (f"user{number % 5}, Task {number}, Description {number}, "
+            f"01 Jan 2024, {number % 28 + 1:02d} Feb 2024, {status}\n")
+
+
+class TestPagedTaskList(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paged_file = os.path.join(self.tmp.name, "paged.txt")
+        self.loaded_file = os.path.join(self.tmp.name, "loaded.txt")
+        with open(self.paged_file, "w") as f:
+            f.write(HEADER)
+            for number in range(TASKS):
+                f.write(task_line(number))
+        shutil.copy(self.paged_file, self.loaded_file)
+        self.paged = TaskManager(self.paged_file, cache_budget=BUDGET)
+        self.loaded = TaskManager(self.loaded_file, cache_budget=0)
+
+    def tearDown(self):
+        self.paged.file_index.close()
+        self.tmp.cleanup()
+
+    def assertSameFiles(self):
+        with open(self.paged_file) as paged, \
+                open(self.loaded_file) as loaded:
+            self.assertEqual(paged.read(), loaded.read())
+
+    def test_reads_match_and_stay_in_budget(self):
+        """
+        A full scan returns every task but keeps at most the budget.
+        """
+        self.assertTrue(self.paged.paged)
+        self.assertEqual(
+            [task.to_file_string() for task in self.paged.tasks],
+            [task.to_file_string() for task in self.loaded.tasks])
+        info = self.paged.tasks.cache_info()
+        self.assertLessEqual(info["pages"], BUDGET // PAGE_SIZE)
+        self.assertEqual(info["misses"], 4)
+        self.assertEqual(info["hits"], TASKS - 4)
+        self.assertEqual(self.paged.tasks[-1].title, f"Task {TASKS - 1}")
+
+    def test_changes_survive_eviction(self):
+        """
+        Tasks changed and then paged out are written back on save,
+        including through references held while they were evicted.
+        """
+        first = self.paged.tasks[0]
+        held = self.paged.tasks[PAGE_SIZE]
+        first.title = "Changed"
+        for _ in self.paged.tasks:
+            pass
+        held.mark_complete()
+        for _ in self.paged.tasks:
+            pass
+        self.assertIs(self.paged.tasks[PAGE_SIZE], held)
+        self.paged.save_tasks()
+
+        self.loaded.tasks[0].title = "Changed"
+        self.loaded.tasks[PAGE_SIZE].mark_complete()
+        self.loaded.save_tasks()
+        self.assertSameFiles()
+        self.assertEqual(self.paged.tasks[0].title, "Changed")
+
+    def test_change_after_eviction_is_saved(self):
+        """
+        A task changed after its page was dropped, and then no longer
+        referenced, is still written back, including across saves.
+        """
+        for manager in (self.paged, self.loaded):
+            task = manager.tasks[5]
+            for _ in manager.tasks:
+                pass
+            manager.reschedule_task(task, "09 Sep 2025")
+            del task
+            manager.save_tasks()
+            task = manager.tasks[7]
+            manager.delete_task(2)
+            for _ in manager.tasks:
+                pass
+            task.title = "Moved"
+            del task
+            manager.save_tasks()
+        self.assertSameFiles()
+        self.assertEqual(self.paged.tasks[4].date_due, "09 Sep 2025")
+        self.assertEqual(self.paged.tasks[6].title, "Moved")
+
+    def test_edit_flows_match_loaded_manager(self):
+        """
+        Adding, deleting, completing, reassigning and archiving give
+        the same file as with all tasks loaded.
+        """
+        today = datetime.date(2024, 4, 1)
+        for manager in (self.paged, self.loaded):
+            manager.add_task(Task("user1", "New", "D", "01 Jan 2024",
+                                  "01 Mar 2024", "No"))
+            manager.add_tasks([Task("user2", f"Batch {n}", "D",
+                                    "01 Jan 2024", "02 Mar 2024", "No")
+                               for n in range(3)])
+            manager.delete_task(5)
+            manager.delete_task(len(manager.tasks) - 2)
+            manager.complete_tasks(user="user3")
+            manager.reassign_tasks("user1", "user4", completed=False)
+            manager.archive_completed(max_age_days=40, today=today)
+            manager.delete_task(PAGE_SIZE + 1)
+        self.assertSameFiles()
+        self.assertEqual(len(self.paged.tasks), len(self.loaded.tasks))
+        self.assertEqual(self.paged.fetch_task(3).to_file_string(),
+                         self.loaded.tasks[3].to_file_string())
+        self.assertGreater(self.paged.tasks.write_backs, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+"""
+test_task_index.py
+
+Unit tests for the TaskFileIndex class and random access to tasks.
+
+Uses a temporary directory for the task file and its sidecar index.
+"""
+
+import os
+import tempfile
+import unittest
+from task_index import TaskFileIndex
+from task_manager_build import Task, TaskManager
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+
+def task_line(number):
+    return (f"user{number % 3}, Task {number}, Description {number}, "
+            f"01 Jan 2024, 0{number % 9 + 1} Feb 2024, No\n")
+
+
+class TestTaskFileIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            f.write("not a task\n")
+            for number in range(50):
+                f.write(task_line(number))
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_get_matches_loaded_tasks(self):
+        """
+        Task N read through the index matches position N after loading.
+        """
+        manager = TaskManager(self.task_file)
+        index = TaskFileIndex(self.task_file).open()
+        self.assertEqual(len(index), 50)
+        for number in (0, 17, 49):
+            self.assertEqual(index.get(number).to_file_string(),
+                             manager.tasks[number].to_file_string())
+        self.assertEqual([task.title for task in index.page(48, 5)],
+                         ["Task 48", "Task 49"])
+        index.close()
+
+    def test_reopen_extends_after_append(self):
+        """
+        Lines appended while the index was closed are indexed on open.
+        """
+        TaskFileIndex(self.task_file).build().close()
+        with open(self.task_file, "a") as f:
+            f.write(task_line(50))
+        index = TaskFileIndex(self.task_file).open()
+        self.assertEqual(len(index), 51)
+        self.assertEqual(index.get(50).title, "Task 50")
+        index.close()
+
+    def test_reopen_rebuilds_after_rewrite(self):
+        """
+        A rewritten task file is detected and indexed from scratch.
+        """
+        TaskFileIndex(self.task_file).build().close()
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            for number in range(60, 70):
+                f.write(task_line(number))
+        index = TaskFileIndex(self.task_file).open()
+        self.assertEqual(len(index), 10)
+        self.assertEqual(index.get(0).title, "Task 60")
+        index.close()
+
+    def test_refresh_after_partial_last_line(self):
+        """
+        A last line still being written is indexed once it is
+        complete, without dropping the task before it, and a line that
+        stops looking like a task is dropped from the sidecar too.
+        """
+        with open(self.task_file, "a") as f:
+            f.write("user0, Task 50, Desc")
+        index = TaskFileIndex(self.task_file).build()
+        self.assertEqual(len(index), 50)
+        with open(self.task_file, "a") as f:
+            f.write("ription 50, 01 Jan 2024, 01 Feb 2024, No\n")
+            f.write(task_line(51))
+        index.refresh()
+        self.assertEqual([task.title for task in index.page(48, 5)],
+                         ["Task 48", "Task 49", "Task 50", "Task 51"])
+
+        with open(self.task_file, "a") as f:
+            f.write("user0, Task 52, D, 01 Jan 2024, 01 Feb 2024, No")
+        index.refresh()
+        self.assertEqual(len(index), 53)
+        with open(self.task_file, "a") as f:
+            f.write(", extra field\n")
+        index.refresh()
+        self.assertEqual(len(index), 52)
+        index.close()
+        reopened = TaskFileIndex(self.task_file).open()
+        self.assertEqual(len(reopened), 52)
+        self.assertEqual(reopened.get(49).title, "Task 49")
+        reopened.close()
+
+    def test_task_manager_keeps_index_current(self):
+        """
+        add_task extends the open index and save_tasks invalidates it.
+        """
+        manager = TaskManager(self.task_file)
+        self.assertEqual(manager.fetch_task(3).title, "Task 3")
+        manager.add_task(Task("user1", "New", "D", "01 Jan 2024",
+                              "01 Feb 2024", "No"))
+        self.assertEqual(manager.fetch_task(50).title, "New")
+
+        manager.delete_task(0)
+        self.assertFalse(os.path.exists(self.task_file + ".idx"))
+        self.assertEqual([task.title for task in manager.task_page(0, 2)],
+                         ["Task 1", "Task 2"])
+        manager.file_index.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+test_task_io.py
+
+Unit tests for bulk task import and export.
+
+Covers validation of imported rows, all-or-nothing batches and
+CSV/JSONL export using temporary files.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from task_io import import_tasks, export_tasks
+from task_manager_build import Task
+from user_manager import User, UserManager
+
+
+class TestTaskIO(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a temporary directory and a user manager with one user.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.user_manager = UserManager()
+        self.user_manager.users = [User("alice", "pass")]
+        self.task_manager = MagicMock()
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.tmp.name, name)
+        with open(path, "w") as f:
+            f.write(content)
+        return path
+
+    def test_import_csv(self):
+        """
+        Valid CSV rows are imported in one batch with normalised dates.
+        """
+        path = self.write("tasks.csv",
+                          "username,title,description,date_add,date_due\n"
+                          "alice,Report,Write it,01:02:2025,01 Mar 2025\n")
+        imported, errors = import_tasks(path, self.task_manager,
+                                        self.user_manager)
+        self.assertEqual((imported, errors), (1, []))
+        tasks = self.task_manager.add_tasks.call_args.args[0]
+        self.assertEqual(tasks[0].date_add, "01 Feb 2025")
+        self.assertEqual(tasks[0].completed, "No")
+
+    def test_import_invalid_rows_rejects_batch(self):
+        """
+        An unknown user or bad date rejects the whole batch.
+        """
+        path = self.write("tasks.jsonl",
+                          json.dumps({"username": "bob", "title": "T",
+                                      "description": "D",
+                                      "date_due": "01 Mar 2025"}) + "\n" +
+                          json.dumps({"username": "alice", "title": "T",
+                                      "description": "D",
+                                      "date_due": "31 Feb 2025"}) + "\n" +
+                          json.dumps({"username": "alice", "title": "T",
+                                      "description": "D",
+                                      "date_due": "01 Mar 2025"}) + "\n")
+        imported, errors = import_tasks(path, self.task_manager,
+                                        self.user_manager)
+        self.assertEqual(imported, 0)
+        self.assertEqual(len(errors), 2)
+        self.task_manager.add_tasks.assert_not_called()
+
+    def test_import_skip_invalid(self):
+        """
+        With skip_invalid the valid rows are still imported.
+        """
+        path = self.write("tasks.csv",
+                          "username,title,description,date_due\n"
+                          "alice,\"a, b\",D,01 Mar 2025\n"
+                          "alice,Fine,D,01 Mar 2025\n")
+        imported, errors = import_tasks(path, self.task_manager,
+                                        self.user_manager,
+                                        skip_invalid=True)
+        self.assertEqual(imported, 1)
+        self.assertIn("commas", errors[0])
+
+    def test_import_rejects_carriage_return(self):
+        """
+        A bare carriage return would split the task's line when the
+        task file is read back, so it is rejected like a line break.
+        """
+        path = self.write("tasks.jsonl",
+                          json.dumps({"username": "alice",
+                                      "title": "One\rTwo",
+                                      "description": "D",
+                                      "date_due": "01 Mar 2025"}) + "\n")
+        imported, errors = import_tasks(path, self.task_manager,
+                                        self.user_manager)
+        self.assertEqual(imported, 0)
+        self.assertIn("line breaks", errors[0])
+
+    def test_export_csv_quotes_fields(self):
+        """
+        CSV export quotes fields that need it.
+        """
+        path = os.path.join(self.tmp.name, "out.csv")
+        tasks = [Task("alice", "T", "say \"hi\"", "01 Jan 2025",
+                      "02 Jan 2025")]
+        self.assertEqual(export_tasks(tasks, path), 1)
+        with open(path) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], "username,title,description,"
+                                   "date_add,date_due,completed")
+        self.assertEqual(lines[1], 'alice,T,"say ""hi""",01 Jan 2025,'
+                                   '02 Jan 2025,No')
+
+    def test_export_jsonl(self):
+        """
+        JSONL export writes one object per task.
+        """
+        path = os.path.join(self.tmp.name, "out.jsonl")
+        tasks = [Task("alice", "T", "D", "01 Jan 2025", "02 Jan 2025")]
+        export_tasks(tasks, path)
+        with open(path) as f:
+            self.assertEqual(json.loads(f.readline())["title"], "T")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -9,12 +9,11 @@ and task management methods using mock file operations.
 
 import unittest
 from unittest.mock import mock_open, patch
-from task_manager_build import Task, TaskManager
+from task_manager_build import Task, TaskManager, LazyTask
 
 # Test the Task class
 class TestTask(unittest.TestCase):
 
-
     def test_task_str(self):
         """
         Test string representation of a Task.
@@ -24,7 +23,6 @@ class TestTask(unittest.TestCase):
                     "Added: 01 Jan 2023\nDue: 05 Jan 2023\nCompleted: No")
         self.assertEqual(str(task), expected)
 
-
     def test_mark_complete(self):
         """
         Test marking a task as complete.
@@ -33,7 +31,6 @@ class TestTask(unittest.TestCase):
         task.mark_complete()
         self.assertEqual(task.completed, "Yes")
 
-
     def test_to_file_string(self):
         """
         Test converting task data to file string format.
@@ -42,11 +39,79 @@ class TestTask(unittest.TestCase):
         expected = "alice, Test, Something, 01 Jan 2023, 02 Jan 2023, No"
         self.assertEqual(task.to_file_string(), expected)
 
+    def test_repeated_fields_shared(self):
+        """
+        Test that equal usernames, dates and status share one string.
+        """
+        line = "carol, T, D, 01 Jan 2023, 05 Jan 2023, no"
+        first = Task(*[field.strip() for field in line.split(",")])
+        second = LazyTask(line)
+        for name in ("username", "date_add", "date_due", "completed"):
+            self.assertIs(getattr(first, name), getattr(second, name))
+
+
+def is_decoded(task, name):
+    """
+    Returns True if a LazyTask field has been decoded, without
+    triggering decoding.
+    """
+    try:
+        object.__getattribute__(task, name)
+    except AttributeError:
+        return False
+    return True
+
+
+# Test the LazyTask class
+class TestLazyTask(unittest.TestCase):
+
+    def test_fields_decoded_on_access(self):
+        """
+        Test that fields are decoded only when read, and match Task.
+        """
+        task = LazyTask("bob ,  Task1, Desc1, 01 Jan 2023, 05 Jan 2023, no")
+        self.assertFalse(is_decoded(task, "title"))
+        self.assertEqual(task.title, "Task1")
+        self.assertTrue(is_decoded(task, "title"))
+        self.assertFalse(is_decoded(task, "description"))
+        self.assertEqual(task.username, "bob")
+        self.assertEqual(task.completed, "No")
+
+    def test_untouched_task_written_as_is(self):
+        """
+        Test that an unchanged record is written back byte for byte.
+        """
+        line = "bob ,  Task1, Desc1, 01 Jan 2023, 05 Jan 2023, no"
+        task = LazyTask(line)
+        task.title
+        self.assertEqual(task.to_file_string(), line)
+
+    def test_changed_task_reformatted(self):
+        """
+        Test that a changed record is written like a normal Task.
+        """
+        task = LazyTask("bob, Task1, Desc1, 01 Jan 2023, 05 Jan 2023, No")
+        task.mark_complete()
+        self.assertEqual(task.to_file_string(),
+                         "bob, Task1, Desc1, 01 Jan 2023, 05 Jan 2023, Yes")
+
+    @patch("builtins.open", new_callable=mock_open,
+           read_data="username, title\n"
+                     "bob, T1, D1, 01 Jan 2023, 05 Jan 2023, No\n"
+                     "bad, line\n")
+    def test_lazy_load(self, mock_file):
+        """
+        Test loading lazy records, skipping the header and bad lines.
+        """
+        manager = TaskManager(lazy=True)
+        self.assertEqual(len(manager.tasks), 1)
+        self.assertIsInstance(manager.tasks[0], LazyTask)
+        self.assertEqual(manager.tasks[0].title, "T1")
+
 
 # Test the TaskManager class
 class TestTaskManager(unittest.TestCase):
 
-
     @patch("builtins.open", new_callable=mock_open, read_data="bob, Task1, Desc1, 01 Jan 2023, 05 Jan 2023, No\n")
     def test_load_tasks(self, mock_file):
         """
@@ -56,7 +121,6 @@ class TestTaskManager(unittest.TestCase):
         self.assertEqual(len(manager.tasks), 1)
         self.assertEqual(manager.tasks[0].username, "bob")
 
-
     @patch("builtins.open", new_callable=mock_open)
     def test_add_task_and_save(self, mock_file):
         """
@@ -73,6 +137,21 @@ class TestTaskManager(unittest.TestCase):
         # Check if the task was written to the file
         mock_file().write.assert_called_with(task.to_file_string() + "\n")
 
+    @patch("builtins.open", new_callable=mock_open)
+    def test_add_tasks_single_write(self, mock_file):
+        """
+        Test that a batch of tasks is appended with one write.
+        """
+        manager = TaskManager()
+        manager.tasks = []
+        tasks = [Task("a", "T1", "D1", "01 Jan 2023", "02 Jan 2023"),
+                 Task("b", "T2", "D2", "01 Jan 2023", "03 Jan 2023")]
+        manager.add_tasks(tasks)
+
+        self.assertEqual(manager.tasks, tasks)
+        mock_file().write.assert_called_once_with(
+            tasks[0].to_file_string() + "\n" +
+            tasks[1].to_file_string() + "\n")
 
     @patch("builtins.open", new_callable=mock_open)
     def test_delete_task(self, mock_file):
@@ -88,7 +167,6 @@ class TestTaskManager(unittest.TestCase):
         self.assertEqual(len(manager.tasks), 1)
         self.assertEqual(manager.tasks[0].title, "T2")
 
-
     def test_view_user_tasks(self):
         """
         Test viewing tasks for a specific user.
@@ -103,7 +181,6 @@ class TestTaskManager(unittest.TestCase):
             manager.view_user_tasks("bob")
             mock_print.assert_any_call("User        : bob")
 
-
     def test_view_completed_tasks_none(self):
         """
         Test when no tasks are marked as completed.
@@ -116,7 +193,6 @@ class TestTaskManager(unittest.TestCase):
             manager.view_completed_tasks()
             mock_print.assert_any_call("No completed tasks found.")
 
-
     def test_view_completed_tasks_some(self):
         """
         Test when some tasks are marked as completed.
@@ -132,6 +208,137 @@ class TestTaskManager(unittest.TestCase):
             mock_print.assert_any_call("Completed   : Yes")
 
 
+# Test the TaskManager query API
+class TestTaskQuery(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Set up a manager with four tasks for two users.
+        """
+        self.manager = TaskManager()
+        self.manager.tasks = [
+            Task("alice", "Budget", "Plan budget", "01 Jan 2025",
+                 "10 Mar 2025"),
+            Task("bob", "Report", "Write report", "01 Jan 2025",
+                 "01 Feb 2025", "Yes"),
+            Task("alice", "Review", "Review budget", "01 Jan 2025",
+                 "01 Jan 2025"),
+            Task("alice", "Deploy", "Ship it", "01 Jan 2025",
+                 "20 Feb 2025", "Yes"),
+        ]
+
+    def titles(self, **filters):
+        return [task.title for task in self.manager.query(**filters)]
+
+    def test_filters(self):
+        """
+        Test each filter alone and combined.
+        """
+        self.assertEqual(self.titles(user="alice"),
+                         ["Budget", "Review", "Deploy"])
+        self.assertEqual(self.titles(completed=True), ["Report", "Deploy"])
+        self.assertEqual(self.titles(user="alice", completed=False),
+                         ["Budget", "Review"])
+        self.assertEqual(self.titles(due_before="01 Feb 2025"), ["Review"])
+        self.assertEqual(self.titles(due_after="01:02:2025"),
+                         ["Budget", "Deploy"])
+        self.assertEqual(self.titles(text="BUDGET"), ["Budget", "Review"])
+
+    def test_order_limit_offset(self):
+        """
+        Test sorting with a limit and offset.
+        """
+        self.assertEqual(self.titles(order_by="date_due", limit=2),
+                         ["Review", "Report"])
+        self.assertEqual(self.titles(order_by="-date_due", limit=2, offset=1),
+                         ["Deploy", "Report"])
+        self.assertEqual(self.titles(limit=1, offset=3), ["Deploy"])
+        with self.assertRaises(ValueError):
+            list(self.manager.query(order_by="colour"))
+
+    def test_planner_uses_user_index(self):
+        """
+        Test that a user filter reads only that user's tasks.
+        """
+        list(self.manager.query(user="bob"))
+        self.assertEqual(self.manager.last_plan, "user")
+        list(self.manager.query())
+        self.assertEqual(self.manager.last_plan, "scan")
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_index_follows_changes(self, mock_file):
+        """
+        Test that added and edited tasks are found after saving.
+        """
+        self.assertEqual(self.titles(user="bob"), ["Report"])
+        self.manager.add_task(Task("bob", "New", "D", "01 Jan 2025",
+                                   "02 Jan 2025"))
+        self.assertEqual(self.titles(user="bob"), ["Report", "New"])
+        self.manager.tasks[0].username = "bob"
+        self.manager.save_tasks()
+        self.assertEqual(self.titles(user="bob"), ["Budget", "Report", "New"])
+
+    def test_index_follows_unsaved_changes(self):
+        """
+        Test that reassigned, completed and rescheduled tasks are found
+        before the change is saved.
+        """
+        self.assertEqual(self.titles(user="bob"), ["Report"])
+        self.assertEqual(self.titles(due_before="01 Feb 2025"), ["Review"])
+        self.manager.reassign_task(self.manager.tasks[0], "bob")
+        self.assertEqual(self.titles(user="bob"), ["Budget", "Report"])
+        self.manager.complete_task(self.manager.tasks[2])
+        self.assertEqual(self.titles(user="alice", completed=False), [])
+        self.manager.reschedule_task(self.manager.tasks[3], "15 Jan 2025")
+        self.assertEqual(self.titles(due_before="01 Feb 2025"),
+                         ["Review", "Deploy"])
+
+
+# Test bulk reassignment and completion
+class TestBulkOperations(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = TaskManager()
+        self.manager.tasks = [
+            Task("alice", "A1", "D", "01 Jan 2025", "10 Mar 2025"),
+            Task("alice", "A2", "D", "01 Jan 2025", "01 Jan 2025", "Yes"),
+            Task("bob", "B1", "D", "01 Jan 2025", "01 Feb 2025"),
+        ]
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_reassign_open_tasks(self, mock_file):
+        """
+        Test reassigning only open tasks, saved with one rewrite.
+        """
+        with patch.object(self.manager, "save_tasks") as mock_save:
+            count = self.manager.reassign_tasks("alice", "bob",
+                                                completed=False)
+        self.assertEqual(count, 1)
+        self.assertEqual([t.username for t in self.manager.tasks],
+                         ["bob", "alice", "bob"])
+        mock_save.assert_called_once()
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_complete_tasks_due_before(self, mock_file):
+        """
+        Test completing every open task due before a date.
+        """
+        with patch.object(self.manager, "save_tasks") as mock_save:
+            count = self.manager.complete_tasks(due_before="01 Mar 2025")
+        self.assertEqual(count, 1)
+        self.assertEqual(self.manager.tasks[2].completed, "Yes")
+        self.assertEqual(self.manager.tasks[0].completed, "No")
+        mock_save.assert_called_once()
+
+    def test_bulk_no_match_skips_save(self):
+        """
+        Test that nothing is written when no task matches.
+        """
+        with patch.object(self.manager, "save_tasks") as mock_save:
+            self.assertEqual(self.manager.reassign_tasks("carol", "bob"), 0)
+        mock_save.assert_not_called()
+
+
 # Run the tests
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
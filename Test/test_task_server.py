@@ -0,0 +1,218 @@
+"""
+test_task_server.py
+
+Unit tests for the TaskServer request handlers.
+
+Requests are dispatched directly, without opening sockets, against
+in-memory task and user managers.
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock
+from change_feed import ChangeFeed
+from task_manager_build import Task, TaskManager
+from task_server import TaskServer
+from user_manager import User, UserManager
+
+
+class TestTaskServer(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a server around mock managers holding two tasks.
+        """
+        self.task_manager = MagicMock()
+        self.task_manager.tasks = [
+            Task("alice", "Task 1", "Desc", "01 Jan 2023", "01 Jan 2022"),
+            Task("bob", "Task 2", "Desc", "01 Jan 2023", "01 Jan 2099"),
+        ]
+        # Single-task changes are made through the task manager
+        self.task_manager.complete_task.side_effect = Task.mark_complete
+        self.task_manager.reassign_task.side_effect = \
+            lambda task, username: setattr(task, "username", username)
+        self.task_manager.reschedule_task.side_effect = \
+            lambda task, date_due: setattr(task, "date_due", date_due)
+        self.user_manager = MagicMock()
+        self.user_manager.users = [User("alice", "pass"),
+                                   User("bob", "word")]
+        self.server = TaskServer(self.task_manager, self.user_manager,
+                                 MagicMock())
+
+    def request(self, method, path, data=None):
+        """
+        Dispatch a request through a running writer and return
+        (status, payload).
+        """
+        async def run():
+            await self.server.start()
+            body = json.dumps(data).encode() if data is not None else b""
+            return await self.server.dispatch(method, path, body)
+        return asyncio.run(run())
+
+    def test_add_task_unknown_user(self):
+        """
+        Adding a task for an unregistered user is rejected.
+        """
+        status, payload = self.request("POST", "/tasks", {
+            "username": "carol", "title": "T", "description": "D",
+            "date_add": "01 Jan 2023", "date_due": "02 Jan 2023"})
+        self.assertEqual(status, 400)
+        self.task_manager.add_task.assert_not_called()
+
+    def test_add_task_rejects_commas(self):
+        """
+        Fields containing commas cannot be stored and are rejected.
+        """
+        status, payload = self.request("POST", "/tasks", {
+            "username": "alice", "title": "a, b", "description": "D",
+            "date_add": "01 Jan 2023", "date_due": "02 Jan 2023"})
+        self.assertEqual(status, 400)
+
+    def test_complete_task(self):
+        """
+        POST /tasks/<index>/complete marks the task and saves once.
+        """
+        status, payload = self.request("POST", "/tasks/0/complete")
+        self.assertEqual(status, 200)
+        self.assertEqual(self.task_manager.tasks[0].completed, "Yes")
+        self.task_manager.save_tasks.assert_called_once()
+
+    def test_complete_task_conflict(self):
+        """
+        A stale expected version is reported as a conflict.
+        """
+        status, payload = self.request("POST", "/tasks/0/complete",
+                                       {"expect": "stale"})
+        self.assertEqual(status, 409)
+        self.assertEqual(self.task_manager.tasks[0].completed, "No")
+
+    def test_bulk_reassign(self):
+        """
+        POST /tasks/reassign runs one bulk reassignment on the writer.
+        """
+        self.task_manager.reassign_tasks.return_value = 1
+        status, payload = self.request("POST", "/tasks/reassign", {
+            "from_user": "alice", "to_user": "bob", "completed": False})
+        self.assertEqual((status, payload), (200, {"count": 1}))
+        self.task_manager.reassign_tasks.assert_called_once_with(
+            "alice", "bob", False, None, None, None)
+
+    def test_bulk_complete_rejects_bad_date(self):
+        """
+        Invalid filter dates are rejected before any change is made.
+        """
+        status, payload = self.request("POST", "/tasks/complete",
+                                       {"due_before": "someday"})
+        self.assertEqual(status, 400)
+        self.task_manager.complete_tasks.assert_not_called()
+
+    def test_unknown_endpoint(self):
+        """
+        Unknown paths return 404 and wrong methods return 405.
+        """
+        self.assertEqual(self.request("GET", "/nothing")[0], 404)
+        self.assertEqual(self.request("PUT", "/tasks")[0], 405)
+
+    def test_auth(self):
+        """
+        POST /auth reports whether the credentials are valid.
+        """
+        self.user_manager.authenticate.return_value = False
+        self.assertEqual(self.request("POST", "/auth", {
+            "username": "alice", "password": "x"})[0], 401)
+
+
+class TestServerDataFiles(unittest.TestCase):
+
+    def setUp(self):
+        """
+        Create a server around managers of temporary data files.
+        """
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+        self.user_file = os.path.join(self.tmp.name, "user.txt")
+        with open(self.task_file, "w") as f:
+            f.write("username, title, description, date_add, "
+                    "date_due, Completed\n"
+                    "alice, Task 1, D, 01 Jan 2024, 01 Feb 2024, No\n")
+        with open(self.user_file, "w") as f:
+            f.write("alice, pass\n")
+        self.server = TaskServer(TaskManager(self.task_file),
+                                 UserManager(self.user_file), MagicMock(),
+                                 port=0)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def request(self, method, path, data=None):
+        async def run():
+            await self.server.start()
+            body = json.dumps(data).encode() if data is not None else b""
+            return await self.server.dispatch(method, path, body)
+        return asyncio.run(run())
+
+    def test_list_tasks_filters(self):
+        """
+        GET /tasks?user= returns only that user's tasks with their
+        index, and completed= filters by status.
+        """
+        with open(self.task_file, "a") as f:
+            f.write("bob, Task 2, D, 01 Jan 2024, 01 Feb 2024, Yes\n")
+        self.server.task_manager.reload_tasks()
+        status, payload = self.request("GET", "/tasks?user=bob")
+        self.assertEqual(status, 200)
+        self.assertEqual([task["index"] for task in payload["tasks"]], [1])
+        status, payload = self.request("GET", "/tasks?completed=No")
+        self.assertEqual([task["title"] for task in payload["tasks"]],
+                         ["Task 1"])
+        self.assertEqual(self.request("GET", "/tasks?completed=x")[0], 400)
+
+    def test_server_keeps_locked_local_changes(self):
+        """
+        A server write after a menu session's locked write keeps both.
+        """
+        local_tasks = TaskManager(self.task_file)
+        with local_tasks.locked():
+            local_tasks.add_task(Task("alice", "Local", "D", "01 Jan 2024",
+                                      "01 Mar 2024"))
+        local_users = UserManager(self.user_file)
+        with local_users.locked():
+            local_users.add_user(User("bob", "word"))
+
+        self.assertEqual(self.request("POST", "/tasks/0/complete")[0], 200)
+        self.assertEqual(self.request("POST", "/users", {
+            "username": "carol", "password": "x"})[0], 201)
+
+        self.assertEqual([(task.title, task.completed) for task
+                          in TaskManager(self.task_file).tasks],
+                         [("Task 1", "Yes"), ("Local", "No")])
+        self.assertEqual([user.username for user
+                          in UserManager(self.user_file).users],
+                         ["alice", "bob", "carol"])
+
+    def test_update_publishes_only_changed_fields(self):
+        """
+        Completing a task through the edit endpoint, which clients send
+        every editable field to, logs one task_completed event.
+        """
+        feed = ChangeFeed(os.path.join(self.tmp.name, "changes.jsonl"))
+        self.server.task_manager.change_feed = feed
+        status, payload = self.request("PATCH", "/tasks/0", {
+            "username": "alice", "date_due": "01 Feb 2024",
+            "completed": "Yes"})
+        feed.close()
+        self.assertEqual(status, 200)
+        self.assertEqual([event.kind for event in feed.replay()],
+                         ["task_completed"])
+        self.assertEqual(self.request("PATCH", "/tasks/0", {
+            "completed": "No"})[0], 400)
+        self.assertEqual(self.request("PATCH", "/tasks/0", {
+            "completed": "maybe"})[0], 400)
+
+
+if __name__ == '__main__':
+    unittest.main()
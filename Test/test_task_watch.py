@@ -0,0 +1,72 @@
+"""
+test_task_watch.py
+
+Unit tests for the TaskWatcher live dashboard.
+
+Uses a temporary task file that is appended to and rewritten
+between polls.
+"""
+
+import datetime
+import os
+import tempfile
+import unittest
+from task_watch import TaskWatcher
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+
+class TestTaskWatcher(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.task_file = os.path.join(self.tmp.name, "tasks.txt")
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            f.write("alice, T1, D, 01 Jan 2023, 01 Jan 2022, No\n")
+            f.write("bob, T2, D, 01 Jan 2023, 01 Jan 2099, Yes\n")
+        self.watcher = TaskWatcher(self.task_file)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def append(self, text):
+        with open(self.task_file, "a") as f:
+            f.write(text)
+
+    def test_only_new_lines_are_read(self):
+        """
+        Appended lines are counted; a line is counted once complete.
+        """
+        self.assertEqual(self.watcher.poll(), 2)
+        self.assertEqual(self.watcher.poll(), 0)
+
+        self.append("bob, T3, D, 01 Jan 2023, 01 Jan 2020, No\nbob, T4")
+        self.assertEqual(self.watcher.poll(), 1)
+        self.append(", D, 01 Jan 2023, 01 Jan 2099, No\n")
+        self.assertEqual(self.watcher.poll(), 1)
+
+        self.assertEqual(self.watcher.total, 4)
+        self.assertEqual(self.watcher.completed, 1)
+        self.assertEqual(self.watcher.user_open["bob"], 2)
+        text = self.watcher.render(datetime.datetime(2024, 1, 1, 12))
+        self.assertIn("Total number of overdue tasks     : 2", text)
+        self.assertIn("bob             : 2 open, 1 overdue, 3 total", text)
+
+    def test_rewrite_rebuilds_totals(self):
+        """
+        A rewritten file is read again from the start.
+        """
+        self.watcher.poll()
+        with open(self.task_file, "w") as f:
+            f.write(HEADER)
+            f.write("alice, T1, D, 01 Jan 2023, 01 Jan 2022, Yes\n")
+            f.write("bob, T2, D, 01 Jan 2023, 01 Jan 2099, Yes\n")
+        self.assertEqual(self.watcher.poll(), 2)
+        self.assertEqual(self.watcher.total, 2)
+        self.assertEqual(self.watcher.completed, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
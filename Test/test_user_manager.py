@@ -13,7 +13,6 @@ from user_manager import User, UserManager
 
 class TestUser(unittest.TestCase):
     
-    
     def test_user_str(self):
         """
         Test the string representation of a User object.
@@ -24,7 +23,6 @@ class TestUser(unittest.TestCase):
 
 class TestUserManager(unittest.TestCase):
     
-    
     def setUp(self):
         """
         Prepare reusable mock data for multiple tests.
@@ -32,7 +30,6 @@ class TestUserManager(unittest.TestCase):
         self.mock_users_data = "alice, password123\nbob, qwerty\n"
         self.mock_open = mock_open(read_data=self.mock_users_data)
 
-    
     @patch("builtins.open", new_callable=mock_open, read_data="alice, password123\n")
     def test_read_users(self, mock_file):
         """
@@ -42,7 +39,6 @@ class TestUserManager(unittest.TestCase):
         self.assertEqual(len(manager.users), 1)
         self.assertEqual(manager.users[0].username, "alice")
 
-
     def test_authenticate_success(self):
         """
         Test successful authentication with correct credentials.
@@ -51,7 +47,6 @@ class TestUserManager(unittest.TestCase):
         manager.users = [User("bob", "qwerty")]
         self.assertTrue(manager.authenticate("bob", "qwerty"))
 
-
     def test_authenticate_failure(self):
         """
         Test failed authentication with incorrect password.
@@ -60,6 +55,34 @@ class TestUserManager(unittest.TestCase):
         manager.users = [User("bob", "qwerty")]
         self.assertFalse(manager.authenticate("bob", "wrongpass"))
 
+    def test_has_user(self):
+        """
+        Test username lookups, including users added after the first check.
+        """
+        manager = UserManager()
+        manager.users = [User("bob", "qwerty")]
+        self.assertTrue(manager.has_user("bob"))
+        self.assertFalse(manager.has_user("alice"))
+        manager.users.append(User("alice", "123"))
+        self.assertTrue(manager.has_user("alice"))
+
+    @patch("builtins.open", new_callable=mock_open)
+    def test_find_and_suggest_users(self, mock_file):
+        """
+        Test prefix search and suggestions, including added users.
+        """
+        manager = UserManager()
+        manager.users = [User(name, "pw") for name in
+                         ("carol", "bob", "bobby", "alice", "bo")]
+        self.assertEqual(manager.find_users("bo"), ["bo", "bob", "bobby"])
+        self.assertEqual(manager.find_users("bo", limit=2), ["bo", "bob"])
+        self.assertEqual(manager.find_users("z"), [])
+        self.assertEqual(manager.suggest_usernames("alcie"), ["alice"])
+        self.assertEqual(manager.suggest_usernames("karol"), ["carol"])
+
+        manager.add_user(User("boris", "pw"))
+        self.assertEqual(manager.find_users("bor"), ["boris"])
+        self.assertTrue(manager.has_user("boris"))
 
     @patch("builtins.open", new_callable=mock_open)
     def test_save_users(self, mock_file):
@@ -72,7 +95,6 @@ class TestUserManager(unittest.TestCase):
         mock_file().write.assert_any_call("alice, 123\n")
         mock_file().write.assert_any_call("bob, 456\n")
 
-
     @patch("builtins.open", new_callable=mock_open)
     def test_add_user(self, mock_file):
         """
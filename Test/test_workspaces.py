@@ -0,0 +1,75 @@
+"""
+test_workspaces.py
+
+Unit tests for the WorkspaceManager class.
+
+Uses a temporary directory holding one task file per workspace.
+"""
+
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+import workspaces
+from workspaces import WorkspaceManager
+
+
+HEADER = "username, title, description, date_add, date_due, Completed\n"
+
+
+class TestWorkspaceManager(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.paths = {}
+        for name, lines in (
+                ("red", ["alice, T1, D, 01 Jan 2023, 01 Jan 2022, No",
+                         "bob, T2, D, 01 Jan 2023, 01 Jan 2099, Yes"]),
+                ("green", ["alice, T3, D, 01 Jan 2023, 01 Jan 2099, No"]),
+                ("blue", [])):
+            path = os.path.join(self.tmp.name, f"{name}.txt")
+            with open(path, "w") as f:
+                f.write(HEADER + "".join(line + "\n" for line in lines))
+            self.paths[name] = path
+        self.workspaces = WorkspaceManager(self.paths, cache_size=2)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_open_is_lazy_and_evicts_least_recent(self):
+        """
+        Workspaces load on first use and the oldest is closed first.
+        """
+        self.assertFalse(self.workspaces.is_open("red"))
+        red = self.workspaces.open("red")
+        self.assertEqual(len(red.tasks), 2)
+        self.workspaces.open("green")
+        self.assertIs(self.workspaces.open("red"), red)
+
+        self.workspaces.open("blue")
+        self.assertTrue(self.workspaces.is_open("red"))
+        self.assertFalse(self.workspaces.is_open("green"))
+        with self.assertRaises(KeyError):
+            self.workspaces.open("missing")
+
+    def test_report_covers_all_workspaces(self):
+        """
+        The report includes workspaces that were never opened.
+        """
+        self.workspaces.open("green")
+        report_file = os.path.join(self.tmp.name, "report.txt")
+        with patch.dict(workspaces.config,
+                        {"workspace_report_file": report_file}):
+            self.workspaces.write_report()
+        with open(report_file) as f:
+            report = f.read()
+
+        self.assertIn("Total number of tasks          : 3", report)
+        self.assertIn("Total number of overdue tasks  : 1", report)
+        self.assertIn("Workspace: blue", report)
+        self.assertIn("  - alice           : 2\n", report)
+        self.assertFalse(self.workspaces.is_open("red"))
+
+
+if __name__ == "__main__":
+    unittest.main()
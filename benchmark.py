@@ -0,0 +1,384 @@
+"""
+benchmark.py
+
+Benchmark suite for the hot paths of the task manager.
+
+For each dataset size a seeded synthetic dataset is generated (see
+data_generator.py) and every operation is timed, then run again under
+tracemalloc to record its peak memory. Results are written as JSON and
+can be compared against a stored baseline to flag regressions.
+
+With --footprint, each dataset is instead loaded in a fresh process
+with string interning on and off, and the peak resident memory (RSS)
+of each process is compared.
+
+Command line:
+    python benchmark.py --sizes 1000 100000 --output results.json
+    python benchmark.py --save-baseline benchmark_baseline.json
+    python benchmark.py --baseline benchmark_baseline.json
+    python benchmark.py --footprint --sizes 1000000
+"""
+
+import argparse
+import contextlib
+import datetime
+import gc
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from data_generator import generate_dataset  # noqa: E402
+from report_generator import ReportGenerator  # noqa: E402
+from task_manager_build import TaskManager, use_interning  # noqa: E402
+from user_manager import UserManager  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+DEFAULT_SIZES = (1000, 100000, 1000000)
+
+# Number of logins timed in one authenticate measurement
+AUTH_LOOKUPS = 1000
+
+# Timing changes smaller than this are noise, however large in percent
+MIN_SECONDS = 0.005
+
+
+class Dataset:
+    """
+    A generated dataset and the managers loaded from it.
+    """
+
+    def __init__(self, directory, rows, seed):
+        self.directory = directory
+        self.rows = rows
+        self.task_file, self.user_file, self.usernames = \
+            generate_dataset(directory, rows, seed=seed)
+        self.rng = random.Random(seed)
+        with open(self.user_file) as f:
+            self.credentials = [tuple(field.strip()
+                                      for field in line.split(","))
+                                for line in f]
+        self.task_manager = None
+        self.user_manager = None
+
+    def load(self):
+        self.task_manager = TaskManager(self.task_file)
+        self.user_manager = UserManager(self.user_file)
+
+
+def op_load_tasks(data):
+    data.task_manager = TaskManager(data.task_file)
+
+
+def op_load_tasks_lazy(data):
+    TaskManager(data.task_file, lazy=True)
+
+
+def op_save_tasks(data):
+    data.task_manager.save_tasks()
+
+
+def op_authenticate(data):
+    for _ in range(AUTH_LOOKUPS):
+        username, password = data.rng.choice(data.credentials)
+        data.user_manager.authenticate(username, password)
+
+
+def op_view_user_tasks(data):
+    data.task_manager.view_user_tasks(data.usernames[1])
+
+
+def op_generate_reports(data):
+    ReportGenerator(data.task_manager, data.user_manager).generate()
+
+
+def op_delete_task(data):
+    data.task_manager.delete_task(len(data.task_manager.tasks) // 2)
+
+
+# Operation name -> function run against a loaded dataset
+OPERATIONS = {
+    "load_tasks": op_load_tasks,
+    "load_tasks_lazy": op_load_tasks_lazy,
+    "save_tasks": op_save_tasks,
+    "authenticate": op_authenticate,
+    "view_user_tasks": op_view_user_tasks,
+    "generate_reports": op_generate_reports,
+    "delete_task": op_delete_task,
+}
+
+
+def measure(operation, data, repeat, track_memory):
+    """
+    Runs an operation repeat times and returns its timings and,
+    if track_memory is set, the peak memory of one extra run.
+    Output is discarded so terminal speed does not skew results.
+    """
+    timings = []
+    with open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        for _ in range(repeat):
+            gc.collect()
+            start = time.perf_counter()
+            operation(data)
+            timings.append(time.perf_counter() - start)
+
+        result = {"seconds": min(timings),
+                  "median_seconds": statistics.median(timings)}
+        if track_memory:
+            gc.collect()
+            tracemalloc.start()
+            operation(data)
+            result["peak_bytes"] = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+    return result
+
+
+def run_benchmarks(sizes, operations, repeat=3, seed=0,
+                   track_memory=True, data_dir=None):
+    """
+    Runs the selected operations on a dataset of each size.
+    Returns the results as a JSON-ready dictionary.
+    """
+    results = {
+        "meta": {
+            "timestamp": datetime.datetime.now().isoformat(
+                timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": seed,
+            "repeat": repeat,
+        },
+        "results": {},
+    }
+    original_dir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch:
+        for rows in sizes:
+            directory = os.path.join(data_dir or scratch, str(rows))
+            print(f"Generating {rows} tasks...", file=sys.stderr)
+            data = Dataset(directory, rows, seed)
+            data.load()
+            size_results = results["results"][str(rows)] = {}
+            # Reports are written to the working directory
+            os.chdir(directory)
+            try:
+                for name in operations:
+                    print(f"  {name}...", file=sys.stderr)
+                    size_results[name] = measure(OPERATIONS[name], data,
+                                                 repeat, track_memory)
+            finally:
+                os.chdir(original_dir)
+            data.task_manager = data.user_manager = None
+    return results
+
+
+def peak_rss():
+    """
+    Returns the peak resident memory of this process in bytes,
+    or None where the platform does not report it.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Reported in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def footprint_child(task_file, intern, lazy):
+    """
+    Loads a task file and prints the process's peak RSS as JSON.
+    Run in its own process by measure_footprint().
+    """
+    use_interning(intern)
+    before = peak_rss()
+    manager = TaskManager(task_file, lazy=lazy)
+    print(json.dumps({"tasks": len(manager.tasks),
+                      "baseline_rss_bytes": before,
+                      "peak_rss_bytes": peak_rss()}))
+
+
+def measure_footprint(task_file, intern=True, lazy=False):
+    """
+    Loads a task file in a fresh interpreter, so earlier allocations
+    do not hide its peak, and returns that process's measurements.
+    """
+    command = [sys.executable, os.path.abspath(__file__),
+               "--footprint-child", task_file,
+               "--intern" if intern else "--no-intern"]
+    if lazy:
+        command.append("--lazy")
+    output = subprocess.run(command, capture_output=True, text=True,
+                            check=True).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run_footprint(sizes, seed=0, data_dir=None):
+    """
+    Measures the peak RSS of loading a dataset of each size, eagerly
+    and lazily, with and without string interning.
+    """
+    results = {"meta": {"python": platform.python_version(),
+                        "platform": platform.platform(), "seed": seed},
+               "footprint": {}}
+    with tempfile.TemporaryDirectory() as scratch:
+        for rows in sizes:
+            directory = os.path.join(data_dir or scratch, str(rows))
+            print(f"Generating {rows} tasks...", file=sys.stderr)
+            task_file = generate_dataset(directory, rows, seed=seed)[0]
+            size_results = results["footprint"][str(rows)] = {}
+            for lazy in (False, True):
+                for intern in (False, True):
+                    name = ("lazy" if lazy else "eager") + \
+                        ("_interned" if intern else "")
+                    print(f"  {name}...", file=sys.stderr)
+                    size_results[name] = measure_footprint(
+                        task_file, intern, lazy)
+    return results
+
+
+def print_footprint(results):
+    print(f"\n{'Rows':>9}  {'Load':<16}{'Peak RSS MB':>12}"
+          f"{'vs plain':>10}")
+    for size, loads in results["footprint"].items():
+        for name, metrics in loads.items():
+            plain = loads[name.replace("_interned", "")]["peak_rss_bytes"]
+            peak = metrics["peak_rss_bytes"]
+            if peak is None:
+                print(f"{size:>9}  {name:<16}{'n/a':>12}")
+                continue
+            print(f"{size:>9}  {name:<16}{peak / 1024 / 1024:>12.1f}"
+                  f"{plain / peak:>9.2f}x")
+
+
+def compare_results(results, baseline, threshold=0.2,
+                    min_seconds=MIN_SECONDS):
+    """
+    Compares results with a baseline run.
+    Returns a list of (size, operation, metric, baseline, current)
+    for every metric that got worse by more than threshold. Timings
+    must also be at least min_seconds slower.
+    """
+    regressions = []
+    for size, operations in results["results"].items():
+        for name, metrics in operations.items():
+            base = baseline.get("results", {}).get(size, {}).get(name)
+            if not base:
+                continue
+            for metric in ("seconds", "peak_bytes"):
+                if metric not in metrics or not base.get(metric):
+                    continue
+                before, after = base[metric], metrics[metric]
+                if after <= before * (1 + threshold):
+                    continue
+                if metric == "seconds" and after - before < min_seconds:
+                    continue
+                regressions.append((size, name, metric, before, after))
+    return regressions
+
+
+def print_results(results):
+    print(f"\n{'Rows':>9}  {'Operation':<18}{'Seconds':>10}"
+          f"{'Peak MB':>10}")
+    for size, operations in results["results"].items():
+        for name, metrics in operations.items():
+            peak = metrics.get("peak_bytes")
+            peak_text = f"{peak / 1024 / 1024:>10.1f}" \
+                if peak is not None else f"{'-':>10}"
+            print(f"{size:>9}  {name:<18}{metrics['seconds']:>10.4f}"
+                  f"{peak_text}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark task manager "
+                                                 "operations.")
+    parser.add_argument("--sizes", type=int, nargs="+",
+                        default=list(DEFAULT_SIZES))
+    parser.add_argument("--operations", nargs="+",
+                        choices=sorted(OPERATIONS),
+                        default=list(OPERATIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true",
+                        help="skip the tracemalloc peak memory runs")
+    parser.add_argument("--data-dir",
+                        help="keep generated datasets in this directory")
+    parser.add_argument("--output", help="write results as JSON here")
+    parser.add_argument("--baseline",
+                        help="compare against this baseline JSON file")
+    parser.add_argument("--save-baseline",
+                        help="store these results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown before a result counts "
+                             "as a regression (default 0.2 = 20%%)")
+    parser.add_argument("--min-seconds", type=float, default=MIN_SECONDS,
+                        help="smallest slowdown in seconds that counts "
+                             "as a regression (default %(default)s)")
+    parser.add_argument("--footprint", action="store_true",
+                        help="measure the peak RSS of loading each "
+                             "dataset with and without string interning")
+    parser.add_argument("--footprint-child", metavar="TASK_FILE",
+                        help=argparse.SUPPRESS)
+    parser.add_argument("--intern", action=argparse.BooleanOptionalAction,
+                        default=True, help=argparse.SUPPRESS)
+    parser.add_argument("--lazy", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    def resolve(path):
+        return os.path.join(INVOCATION_DIR, path) if path else None
+
+    if args.footprint_child:
+        footprint_child(args.footprint_child, args.intern, args.lazy)
+        return
+
+    if args.footprint:
+        results = run_footprint(args.sizes, args.seed,
+                                resolve(args.data_dir))
+        print_footprint(results)
+    else:
+        results = run_benchmarks(args.sizes, args.operations,
+                                 args.repeat, args.seed,
+                                 not args.no_memory,
+                                 resolve(args.data_dir))
+        print_results(results)
+
+    for path in (resolve(args.output), resolve(args.save_baseline)):
+        if path:
+            with open(path, "w") as f:
+                json.dump(results, f, indent=2)
+            print(f"\nResults written to {path}")
+
+    if args.baseline and not args.footprint:
+        with open(resolve(args.baseline)) as f:
+            baseline = json.load(f)
+        regressions = compare_results(results, baseline, args.threshold,
+                                      args.min_seconds)
+        if not regressions:
+            print("\nNo regressions against the baseline.")
+        for size, name, metric, before, after in regressions:
+            print(f"REGRESSION {size} rows {name} {metric}: "
+                  f"{before:.4g} -> {after:.4g} "
+                  f"({(after / before - 1) * 100:+.0f}%)")
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+change_feed.py
+
+Defines the ChangeEvent and ChangeFeed classes.
+
+ChangeEvent: One change to the task or user data (a task added,
+completed, reassigned, rescheduled, deleted or archived, or a user
+registered) with the details needed to apply it elsewhere.
+ChangeFeed: Appends every published event to a log file
+(changes.jsonl) and passes it to subscribers. Each subscriber runs on
+its own thread, so a slow one never holds up the menu. A subscriber
+with a name has its position in the log saved, and when it subscribes
+again it first receives the events it missed.
+
+An event's offset is the byte position of its line in the log, so
+reading can start at any event without scanning the ones before it.
+
+Command line:
+    python change_feed.py                     # print every event
+    python change_feed.py --consumer audit    # events audit has not seen
+    python change_feed.py --follow            # keep printing new events
+"""
+
+import argparse
+import datetime
+import json
+import os
+import queue
+import threading
+import time
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+TASK_ADDED = "task_added"
+TASK_COMPLETED = "task_completed"
+TASK_REASSIGNED = "task_reassigned"
+TASK_RESCHEDULED = "task_rescheduled"
+TASK_DELETED = "task_deleted"
+TASK_ARCHIVED = "task_archived"
+USER_REGISTERED = "user_registered"
+
+EVENT_KINDS = (TASK_ADDED, TASK_COMPLETED, TASK_REASSIGNED,
+               TASK_RESCHEDULED, TASK_DELETED, TASK_ARCHIVED,
+               USER_REGISTERED)
+
+# Seconds a closing feed waits for each subscriber to finish
+CLOSE_TIMEOUT = 5.0
+
+
+class ChangeEvent:
+
+    def __init__(self, kind, data, time=None, offset=None,
+                 next_offset=None):
+        self.kind = kind
+        self.data = data
+        self.time = time or datetime.datetime.now().isoformat(
+            timespec="seconds")
+        # Position of the event in the log, and of the one after it
+        self.offset = offset
+        self.next_offset = next_offset
+
+    def to_json(self):
+        return json.dumps({"kind": self.kind, "time": self.time,
+                           "data": self.data})
+
+    @classmethod
+    def from_json(cls, line, offset=None, next_offset=None):
+        record = json.loads(line)
+        return cls(record["kind"], record["data"], record["time"],
+                   offset, next_offset)
+
+    def __str__(self):
+        details = ", ".join(f"{name}={value}"
+                            for name, value in self.data.items())
+        return f"{self.time} {self.kind}: {details}"
+
+
+class Subscription:
+    """
+    Delivers events to one callback on a thread of its own.
+    """
+
+    def __init__(self, feed, callback, name, position, catch_up_end):
+        self.feed = feed
+        self.callback = callback
+        self.name = name
+        # Offset of the next event to deliver
+        self.position = position
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(
+            target=self._run, args=(catch_up_end,), daemon=True,
+            name=f"change-feed-{name or id(self)}")
+
+    def _run(self, catch_up_end):
+        # Events logged before subscribing come from the log, and
+        # events published since from the queue
+        for event in self.feed.replay(self.position, catch_up_end):
+            self._deliver(event)
+        self._saved()
+        while True:
+            event = self.queue.get()
+            if event is None:
+                break
+            # Events other processes logged before this one are only
+            # in the log
+            if event.offset > self.position:
+                for missed in self.feed.replay(self.position,
+                                               event.offset):
+                    self._deliver(missed)
+            if event.offset >= self.position:
+                self._deliver(event)
+            if self.queue.empty():
+                self._saved()
+        self._saved()
+
+    def _deliver(self, event):
+        try:
+            self.callback(event)
+        except Exception as error:
+            # One failing event should not stop later ones
+            print(f"\nChange feed subscriber {self.name or ''} failed on "
+                  f"{event.kind}: {error}")
+        self.position = event.next_offset
+
+    def _saved(self):
+        if self.name is not None:
+            self.feed.save_offset(self.name, self.position)
+
+    def stop(self, timeout=CLOSE_TIMEOUT):
+        """
+        Delivers the events already queued, then ends the thread.
+        """
+        self.queue.put(None)
+        self.thread.join(timeout)
+
+
+class ChangeFeed:
+
+    def __init__(self, log_file=config["change_log_file"]):
+        self.log_file = log_file
+        self.offsets_file = log_file + ".offsets"
+        self._lock = threading.Lock()
+        self._subscriptions = []
+        self._fd = None
+
+    # ------------------------------------------------------------------
+    # Publishing
+    # ------------------------------------------------------------------
+
+    def publish(self, kind, **data):
+        """
+        Logs one event and queues it for every subscriber.
+        Returns the event.
+        """
+        return self.publish_many(kind, [data])[0]
+
+    def publish_many(self, kind, items):
+        """
+        Logs one event of the given kind per data dictionary in a
+        single write, and queues them for every subscriber.
+        Returns the events.
+        """
+        if kind not in EVENT_KINDS:
+            raise ValueError(f"Unknown change event kind: {kind!r}")
+        events = [ChangeEvent(kind, data) for data in items]
+        if not events:
+            return events
+        lines = [(event.to_json() + "\n").encode() for event in events]
+        with self._lock:
+            if self._fd is None:
+                self._fd = os.open(self.log_file, os.O_WRONLY |
+                                   os.O_APPEND | os.O_CREAT, 0o644)
+            data = b"".join(lines)
+            written = 0
+            while written < len(data):
+                written += os.write(self._fd, data[written:])
+            # Appends from other sessions may have come first, so the
+            # offsets are worked out back from where this write ended
+            offset = os.lseek(self._fd, 0, os.SEEK_CUR) - len(data)
+            for event, line in zip(events, lines):
+                event.offset = offset
+                offset += len(line)
+                event.next_offset = offset
+            for subscription in self._subscriptions:
+                for event in events:
+                    subscription.queue.put(event)
+        return events
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def end_offset(self):
+        try:
+            return os.path.getsize(self.log_file)
+        except FileNotFoundError:
+            return 0
+
+    def replay(self, offset=0, end=None):
+        """
+        Yields the logged events from offset up to end (default: the
+        end of the log). A last line still being written is skipped.
+        """
+        try:
+            f = open(self.log_file, "rb")
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(offset)
+            for line in f:
+                if end is not None and offset >= end:
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                next_offset = offset + len(line)
+                yield ChangeEvent.from_json(line, offset, next_offset)
+                offset = next_offset
+
+    # ------------------------------------------------------------------
+    # Subscribers
+    # ------------------------------------------------------------------
+
+    def _load_offsets(self):
+        try:
+            with open(self.offsets_file, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {}
+
+    def consumer_offset(self, name):
+        """
+        Returns the saved log position of a named consumer, or None.
+        """
+        return self._load_offsets().get(name)
+
+    def save_offset(self, name, offset):
+        with self._lock:
+            offsets = self._load_offsets()
+            offsets[name] = offset
+            temp_path = self.offsets_file + ".tmp"
+            with open(temp_path, "w") as f:
+                json.dump(offsets, f, indent=4)
+            os.replace(temp_path, self.offsets_file)
+
+    def subscribe(self, callback, name=None, offset=None):
+        """
+        Calls callback(event) on a worker thread for each new event.
+        A named subscriber resumes from its saved position, receiving
+        the events logged since; offset starts from a given position
+        instead. Otherwise only events published from now are passed.
+        """
+        with self._lock:
+            end = self.end_offset()
+            if offset is None and name is not None:
+                offset = self._load_offsets().get(name)
+            if offset is None:
+                offset = end
+            subscription = Subscription(self, callback, name, offset, end)
+            self._subscriptions.append(subscription)
+        subscription.thread.start()
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.remove(subscription)
+        subscription.stop()
+
+    def close(self):
+        """
+        Lets every subscriber finish its queued events and closes the
+        log.
+        """
+        with self._lock:
+            subscriptions, self._subscriptions = self._subscriptions, []
+        for subscription in subscriptions:
+            subscription.stop()
+        with self._lock:
+            if self._fd is not None:
+                os.close(self._fd)
+                self._fd = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Print logged changes "
+                                                 "to tasks and users.")
+    parser.add_argument("--log-file",
+                        help=f"default: the app's "
+                             f"{config['change_log_file']}")
+    parser.add_argument("--consumer", metavar="NAME",
+                        help="start where NAME stopped and save the "
+                             "position reached")
+    parser.add_argument("--offset", type=int,
+                        help="start at this log position")
+    parser.add_argument("--follow", action="store_true",
+                        help="keep printing events as they are logged")
+    args = parser.parse_args()
+
+    feed = ChangeFeed(os.path.join(INVOCATION_DIR, args.log_file)
+                      if args.log_file else config["change_log_file"])
+    offset = args.offset
+    if offset is None and args.consumer:
+        offset = feed.consumer_offset(args.consumer)
+    offset = offset or 0
+    try:
+        while True:
+            for event in feed.replay(offset):
+                print(f"[{event.offset}] {event}")
+                offset = event.next_offset
+            if not args.follow:
+                break
+            time.sleep(1.0)
+    except KeyboardInterrupt:
+        pass
+    if args.consumer:
+        feed.save_offset(args.consumer, offset)
+
+
+if __name__ == "__main__":
+    main()
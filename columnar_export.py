@@ -0,0 +1,359 @@
+"""
+columnar_export.py
+
+Defines the ColumnarExport class.
+
+ColumnarExport: Writes the tasks of a task file as columns of fixed-size
+values, one file per column, in a directory next to the task file
+(tasks_columns/ for tasks.txt). The files can be memory-mapped by other
+programs without parsing or copying, for example with
+numpy.memmap("tasks_columns/date_due.i32", dtype="<i4"), or with
+open_columns() below.
+
+Columns, one value per task in file order:
+    user_code.u32       user code (index into users.u32)
+    title.u32           string id of the title
+    description.u32     string id of the description
+    date_add.i32        date added as a day number (date.toordinal(),
+                        day 1 is 1 Jan 0001), -1 if invalid
+    date_due.i32        due date as a day number, -1 if invalid
+    completed.u8        1 if completed, else 0
+
+String table:
+    strings.bin         UTF-8 text of every string, back to back
+    strings.u64         offsets into strings.bin; string i is
+                        strings.bin[offsets[i]:offsets[i + 1]]
+    users.u32           string id of each user code's username
+
+meta.json records the number of tasks and strings, each file's type
+and byte order, and how much of the task file was exported. Values
+past those counts (left by an interrupted refresh) are ignored.
+
+A refresh appends only the tasks added to the task file since the
+last export. If the task file was rewritten instead (for example after
+a delete), everything is exported again.
+
+Command line:
+    python columnar_export.py                  # refresh tasks_columns/
+    python columnar_export.py --full           # export everything again
+"""
+
+import argparse
+import array
+import datetime
+import hashlib
+import json
+import locale
+import mmap
+import os
+import sys
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from task_manager_build import date_ordinal  # noqa: E402
+from instrumentation import stats, timed  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+FORMAT_VERSION = 1
+
+# Column name -> array type code; the file suffix gives the width
+COLUMNS = {
+    "user_code": "I",
+    "title": "I",
+    "description": "I",
+    "date_add": "i",
+    "date_due": "i",
+    "completed": "B",
+}
+
+SUFFIXES = {"I": "u32", "i": "i32", "B": "u8", "Q": "u64"}
+
+# numpy-style type names, without the byte order prefix
+DTYPES = {"I": "u4", "i": "i4", "B": "u1", "Q": "u8"}
+
+# Bytes before the exported size compared to tell an append from a
+# rewrite of the task file
+TAIL_BYTES = 64
+
+# Bytes of the task file parsed at a time
+READ_SIZE = 1 << 20
+
+
+def export_directory(task_file):
+    """
+    Returns the columnar export directory for a task file.
+    """
+    return os.path.splitext(task_file)[0] + "_columns"
+
+
+def column_path(directory, name, typecode):
+    return os.path.join(directory, f"{name}.{SUFFIXES[typecode]}")
+
+
+def dtype(typecode):
+    """
+    Returns the numpy type name of an array type code, with the byte
+    order this machine writes.
+    """
+    if array.array(typecode).itemsize == 1:
+        return DTYPES[typecode]
+    return ("<" if sys.byteorder == "little" else ">") + DTYPES[typecode]
+
+
+def open_columns(directory):
+    """
+    Returns {name: memoryview} for every column and string table file
+    of an export, each viewing a memory map of its file with no copy.
+    The strings are returned under "strings.bin" as bytes-like.
+    """
+    with open(os.path.join(directory, "meta.json"), "r") as f:
+        meta = json.load(f)
+    if meta["byteorder"] != sys.byteorder:
+        raise ValueError("Export was written with a different byte "
+                         "order; read it with numpy.memmap instead")
+    views = {}
+    for name, info in meta["files"].items():
+        count = info["count"]
+        path = os.path.join(directory, info["file"])
+        size = count * array.array(info["typecode"]).itemsize
+        views[name] = _map(path, size).cast(info["typecode"])[:count]
+    views["strings.bin"] = _map(os.path.join(directory, "strings.bin"),
+                                meta["string_bytes"])
+    return views
+
+
+def _map(path, size):
+    if size == 0:
+        return memoryview(b"")
+    with open(path, "rb") as f:
+        return memoryview(mmap.mmap(f.fileno(), 0,
+                                    access=mmap.ACCESS_READ))[:size]
+
+
+class ColumnarExport:
+
+    def __init__(self, task_file=config["task_file"], directory=None):
+        self.task_file = task_file
+        self.directory = directory or export_directory(task_file)
+        self.meta_path = os.path.join(self.directory, "meta.json")
+
+    # ------------------------------------------------------------------
+    # State
+    # ------------------------------------------------------------------
+
+    def read_meta(self):
+        """
+        Returns the export's metadata, or None if there is no export.
+        """
+        try:
+            with open(self.meta_path, "r") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+        if meta.get("format") != FORMAT_VERSION or \
+                meta.get("byteorder") != sys.byteorder:
+            return None
+        return meta
+
+    def _tail_digest(self, f, size):
+        f.seek(max(0, size - TAIL_BYTES))
+        return hashlib.blake2b(f.read(size - max(0, size - TAIL_BYTES)),
+                               digest_size=16).hexdigest()
+
+    def _appended_only(self, meta, f, size):
+        """
+        Returns True if the task file only grew since meta was written.
+        """
+        exported = meta["source_size"]
+        return size >= exported and \
+            self._tail_digest(f, exported) == meta["source_tail"]
+
+    def _load_users(self):
+        """
+        Returns username -> user code for the existing export.
+        """
+        views = open_columns(self.directory)
+        offsets, data = views["strings"], views["strings.bin"]
+        users = {}
+        for code, string_id in enumerate(views["users"]):
+            users[bytes(data[offsets[string_id]:
+                             offsets[string_id + 1]]).decode()] = code
+        return users
+
+    # ------------------------------------------------------------------
+    # Exporting
+    # ------------------------------------------------------------------
+
+    @timed("ColumnarExport.refresh")
+    def refresh(self, full=False):
+        """
+        Brings the export up to date with the task file, appending
+        only the tasks added since the last export when possible.
+        Returns (tasks in the export, tasks written now).
+        """
+        meta = None if full else self.read_meta()
+        with open(self.task_file, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if meta is not None and not self._appended_only(meta, f,
+                                                            size):
+                meta = None
+            if meta is None:
+                os.makedirs(self.directory, exist_ok=True)
+                meta = {"format": FORMAT_VERSION,
+                        "byteorder": sys.byteorder, "rows": 0,
+                        "strings": 0, "users": 0, "string_bytes": 0,
+                        "source_size": 0}
+                users = {}
+                mode = "wb"
+            else:
+                users = self._load_users()
+                mode = "r+b"
+            start = meta["source_size"]
+
+            columns = {name: array.array(code)
+                       for name, code in COLUMNS.items()}
+            offsets = array.array("Q")
+            user_ids = array.array("I")
+            strings = bytearray()
+            string_bytes = meta["string_bytes"]
+            next_string = meta["strings"]
+            # Offsets of the strings already exported, with the leading 0
+            kept_offsets = next_string + 1
+            if mode == "wb":
+                offsets.append(0)
+                kept_offsets = 0
+
+            def add_string(text):
+                nonlocal string_bytes, next_string
+                encoded = text.encode()
+                strings.extend(encoded)
+                string_bytes += len(encoded)
+                offsets.append(string_bytes)
+                next_string += 1
+                return next_string - 1
+
+            encoding = locale.getpreferredencoding(False)
+            header = start == 0
+            f.seek(start)
+            position = start
+            pending = b""
+            while position < size:
+                block = f.read(min(READ_SIZE, size - position))
+                if not block:
+                    break
+                position += len(block)
+                block = pending + block
+                # Only complete lines are exported; a last line still
+                # being written is picked up by the next refresh
+                cut = block.rfind(b"\n") + 1
+                pending = block[cut:]
+                for line in block[:cut].decode(encoding).split("\n"):
+                    if header:
+                        header = False
+                        if "username" in line.lower():
+                            continue  # skip header
+                    if line.count(",") != 5:
+                        continue
+                    username, title, description, date_add, date_due, \
+                        status = (field.strip() for field in line.split(","))
+                    code = users.get(username)
+                    if code is None:
+                        code = users[username] = len(users)
+                        user_ids.append(add_string(username))
+                    columns["user_code"].append(code)
+                    columns["title"].append(add_string(title))
+                    columns["description"].append(add_string(description))
+                    for name, value in (("date_add", date_add),
+                                        ("date_due", date_due)):
+                        ordinal = date_ordinal(value)
+                        columns[name].append(-1 if ordinal is None
+                                             else ordinal)
+                    columns["completed"].append(status.lower() == "yes")
+            source_size = position - len(pending)
+            tail = self._tail_digest(f, source_size)
+        added = len(columns["completed"])
+
+        # Data first, then the metadata that makes it visible
+        files = {}
+        written = 0
+        for name, values, count in (
+                [(name, columns[name], meta["rows"]) for name in COLUMNS]
+                + [("strings", offsets, kept_offsets),
+                   ("users", user_ids, meta["users"])]):
+            path = column_path(self.directory, name, values.typecode)
+            written += self._append(path, mode, count * values.itemsize,
+                                    values.tobytes())
+            files[name] = {"file": os.path.basename(path),
+                           "typecode": values.typecode,
+                           "dtype": dtype(values.typecode),
+                           "count": count + len(values)}
+        written += self._append(os.path.join(self.directory, "strings.bin"),
+                                mode, meta["string_bytes"], strings)
+
+        meta.update(rows=meta["rows"] + added, strings=next_string,
+                    users=len(users), string_bytes=string_bytes,
+                    files=files, source=os.path.abspath(self.task_file),
+                    source_size=source_size, source_tail=tail,
+                    exported_at=datetime.datetime.now().isoformat(
+                        timespec="seconds"))
+        temp_path = self.meta_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(temp_path, self.meta_path)
+        if stats.enabled:
+            stats.count("ColumnarExport.refresh", rows=added,
+                        bytes_read=source_size - start,
+                        bytes_written=written, rewrites=int(mode == "wb"),
+                        path=self.directory)
+        return meta["rows"], added
+
+    def _append(self, path, mode, keep, data):
+        """
+        Writes data after the first keep bytes of a file, dropping
+        anything an interrupted refresh left beyond them. A new file
+        replaces the old one rather than truncating it, as readers may
+        still have the old one mapped.
+        Returns the number of bytes written.
+        """
+        if mode == "wb":
+            with open(path + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(path + ".tmp", path)
+            return len(data)
+        with open(path, mode) as f:
+            f.seek(keep)
+            f.truncate()
+            f.write(data)
+        return len(data)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export task columns "
+                                                 "for analytics tools.")
+    parser.add_argument("--task-file",
+                        help=f"default: the app's {config['task_file']}")
+    parser.add_argument("--output", metavar="DIR",
+                        help="export directory (default: next to the "
+                             "task file)")
+    parser.add_argument("--full", action="store_true",
+                        help="export every task again")
+    args = parser.parse_args()
+
+    task_file = os.path.join(INVOCATION_DIR, args.task_file) \
+        if args.task_file else config["task_file"]
+    output = os.path.join(INVOCATION_DIR, args.output) \
+        if args.output else None
+    exporter = ColumnarExport(task_file, output)
+    total, added = exporter.refresh(full=args.full)
+    print(f"{exporter.directory}: {total} tasks ({added} written now)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""
+data_generator.py
+
+Writes realistic, reproducible user.txt and tasks.txt files for
+benchmarks and load tests.
+
+The same seed, row count and user count always produce byte-identical
+files. Dates are spread around a fixed reference date rather than
+today, so generated data does not drift between runs.
+
+Command line:
+    python data_generator.py --rows 100000 --out-dir /tmp/bench
+
+--out-dir is required, and files already there are only replaced with
+--force, so the app's own data cannot be overwritten by accident.
+"""
+
+import argparse
+import datetime
+import json
+import os
+import random
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+# Generated dates are placed around this day
+REFERENCE_DATE = datetime.date(2025, 6, 1)
+
+FIRST_NAMES = ("alice", "bob", "carol", "dave", "erin", "frank", "grace",
+               "heidi", "ivan", "judy", "mallory", "niaj", "olivia",
+               "peggy", "rupert", "sybil", "trent", "victor", "walter",
+               "yasmin")
+
+VERBS = ("Review", "Update", "Fix", "Draft", "Test", "Deploy", "Plan",
+         "Document", "Refactor", "Migrate", "Audit", "Prepare")
+
+SUBJECTS = ("budget", "login page", "release notes", "database backup",
+            "onboarding guide", "sprint board", "invoice run",
+            "server patches", "client proposal", "test suite",
+            "quarterly report", "API docs", "design mockups")
+
+DETAILS = ("before the team meeting", "for the next release",
+           "with the finance team", "and share feedback",
+           "following the new guidelines", "for the client demo",
+           "as discussed on Monday", "and close the ticket")
+
+
+def default_user_count(rows):
+    """
+    Returns a realistic number of users for a task file of this size.
+    """
+    return max(10, rows // 100)
+
+
+def make_usernames(count):
+    """
+    Returns count distinct usernames, always starting with the admin.
+    """
+    names = [config["admin_username"]]
+    number = 0
+    while len(names) < count:
+        for first in FIRST_NAMES:
+            if len(names) == count:
+                break
+            names.append(first if number == 0 else f"{first}{number}")
+        number += 1
+    return names
+
+
+def write_users(path, usernames, seed=0):
+    """
+    Writes user.txt with a random password for every user.
+    The admin password is always 'adm1n'.
+    """
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write("".join(
+            f"{name}, "
+            f"{'adm1n' if i == 0 else format(rng.getrandbits(32), 'x')}\n"
+            for i, name in enumerate(usernames)))
+
+
+def generate_task_lines(rows, usernames, seed=0):
+    """
+    Yields task file lines (without the header).
+
+    Task owners follow a skewed distribution, so a few users hold many
+    tasks, as in real teams. Older tasks are more likely to be done.
+    """
+    rng = random.Random(seed)
+    date_format = config["date_format_display"]
+    # Format every date once; rows pick from this table
+    dates = [(REFERENCE_DATE + datetime.timedelta(days=offset))
+             .strftime(date_format) for offset in range(-400, 121)]
+    weights = [1 / (rank + 1) ** 0.8 for rank in range(len(usernames))]
+    owners = rng.choices(usernames, weights=weights, k=rows)
+
+    for row in range(rows):
+        added = rng.randint(0, 400)
+        due = min(added + rng.randint(1, 90), len(dates) - 1)
+        done_chance = 0.9 if due < 380 else 0.3
+        completed = "Yes" if rng.random() < done_chance else "No"
+        yield (f"{owners[row]}, {rng.choice(VERBS)} "
+               f"{rng.choice(SUBJECTS)}, {rng.choice(VERBS)} the "
+               f"{rng.choice(SUBJECTS)} {rng.choice(DETAILS)}, "
+               f"{dates[added]}, {dates[due]}, {completed}\n")
+
+
+def write_tasks(path, rows, usernames, seed=0, chunk_size=10000):
+    """
+    Writes tasks.txt with a header and rows generated tasks.
+    """
+    with open(path, "w") as f:
+        f.write("username, title, description, date_add, "
+                "date_due, Completed\n")
+        chunk = []
+        for line in generate_task_lines(rows, usernames, seed):
+            chunk.append(line)
+            if len(chunk) == chunk_size:
+                f.write("".join(chunk))
+                chunk = []
+        f.write("".join(chunk))
+
+
+def generate_dataset(out_dir, rows, users=None, seed=0):
+    """
+    Writes user.txt and tasks.txt into out_dir.
+    Returns (task file path, user file path, list of usernames).
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    usernames = make_usernames(users or default_user_count(rows))
+    user_file = os.path.join(out_dir, "user.txt")
+    task_file = os.path.join(out_dir, "tasks.txt")
+    write_users(user_file, usernames, seed)
+    write_tasks(task_file, rows, usernames, seed)
+    return task_file, user_file, usernames
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate synthetic "
+                                                 "task and user files.")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--users", type=int,
+                        help="number of users (default: rows / 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out-dir", required=True,
+                        help="directory for user.txt and tasks.txt")
+    parser.add_argument("--force", action="store_true",
+                        help="overwrite user.txt and tasks.txt if they "
+                             "already exist in --out-dir")
+    args = parser.parse_args()
+
+    out_dir = os.path.normpath(os.path.join(INVOCATION_DIR, args.out_dir))
+    # Pointed at the app's directory, this would replace the real data
+    existing = [name for name in ("tasks.txt", "user.txt")
+                if os.path.exists(os.path.join(out_dir, name))]
+    if existing and not args.force:
+        parser.error(f"{' and '.join(existing)} already exist in "
+                     f"{out_dir}; use --force to overwrite")
+    task_file, user_file, usernames = generate_dataset(
+        out_dir, args.rows, args.users, args.seed)
+    print(f"Wrote {args.rows} tasks to {task_file} and "
+          f"{len(usernames)} users to {user_file}")
+
+
+if __name__ == "__main__":
+    main()
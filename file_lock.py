@@ -0,0 +1,90 @@
+"""
+file_lock.py
+
+Defines the FileLock class.
+
+FileLock: An exclusive lock on a data file (tasks.txt, user.txt)
+shared by every process that takes it, held on a sidecar file next to
+it (tasks.txt.lock). The sidecar also holds a count of the changes
+saved under the lock, so a process can tell whether the data it loaded
+earlier is out of date.
+
+Locks are advisory: they only keep out processes that also take them.
+Where fcntl is not available (Windows) no lock is taken.
+"""
+
+import os
+
+try:
+    import fcntl
+except ImportError:
+    # Locking is not available on every platform
+    fcntl = None
+
+
+class FileLock:
+
+    def __init__(self, data_file):
+        self.data_file = data_file
+        self.path = data_file + ".lock"
+        # Changes saved under the lock, read when it is taken
+        self.generation = None
+        self._file = None
+
+    def __enter__(self):
+        self._file = open(self.path, "a+")
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+            self._file.seek(0)
+            self.generation = int(self._file.read().strip() or 0)
+        except BaseException:
+            self._file.close()
+            self._file = None
+            raise
+        return self
+
+    def changed(self):
+        """
+        Records a change saved while holding the lock.
+        """
+        self.generation += 1
+        self._file.seek(0)
+        self._file.truncate()
+        self._file.write(str(self.generation))
+        self._file.flush()
+
+    def peek(self):
+        """
+        Returns state() without taking the lock, for data about to be
+        loaded without it. A change saved while the data is loaded
+        only makes it look out of date, so it is reloaded when the
+        lock is next taken. Returns None if the count cannot be read.
+        """
+        try:
+            with open(self.path, "r") as f:
+                self.generation = int(f.read().strip() or 0)
+        except FileNotFoundError:
+            self.generation = 0
+        except (OSError, ValueError):
+            return None
+        return self.state()
+
+    def state(self):
+        """
+        Returns the change count with the data file's size and
+        modification time. Loaded data is out of date if this differs
+        from when it was loaded; the size and time also catch changes
+        saved without the lock, unless made within one clock tick.
+        """
+        try:
+            stat = os.stat(self.data_file)
+        except FileNotFoundError:
+            return self.generation, None, None
+        return self.generation, stat.st_size, stat.st_mtime_ns
+
+    def __exit__(self, *exc_info):
+        # Closing the file releases the lock
+        self._file.close()
+        self._file = None
+        return False
@@ -0,0 +1,167 @@
+"""
+instrumentation.py
+
+Operation timing and I/O counters for the task manager.
+
+Stats: Collects per-operation call counts, timing histograms, rows
+    scanned, bytes read and written, and full-file rewrites.
+timed: Decorator that times a method into the shared stats object.
+
+Instrumentation is off by default. While it is off, an instrumented
+method costs one extra function call and a flag check, and no
+counters are gathered.
+"""
+
+import bisect
+import collections
+import functools
+import time
+
+# Upper edges of the timing histogram buckets, in milliseconds
+BUCKET_EDGES_MS = (0.1, 1, 10, 100, 1000, 10000)
+
+BUCKET_LABELS = ("<0.1ms", "<1ms", "<10ms", "<100ms", "<1s", "<10s",
+                 ">=10s")
+
+
+class OperationStats:
+
+    def __init__(self):
+        self.calls = 0
+        self.total_seconds = 0.0
+        self.max_seconds = 0.0
+        self.histogram = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self.rewrites = 0
+
+    def as_dict(self):
+        return {
+            "calls": self.calls,
+            "total_seconds": self.total_seconds,
+            "max_seconds": self.max_seconds,
+            "histogram": dict(zip(BUCKET_LABELS, self.histogram)),
+            "rows": self.rows,
+            "bytes_read": self.bytes_read,
+            "bytes_written": self.bytes_written,
+            "rewrites": self.rewrites,
+        }
+
+
+class Stats:
+
+    def __init__(self):
+        self.enabled = False
+        self.operations = {}
+        # Most recent file writes: (operation, path, bytes, rewrite)
+        self.recent_writes = collections.deque(maxlen=20)
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        self.operations = {}
+        self.recent_writes.clear()
+
+    def _get(self, operation):
+        stats = self.operations.get(operation)
+        if stats is None:
+            stats = self.operations[operation] = OperationStats()
+        return stats
+
+    def record_time(self, operation, seconds):
+        """
+        Adds one timed call of an operation.
+        """
+        stats = self._get(operation)
+        stats.calls += 1
+        stats.total_seconds += seconds
+        stats.max_seconds = max(stats.max_seconds, seconds)
+        stats.histogram[bisect.bisect_right(BUCKET_EDGES_MS,
+                                            seconds * 1000)] += 1
+
+    def count(self, operation, rows=0, bytes_read=0, bytes_written=0,
+              rewrites=0, path=None):
+        """
+        Adds I/O counters to an operation. Callers should check
+        stats.enabled first so that nothing is measured while off.
+        """
+        stats = self._get(operation)
+        stats.rows += rows
+        stats.bytes_read += bytes_read
+        stats.bytes_written += bytes_written
+        stats.rewrites += rewrites
+        if bytes_written:
+            self.recent_writes.append((operation, path, bytes_written,
+                                       bool(rewrites)))
+
+    def as_dict(self):
+        return {
+            "operations": {name: stats.as_dict()
+                           for name, stats in self.operations.items()},
+            "recent_writes": [
+                {"operation": operation, "path": path, "bytes": size,
+                 "rewrite": rewrite}
+                for operation, path, size, rewrite in self.recent_writes],
+        }
+
+    def report(self):
+        """
+        Returns the collected statistics as a formatted text table.
+        """
+        if not self.operations:
+            return "No operations recorded."
+        lines = [f"{'Operation':<36}{'Calls':>7}{'Total ms':>11}"
+                 f"{'Mean ms':>10}{'Max ms':>10}{'Rows':>10}"
+                 f"{'Read':>11}{'Written':>11}{'Rewrites':>9}"]
+        for name in sorted(self.operations):
+            s = self.operations[name]
+            mean = s.total_seconds / s.calls * 1000 if s.calls else 0
+            lines.append(f"{name:<36}{s.calls:>7}"
+                         f"{s.total_seconds * 1000:>11.2f}{mean:>10.2f}"
+                         f"{s.max_seconds * 1000:>10.2f}{s.rows:>10}"
+                         f"{s.bytes_read:>11}{s.bytes_written:>11}"
+                         f"{s.rewrites:>9}")
+
+        lines.append("\nTiming histograms:")
+        for name in sorted(self.operations):
+            s = self.operations[name]
+            if s.calls:
+                buckets = "  ".join(f"{label} {n}" for label, n
+                                    in zip(BUCKET_LABELS, s.histogram) if n)
+                lines.append(f"  {name:<34}{buckets}")
+
+        if self.recent_writes:
+            lines.append("\nRecent file writes:")
+            for operation, path, size, rewrite in self.recent_writes:
+                action = "rewrote" if rewrite else "appended to"
+                lines.append(f"  {operation} {action} {path} "
+                             f"({size} bytes)")
+        return "\n".join(lines)
+
+
+# Shared by every instrumented class
+stats = Stats()
+
+
+def timed(operation):
+    """
+    Decorator that records the run time of a function under the given
+    operation name while instrumentation is enabled.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not stats.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                stats.record_time(operation, time.perf_counter() - start)
+        return wrapper
+    return decorator
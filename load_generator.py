@@ -0,0 +1,183 @@
+"""
+load_generator.py
+
+Generates load against a running task server (see task_server.py).
+
+Opens many concurrent keep-alive connections, each sending a random
+mix of list, auth and add requests, then prints throughput and latency
+percentiles per request type. Adds write real tasks, so point it at a
+server started with scratch data files, for example from
+data_generator.py, whose admin password is always 'adm1n':
+
+    python data_generator.py --rows 10000 --out-dir /tmp/load
+    python task_server.py --task-file /tmp/load/tasks.txt \\
+                          --user-file /tmp/load/user.txt
+    python load_generator.py --connections 2000 --requests 20 \\
+                             --password adm1n
+
+Adds go to the server's users and auth requests sign in with
+--username and --password, so the server needs at least one user and
+the password is required unless --auth-ratio is 0.
+"""
+
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import random
+import time
+from task_server import raise_file_limit
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+
+async def send_request(reader, writer, method, path, data=None):
+    """
+    Sends one HTTP/1.1 request on an open connection.
+    Returns (status, decoded JSON payload).
+    """
+    body = json.dumps(data).encode("utf-8") if data is not None else b""
+    writer.write(f"{method} {path} HTTP/1.1\r\n"
+                 f"Host: localhost\r\n"
+                 f"Content-Type: application/json\r\n"
+                 f"Content-Length: {len(body)}\r\n\r\n"
+                 .encode("latin-1") + body)
+    await writer.drain()
+
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    payload = await reader.readexactly(length) if length else b"{}"
+    return status, json.loads(payload)
+
+
+async def run_connection(args, usernames, rng, latencies, errors):
+    """
+    Sends args.requests requests on a single connection.
+    """
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    today = datetime.date.today()
+    try:
+        for number in range(args.requests):
+            roll = rng.random()
+            if roll < args.write_ratio:
+                kind = "add"
+                due = today + datetime.timedelta(days=rng.randint(1, 90))
+                request = ("POST", "/tasks", {
+                    "username": rng.choice(usernames),
+                    "title": f"Load task {number}",
+                    "description": "Generated by load_generator.py",
+                    "date_add": today.strftime(
+                        config["date_format_display"]),
+                    "date_due": due.strftime(
+                        config["date_format_display"]),
+                })
+            elif roll < args.write_ratio + args.auth_ratio:
+                kind = "auth"
+                request = ("POST", "/auth", {"username": args.username,
+                                             "password": args.password})
+            else:
+                kind = "list"
+                request = ("GET", f"/tasks?user={rng.choice(usernames)}",
+                           None)
+
+            start = time.perf_counter()
+            status, _ = await send_request(reader, writer, *request)
+            latencies.setdefault(kind, []).append(
+                time.perf_counter() - start)
+            if status >= 400:
+                errors[kind] = errors.get(kind, 0) + 1
+    finally:
+        writer.close()
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at the given fraction of a sorted list.
+    """
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1,
+                int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+async def run(args):
+    reader, writer = await asyncio.open_connection(args.host, args.port)
+    _, data = await send_request(reader, writer, "GET", "/users")
+    writer.close()
+    usernames = data["users"]
+    if not usernames:
+        raise SystemExit("The server has no users to add tasks for. "
+                         "Start it with a user file, for example one "
+                         "from data_generator.py.")
+
+    rng = random.Random(args.seed)
+    latencies = {}
+    errors = {}
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *(run_connection(args, usernames,
+                         random.Random(rng.random()), latencies, errors)
+          for _ in range(args.connections)),
+        return_exceptions=True)
+    elapsed = time.perf_counter() - start
+
+    failed = [result for result in results
+              if isinstance(result, Exception)]
+    total = sum(len(values) for values in latencies.values())
+
+    print(f"\nConnections       : {args.connections}")
+    print(f"Failed connections: {len(failed)}")
+    print(f"Requests sent     : {total}")
+    print(f"Elapsed           : {elapsed:.2f}s")
+    print(f"Throughput        : {total / elapsed if elapsed else 0:.0f}"
+          f" req/s\n")
+    print(f"{'Request':<8}{'Count':>9}{'Errors':>8}"
+          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for kind in sorted(latencies):
+        values = sorted(latencies[kind])
+        print(f"{kind:<8}{len(values):>9}{errors.get(kind, 0):>8}"
+              f"{percentile(values, 0.50) * 1000:>10.2f}"
+              f"{percentile(values, 0.95) * 1000:>10.2f}"
+              f"{percentile(values, 0.99) * 1000:>10.2f}")
+    if failed:
+        print(f"\nFirst connection error: {failed[0]!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate load against "
+                                                 "the task server.")
+    parser.add_argument("--host", default=config["server_host"])
+    parser.add_argument("--port", type=int, default=config["server_port"])
+    parser.add_argument("--connections", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=20,
+                        help="requests per connection")
+    parser.add_argument("--write-ratio", type=float, default=0.05)
+    parser.add_argument("--auth-ratio", type=float, default=0.2)
+    parser.add_argument("--username", default=config["admin_username"])
+    parser.add_argument("--password",
+                        help="password of --username, needed for auth "
+                             "requests")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    if args.password is None and args.auth_ratio > 0:
+        parser.error("--password is required unless --auth-ratio is 0")
+
+    raise_file_limit()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
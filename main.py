@@ -1,9 +1,19 @@
 from task_manager_build import Task, TaskManager
 from user_manager import User, UserManager
-from report_generator import ReportGenerator
+from report_generator import ReportGenerator, ReportJob
 from user_input import register_new, get_valid_task_number, \
                         view_user_tasks_input, add_task_input, \
-                        delete_task_input
+                        delete_task_input, bulk_update_input, \
+                        archive_tasks_input, switch_workspace_input
+from task_client import TaskClient, RemoteTaskManager, \
+                        RemoteUserManager, RemoteReportGenerator
+from task_watch import TaskWatcher
+from columnar_export import ColumnarExport
+from workspaces import WorkspaceManager
+from change_feed import ChangeFeed
+from instrumentation import stats
+import argparse
+import cProfile
 import os
 
 # Ensure the current directory is set correctly
@@ -15,7 +25,8 @@ with open("config.json", "r") as f:
         config = json.load(f)
 
 
-def admin_menu(username, user_manager, task_manager, report_gen):
+def admin_menu(username, user_manager, task_manager, report_gen,
+               workspaces=None):
     """
     Displays the admin menu and handles admin-specific actions.
     Uses styled and aligned output for improved terminal appearance.
@@ -28,7 +39,11 @@ def admin_menu(username, user_manager, task_manager, report_gen):
     BLUE = "\033[34m"
     RED = "\033[31m"
 
+    # Reports being generated in the background, if any
+    report_job = None
+
     while True:
+        report_job = report_job_notice(report_job)
         print(f"\n{BOLD}{CYAN}╔════════════════════════════════════"
               f"══╗{RESET}")
         print(f"{BOLD}{CYAN}║{RESET}    {BOLD}{BLUE}ADMIN CONTROL MENU"
@@ -47,10 +62,26 @@ def admin_menu(username, user_manager, task_manager, report_gen):
               f"View completed tasks           {CYAN}║{RESET}")
         print(f"{BOLD}{CYAN}║{RESET}  {GREEN}del.{RESET} "
               f"Delete a task                  {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}bu.{RESET}  "
+              f"Bulk reassign/complete tasks   {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}ar.{RESET}  "
+              f"Archive old completed tasks    {CYAN}║{RESET}")
         print(f"{BOLD}{CYAN}║{RESET}  {GREEN}gr.{RESET}  "
               f"Generate reports               {CYAN}║{RESET}")
         print(f"{BOLD}{CYAN}║{RESET}  {GREEN}ds.{RESET}  "
               f"Display statistics             {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}wd.{RESET}  "
+              f"Watch live dashboard           {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}ag.{RESET}  "
+              f"Task aging report              {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}cx.{RESET}  "
+              f"Columnar export for analytics  {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}ws.{RESET}  "
+              f"Switch workspace               {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}wr.{RESET}  "
+              f"Workspace report               {CYAN}║{RESET}")
+        print(f"{BOLD}{CYAN}║{RESET}  {GREEN}ps.{RESET}  "
+              f"Profiling statistics           {CYAN}║{RESET}")
         print(f"{BOLD}{CYAN}║{RESET}  {GREEN}e.{RESET}   "
               f"Exit the program               {CYAN}║{RESET}")
         print(f"{BOLD}{CYAN}╚══════════════════════════════════════"
@@ -70,11 +101,44 @@ def admin_menu(username, user_manager, task_manager, report_gen):
             task_manager.view_completed_tasks()
         elif menu == 'del':
             delete_task_input(task_manager)
+        elif menu == 'bu':
+            bulk_update_input(task_manager, user_manager)
+        elif menu == 'ar':
+            archive_tasks_input(task_manager)
         elif menu == 'gr':
-            report_gen.generate()
+            report_job = start_report_job(report_gen, report_job)
         elif menu == 'ds':
-            report_gen.generate()
-            report_gen.display_statistics()
+            # On large datasets, show a quick estimate first
+            if not report_gen.display_approximate_statistics() or \
+                    input("Show exact statistics? (y/n): ").strip() \
+                    .lower() == 'y':
+                if report_job is None:
+                    report_job = ReportJob(report_gen.snapshot()).start()
+                if wait_for_report(report_job):
+                    report_gen.display_statistics()
+                report_job = None
+        elif menu == 'wd':
+            watch_dashboard(task_manager)
+        elif menu == 'ag':
+            report_gen.display_aging_report()
+        elif menu == 'cx':
+            export_columns(task_manager)
+        elif menu in ('ws', 'wr') and workspaces is None:
+            print("\nWorkspaces are not available when connected "
+                  "to a task server.")
+        elif menu == 'ws':
+            name = switch_workspace_input(workspaces)
+            if name is not None:
+                task_manager = workspaces.open(name)
+                report_gen = ReportGenerator(task_manager, user_manager)
+                print(f"\nSwitched to workspace '{name}' "
+                      f"({len(task_manager.tasks)} tasks).")
+        elif menu == 'wr':
+            workspaces.write_report()
+            with open(config["workspace_report_file"], "r") as file:
+                print(file.read())
+        elif menu == 'ps':
+            show_profiling_stats(task_manager)
         elif menu == 'e':
             print(f"\n{RED}Exiting program. Goodbye!{RESET}\n")
             break
@@ -129,10 +193,150 @@ def user_menu(username, user_manager, task_manager):
             print(f"{RED}Invalid input. Please try again.{RESET}")
 
 
-def menu_options():
-    user_manager = UserManager()
-    task_manager = TaskManager()
-    report_gen = ReportGenerator(task_manager, user_manager)
+def show_profiling_stats(task_manager=None):
+    """
+    Prints the operation timing and I/O statistics collected so far,
+    or offers to start collecting them. The task cache counters are
+    shown too when tasks are paged from disk.
+    """
+    if task_manager is not None and task_manager.paged:
+        info = task_manager.tasks.cache_info()
+        print(f"\nTask cache: {info['pages']}/{info['max_pages']} pages, "
+              f"{info['held']} changed, {info['hits']} hits, "
+              f"{info['misses']} misses, {info['evictions']} evictions, "
+              f"{info['write_backs']} tasks written back")
+    if not stats.enabled:
+        answer = input("\nProfiling is off. Start collecting operation "
+                       "statistics now? (y/n): ").strip().lower()
+        if answer == 'y':
+            stats.enable()
+            print("Profiling enabled.")
+        return
+    print("\nOPERATION STATISTICS\n" + "═" * 40)
+    print(stats.report())
+
+
+def start_report_job(report_gen, job):
+    """
+    Starts generating the reports from a snapshot of the current data
+    on a worker thread, so the menu can be used meanwhile. If reports
+    are already being generated, shows their progress and offers to
+    cancel them. Returns the running job, or None.
+    """
+    if job is not None and not job.done():
+        print(f"\nReports are being generated: {job.progress:.0%} done.")
+        if input("Cancel report generation? (y/n): ").strip() \
+                .lower() == 'y':
+            job.cancel()
+            job.wait()
+            print("Report generation cancelled.")
+            return None
+        return job
+    job = ReportJob(report_gen.snapshot()).start()
+    version = f" from data version ({job.version})" if job.version else ""
+    print(f"\nGenerating reports in the background{version}. "
+          f"Choose 'gr' again to see progress or cancel.")
+    return job
+
+
+def report_job_notice(job):
+    """
+    Reports the outcome of a background report job once it has
+    finished. Returns the job while it is still running, else None.
+    """
+    if job is None or not job.done():
+        return job
+    if job.error is not None:
+        print(f"\nReport generation failed: {job.error}")
+    elif not job.cancelled:
+        print("\nReports successfully generated: 'task_overview.txt'"
+              " and 'user_overview.txt'")
+    return None
+
+
+def wait_for_report(job):
+    """
+    Shows a report job's progress until it finishes. Ctrl+C cancels
+    it. Returns True if the reports were generated.
+    """
+    try:
+        while not job.wait(0.2):
+            print(f"\rGenerating reports... {job.progress:.0%}", end="",
+                  flush=True)
+    except KeyboardInterrupt:
+        job.cancel()
+        job.wait()
+        print("\nReport generation cancelled.")
+        return False
+    print()
+    if job.error is not None:
+        print(f"Report generation failed: {job.error}")
+    return job.succeeded
+
+
+def watch_dashboard(task_manager):
+    """
+    Shows the live task overview until Ctrl+C is pressed.
+    """
+    if task_manager.file_path is None:
+        print("\nThe live dashboard needs direct access to the task "
+              "file. Run task_watch.py where the server runs.")
+        return
+    TaskWatcher(task_manager.file_path).run()
+
+
+def export_columns(task_manager):
+    """
+    Brings the columnar export of the task file up to date.
+    """
+    if task_manager.file_path is None:
+        print("\nThe columnar export needs direct access to the task "
+              "file. Run columnar_export.py where the server runs.")
+        return
+    exporter = ColumnarExport(task_manager.file_path)
+    total, added = exporter.refresh()
+    print(f"\nExported {added} new tasks to {exporter.directory} "
+          f"({total} in total).")
+
+
+def server_address(value):
+    """
+    Parses a --server value of HOST:PORT, or just PORT for the
+    configured host. Returns (host, port).
+    """
+    host, _, port = value.rpartition(":")
+    try:
+        port = int(port)
+    except ValueError:
+        port = None
+    if port is None or not 0 < port < 65536:
+        raise argparse.ArgumentTypeError(
+            f"expected HOST:PORT with a port from 1 to 65535, "
+            f"not {value!r}")
+    return host or config["server_host"], port
+
+
+def menu_options(server=None, change_feed=None):
+    if server:
+        # Run as a thin client of a shared task server
+        host, port = server
+        client = TaskClient(host, port)
+        try:
+            user_manager = RemoteUserManager(client)
+            task_manager = RemoteTaskManager(client)
+        except ConnectionError:
+            print(f"\nCould not connect to the task server at "
+                  f"{host}:{port}.")
+            return None
+        report_gen = RemoteReportGenerator(client)
+        workspaces = None
+    else:
+        user_manager = UserManager()
+        user_manager.change_feed = change_feed
+        # Sessions start in the first workspace listed in config.json
+        workspaces = WorkspaceManager(change_feed=change_feed)
+        task_manager = workspaces.open(workspaces.names()[0])
+        report_gen = ReportGenerator(task_manager, user_manager)
 
     username = input('\nPlease enter your username '
                   '(or type "e" to exit): ')
@@ -144,7 +348,8 @@ def menu_options():
     if user_manager.authenticate(username, password):
         print(f"Welcome, {username}")
         if username == config["admin_username"]:
-            admin_menu(username, user_manager, task_manager, report_gen)
+            admin_menu(username, user_manager, task_manager, report_gen,
+                       workspaces)
         else:
             user_menu(username, user_manager, task_manager)
     else:
@@ -152,4 +357,36 @@ def menu_options():
 
 
 if __name__ == "__main__":
-    menu_options()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Task Manager")
+    parser.add_argument("--server", metavar="HOST:PORT",
+                        type=server_address,
+                        help="connect to a running task server "
+                             "instead of using the local files")
+    parser.add_argument("--profile", action="store_true",
+                        help="collect operation statistics and print "
+                             "them on exit")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="also save a cProfile capture of the "
+                             "session to FILE")
+    args = parser.parse_args()
+
+    if args.profile:
+        stats.enable()
+    profiler = cProfile.Profile() if args.cprofile else None
+    if profiler:
+        profiler.enable()
+    # Changes made in this session are logged for other consumers;
+    # with --server the server logs them instead
+    change_feed = None if args.server else ChangeFeed()
+    try:
+        menu_options(args.server, change_feed)
+    finally:
+        if change_feed is not None:
+            change_feed.close()
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(args.cprofile)
+            print(f"cProfile capture saved to {args.cprofile}")
+        if args.profile:
+            print("\nOPERATION STATISTICS\n" + "═" * 40)
+            print(stats.report())
@@ -5,14 +5,30 @@ Defines the ReportGenerator class.
 
 ReportGenerator: Generates task and user overview reports 
 from task and user data,writes them to text files, 
-and displays statistics summaries.
+and displays statistics summaries. Also writes a task aging report
+(text and JSON) on how overdue and upcoming work is spread out.
+ReportSnapshot: A ReportGenerator over an immutable copy of the tasks
+and users, taken at a known data version.
+ReportJob: Generates a snapshot's reports on a worker thread, with
+progress and cancellation.
 """
 
+import bisect
+import collections
+import concurrent.futures
 import datetime
+import functools
+import itertools
+import math
+import operator
 import os
-from task_manager_build import Task, TaskManager
+import random
+import statistics
+import threading
+from task_manager_build import Task, TaskManager, date_ordinal
 from user_manager import User, UserManager
 import json
+from instrumentation import stats, timed
 
 # Ensure the current directory is set correctly
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -21,21 +37,158 @@ with open("config.json", "r") as f:
     config = json.load(f)
 
 
+# Overdue age buckets: (label, fewest days overdue, most days overdue)
+AGING_BUCKETS = (("1-7", 1, 7), ("8-30", 8, 30), ("31-90", 31, 90),
+                 ("90+", 91, None))
+
+# Number of weeks ahead covered by the due-date distribution
+FORECAST_WEEKS = 13
+
+# Tasks processed between progress updates and cancellation checks
+PROGRESS_STEP = 4096
+
+# The task fields the reports use, as copied into a snapshot
+TaskRecord = collections.namedtuple("TaskRecord",
+                                    ("username", "date_due", "completed"))
+
+_record_fields = operator.attrgetter(*TaskRecord._fields)
+
+
+class ReportCancelled(Exception):
+    """
+    Raised inside a report run when its ReportJob is cancelled.
+    """
+
+
+def format_ordinal(ordinal):
+    return datetime.date.fromordinal(ordinal).strftime(
+        config["date_format_display"])
+
+
+def overdue_cutoff(now=None):
+    """
+    Returns the day number before which incomplete tasks are overdue.
+    A task is overdue once its due date (at midnight) has passed.
+    """
+    now = now or datetime.datetime.today()
+    return now.toordinal() + (now.time() > datetime.time())
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+    Returns the Wilson score interval (low, high) for a proportion
+    estimated from successes out of trials.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = statistics.NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    margin = z * math.sqrt(p * (1 - p) / trials
+                           + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - margin), min(1.0, centre + margin)
+
+
+def format_user_sections(entries, total_tasks, cutoff):
+    """
+    Formats the user overview entries for a list of (username, tasks
+    assigned, tasks completed, due dates of incomplete tasks).
+    Tasks due before the cutoff day number count as overdue.
+    Runs in worker processes when the report is generated in parallel.
+    """
+    lines = []
+    for username, user_total, completed, open_due in entries:
+        if user_total > 0:
+            # Calculate user-specific task stats
+            percent_assigned = (user_total / total_tasks) * 100
+            incomplete = user_total - completed
+            overdue = 0
+
+            # Count overdue tasks, skipping tasks with invalid dates
+            for date_due in open_due:
+                ordinal = date_ordinal(date_due)
+                if ordinal is not None and ordinal < cutoff:
+                    overdue += 1
+
+            # Percentages of completed, incomplete, and overdue
+            percent_completed = (completed / user_total) * 100
+            percent_incomplete = (incomplete / user_total) * 100
+            percent_overdue = (overdue / user_total) * 100
+        else:
+            # No tasks assigned to user
+            percent_assigned = percent_completed = \
+                percent_incomplete = percent_overdue = 0
+
+        lines.append(
+            f"User: {username}\n"
+            f"  - Tasks assigned                 : {user_total}\n"
+            f"  - % of total tasks assigned      : "
+            f"{percent_assigned:.2f}%\n"
+            f"  - % completed                    : "
+            f"{percent_completed:.2f}%\n"
+            f"  - % incomplete                   : "
+            f"{percent_incomplete:.2f}%\n"
+            f"  - % overdue                      : "
+            f"{percent_overdue:.2f}%\n\n")
+    return "".join(lines)
+
+
 class ReportGenerator:
+
+    # ReportJob running this generator's reports, if any
+    job = None
+
     def __init__(self, task_manager, user_manager):
+        self.task_manager = task_manager
+        self.user_manager = user_manager
         self.tasks = task_manager.tasks
         self.users = user_manager.users
+        # Archived tasks are counted from the archive's aggregates
+        self.archive = getattr(task_manager, "archive", None)
+
+    def data_version(self):
+        """
+        Returns the number of changes made to the tasks and to the
+        users by this session, as a printable version.
+        """
+        return (f"tasks {getattr(self.task_manager, 'version', 0)}, "
+                f"users {getattr(self.user_manager, 'version', 0)}")
 
+    def snapshot(self):
+        """
+        Returns a ReportSnapshot of the current tasks and users.
+        """
+        return ReportSnapshot(self)
+
+    def _tracked(self, tasks):
+        # Progress and cancellation only apply to a running job
+        if self.job is None:
+            return tasks
+        return self.job.track(tasks)
+
+    def archived_counts(self):
+        """
+        Returns (total archived tasks, archived tasks per user).
+        Archived tasks are always completed and never overdue.
+        """
+        if self.archive is None:
+            return 0, {}
+        return self.archive.total, self.archive.user_counts()
+
+    @timed("ReportGenerator.write_task_overview")
     def write_task_overview(self):
         """
         Creates task_overview.txt with statistics about tasks.
         """
-        # Total number of tasks in the system
-        total_tasks = len(self.tasks)
+        # Total number of tasks in the system, including archived ones
+        archived_total, _ = self.archived_counts()
+        total_tasks = len(self.tasks) + archived_total
 
         # Count tasks that are marked as completed
-        completed_tasks = sum(1 for task in self.tasks 
-                          if task.completed.lower() == "yes")
+        completed_tasks = sum(1 for task in self._tracked(self.tasks)
+                              if task.completed.lower() == "yes") \
+            + archived_total
 
         # Uncompleted tasks are the remaining tasks
         uncompleted_tasks = total_tasks - completed_tasks
@@ -44,7 +197,7 @@ class ReportGenerator:
         overdue_tasks = 0
         today = datetime.datetime.today()
 
-        for task in self.tasks:
+        for task in self._tracked(self.tasks):
             try:
                 # Parse the due date
                 due_date = datetime.datetime.strptime(task.date_due, 
@@ -79,88 +232,296 @@ class ReportGenerator:
                 f"{incomplete_percentage:.2f}%\n")
             f.write(f"Percentage of overdue tasks       : "
                 f"{overdue_percentage:.2f}%\n")
+            f.write(f"Data version                      : "
+                    f"{self.data_version()}\n")
+        if stats.enabled:
+            stats.count("ReportGenerator.write_task_overview",
+                        rows=total_tasks, bytes_written=os.path.getsize(
+                            config["task_overview_file"]),
+                        rewrites=1, path=config["task_overview_file"])
           
-
-    def write_user_overview(self):
+    @timed("ReportGenerator.write_user_overview")
+    def write_user_overview(self, workers=None):
         """
         Writes user_overview.txt containing per-user task statistics.
+        With more than one worker, users are split into contiguous
+        partitions formatted in a process pool; the output is the same.
         """
+        if workers is None:
+            workers = config["report_workers"]
+        archived_total, archived_users = self.archived_counts()
         total_users = len(self.users)
-        total_tasks = len(self.tasks)
+        total_tasks = len(self.tasks) + archived_total
 
         # Create a dictionary to map each user to their tasks
         user_task_map = {user.username: [] for user in self.users}
-        for task in self.tasks:
+        for task in self._tracked(self.tasks):
             if task.username in user_task_map:
                 user_task_map[task.username].append(task)
 
-        today = datetime.datetime.today()
+        # Only what each user's entry needs is passed to the formatter
+        entries = []
+        for user in self.users:
+            user_tasks = user_task_map.get(user.username, [])
+            user_archived = archived_users.get(user.username, 0)
+            completed = sum(1 for t in user_tasks
+                            if t.completed.lower() == "yes")
+            open_due = [t.date_due for t in user_tasks
+                        if t.completed.lower() == "no"]
+            entries.append((user.username,
+                            len(user_tasks) + user_archived,
+                            completed + user_archived, open_due))
+
+        cutoff = overdue_cutoff()
 
-        # Open the output file for writing user statistics
+        if workers > 1 and len(entries) > 1:
+            size = -(-len(entries) // (workers * 4))
+            partitions = [entries[i:i + size]
+                          for i in range(0, len(entries), size)]
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                sections = list(pool.map(
+                    format_user_sections, partitions,
+                    itertools.repeat(total_tasks),
+                    itertools.repeat(cutoff)))
+        else:
+            sections = [format_user_sections(entries, total_tasks,
+                                             cutoff)]
+
+        # Write the whole report at once
         with open(config["user_overview_file"], "w") as f:
-            f.write("=== User Overview ===\n\n")
-            f.write(f"Total number of users registered : "
-                    f"{total_users}\n")
-            f.write(f"Total number of tasks            : "
-                    f"{total_tasks}\n\n")
-
-            # Process stats for each user
-            for user in self.users:
-                username = user.username
-                user_tasks = user_task_map.get(username, [])
-                user_total = len(user_tasks)
-
-                if user_total > 0:
-                    # Calculate user-specific task stats
-                    percent_assigned = (user_total / total_tasks) * 100
-                    completed = sum(1 for t in user_tasks 
-                                if t.completed.lower() == "yes")
-                    incomplete = user_total - completed
-                    overdue = 0
-
-                    # Count overdue tasks
-                    for task in user_tasks:
-                        try:
-                            due = datetime.datetime.    \
-                                    strptime(task.date_due, 
-                                        config["date_format_display"])  
-                            if task.completed.lower() == "no" \
-                                    and due < today:
-                                overdue += 1
-                        except ValueError:
-                            continue  # Skip tasks with invalid dates
-
-                    # Percentages of completed, incomplete, and overdue
-                    percent_completed = (completed / user_total) * 100
-                    percent_incomplete = (incomplete / user_total) * 100
-                    percent_overdue = (overdue / user_total) * 100
-                else:
-                    # No tasks assigned to user
-                    percent_assigned = percent_completed = \
-                    percent_incomplete = percent_overdue = 0
-
-                # Write user-specific stats to file
-                f.write(f"User: {username}\n")
-                f.write(f"  - Tasks assigned                 : "
-                    f"{user_total}\n")
-                f.write(f"  - % of total tasks assigned      : "
-                    f"{percent_assigned:.2f}%\n")
-                f.write(f"  - % completed                    : "
-                    f"{percent_completed:.2f}%\n")
-                f.write(f"  - % incomplete                   : "
-                    f"{percent_incomplete:.2f}%\n")
-                f.write(f"  - % overdue                      : "
-                    f"{percent_overdue:.2f}%\n\n")
+            f.write("=== User Overview ===\n\n"
+                    f"Total number of users registered : "
+                    f"{total_users}\n"
+                    f"Total number of tasks            : "
+                    f"{total_tasks}\n"
+                    f"Data version                     : "
+                    f"{self.data_version()}\n\n" + "".join(sections))
+        if stats.enabled:
+            stats.count("ReportGenerator.write_user_overview",
+                        rows=total_tasks, bytes_written=os.path.getsize(
+                            config["user_overview_file"]),
+                        rewrites=1, path=config["user_overview_file"])
       
+    def aging_statistics(self, today=None):
+        """
+        Returns the aging figures for incomplete tasks as a dictionary:
+        overdue tasks per age bucket, tasks due in each of the next
+        FORECAST_WEEKS weeks and each user's median days overdue.
+        Counts come from bisecting sorted due-date ordinals.
+        """
+        now = datetime.datetime.today() if today is None else \
+            datetime.datetime.combine(today, datetime.time.max)
+        # The overviews' cutoff, so a task due today is overdue here too
+        cutoff = overdue_cutoff(now)
+        today = now.toordinal()
+
+        # Due dates of incomplete tasks, overall and per user
+        due_all = []
+        due_by_user = {}
+        for task in self.tasks:
+            if task.completed.lower() != "no":
+                continue
+            ordinal = date_ordinal(task.date_due)
+            if ordinal is None:
+                continue  # Skip tasks with invalid dates
+            due_all.append(ordinal)
+            due_by_user.setdefault(task.username, []).append(ordinal)
+        due_all.sort()
 
+        # Overdue by n days means due on day cutoff - n, counting the
+        # due day itself
+        buckets = {}
+        for label, fewest, most in AGING_BUCKETS:
+            start = bisect.bisect_left(due_all, cutoff - most) \
+                if most is not None else 0
+            end = bisect.bisect_right(due_all, cutoff - fewest)
+            buckets[label] = end - start
+
+        weeks = []
+        for week in range(FORECAST_WEEKS):
+            first = cutoff + 7 * week
+            weeks.append({
+                "week_start": format_ordinal(first),
+                "week_end": format_ordinal(first + 6),
+                "tasks": bisect.bisect_left(due_all, first + 7)
+                - bisect.bisect_left(due_all, first)})
+
+        users = {}
+        for user in self.users:
+            ordinals = sorted(due_by_user.get(user.username, []))
+            overdue = bisect.bisect_left(ordinals, cutoff)
+            users[user.username] = {
+                "overdue": overdue,
+                "median_days_overdue":
+                    cutoff - statistics.median(ordinals[:overdue])
+                    if overdue else None}
+
+        return {"date": format_ordinal(today),
+                "overdue_total": bisect.bisect_left(due_all, cutoff),
+                "overdue_buckets": buckets,
+                "due_per_week": weeks,
+                "users": users}
+
+    @timed("ReportGenerator.write_aging_report")
+    def write_aging_report(self, today=None):
+        """
+        Writes the aging report as text and as JSON.
+        """
+        aging = self.aging_statistics(today)
+        with open(config["aging_report_file"], "w") as f:
+            f.write("=== Task Aging ===\n\n")
+            f.write(f"Incomplete tasks as of {aging['date']}\n\n")
+            f.write("Overdue tasks by age:\n")
+            for label, count in aging["overdue_buckets"].items():
+                f.write(f"  - {label + ' days':<12}: {count}\n")
+            f.write(f"  - {'Total':<12}: {aging['overdue_total']}\n\n")
+
+            f.write("Tasks due per week:\n")
+            for week in aging["due_per_week"]:
+                f.write(f"  - {week['week_start']} to {week['week_end']}"
+                        f" : {week['tasks']}\n")
+
+            f.write("\nMedian days overdue per user:\n")
+            for username, figures in aging["users"].items():
+                median = figures["median_days_overdue"]
+                median_text = f"{median:g} ({figures['overdue']} " \
+                    f"overdue)" if median is not None else "-"
+                f.write(f"  - {username:<16}: {median_text}\n")
+
+        with open(config["aging_report_json"], "w") as f:
+            json.dump(aging, f, indent=2)
+        if stats.enabled:
+            stats.count("ReportGenerator.write_aging_report",
+                        rows=len(self.tasks), bytes_written=sum(
+                            os.path.getsize(config[key]) for key in
+                            ("aging_report_file", "aging_report_json")),
+                        rewrites=2, path=config["aging_report_file"])
+        print(f"\nAging report generated: '{config['aging_report_file']}'"
+              f" and '{config['aging_report_json']}'")
+        return aging
+
+    def display_aging_report(self):
+        """
+        Generates and displays the aging report.
+        """
+        self.write_aging_report()
+        print("\nTASK AGING\n" + "═" * 40)
+        with open(config["aging_report_file"], "r") as file:
+            print(file.read())
+
+    @timed("ReportGenerator.approximate_statistics")
+    def approximate_statistics(self, sample_size=None, confidence=None,
+                               seed=None):
+        """
+        Estimates the completed and overdue percentages, overall and
+        per user, from a simple random sample of the live tasks.
+        Each estimate comes with a Wilson confidence interval. Archived
+        tasks are counted exactly. If the sample would cover every
+        task, all tasks are used and the figures are exact.
+        """
+        if sample_size is None:
+            sample_size = config["sample_size"]
+        if confidence is None:
+            confidence = config["confidence_level"]
+        archived_total, archived_users = self.archived_counts()
+        population = len(self.tasks)
+        exact = sample_size >= population
+        sample = self.tasks if exact else \
+            random.Random(seed).sample(self.tasks, sample_size)
+        cutoff = overdue_cutoff()
+
+        # (sampled, completed, overdue) per user and overall
+        counts = {}
+        for task in sample:
+            status = task.completed.lower()
+            overdue = False
+            if status == "no":
+                ordinal = date_ordinal(task.date_due)
+                overdue = ordinal is not None and ordinal < cutoff
+            entry = counts.setdefault(task.username, [0, 0, 0])
+            entry[0] += 1
+            entry[1] += status == "yes"
+            entry[2] += overdue
+
+        def estimate(sampled, completed, overdue, live, archived):
+            # Archived tasks are completed and never overdue, so the
+            # live estimates are scaled to include them
+            total = live + archived
+            if total == 0:
+                return None
+            result = {"tasks": round(total)}
+            for name, hits, extra in (("completed", completed, archived),
+                                      ("overdue", overdue, 0)):
+                share = hits / sampled if sampled else 0.0
+                low, high = (share, share) if exact else \
+                    wilson_interval(hits, sampled, confidence)
+                result[name] = {
+                    key: (value * live + extra) / total * 100
+                    for key, value in (("percent", share), ("low", low),
+                                       ("high", high))}
+            return result
+
+        overall = [sum(entry[i] for entry in counts.values())
+                   for i in range(3)]
+        users = {}
+        for user in self.users:
+            sampled, completed, overdue = counts.get(user.username,
+                                                     (0, 0, 0))
+            live = sampled / len(sample) * population if sample else 0
+            users[user.username] = estimate(
+                sampled, completed, overdue, live,
+                archived_users.get(user.username, 0))
+
+        result = estimate(*overall, population, archived_total) or \
+            {"tasks": 0}
+        result.update(exact=exact, confidence=confidence,
+                      sample_size=len(sample), users=users)
+        return result
+
+    def display_approximate_statistics(self, sample_size=None):
+        """
+        Displays estimated statistics from a sample of the tasks.
+        Returns False, showing nothing, if there are too few tasks
+        for sampling to be quicker than the exact reports.
+        """
+        result = self.approximate_statistics(sample_size)
+        if result["exact"]:
+            return False
+
+        def describe(figures, name):
+            values = figures[name]
+            return (f"{values['percent']:6.2f}% ({values['low']:.2f}% - "
+                    f"{values['high']:.2f}%)")
+
+        print("\nAPPROXIMATE STATISTICS\n" + "═" * 40)
+        print(f"Estimated from {result['sample_size']} of "
+              f"{result['tasks']} tasks, "
+              f"{result['confidence'] * 100:g}% confidence intervals\n")
+        print(f"% completed : {describe(result, 'completed')}")
+        print(f"% overdue   : {describe(result, 'overdue')}\n")
+        for username, figures in result["users"].items():
+            if figures is None:
+                print(f"User: {username}\n  - No tasks sampled\n")
+                continue
+            print(f"User: {username}\n"
+                  f"  - Tasks assigned (est.) : {figures['tasks']}\n"
+                  f"  - % completed           : "
+                  f"{describe(figures, 'completed')}\n"
+                  f"  - % overdue             : "
+                  f"{describe(figures, 'overdue')}\n")
+        return True
+
+    @timed("ReportGenerator.generate")
     def generate(self):
         self.write_task_overview()
         self.write_user_overview()
-        # Notify user that reports were created successfully
-        print("\nReports successfully generated: 'task_overview.txt'"
-            " and 'user_overview.txt'")
-
+        # A job reports completion itself, from the menu's thread
+        if self.job is None:
+            # Notify user that reports were created successfully
+            print("\nReports successfully generated: 'task_overview.txt'"
+                  " and 'user_overview.txt'")
 
+    @timed("ReportGenerator.display_statistics")
     def display_statistics(self):
         """
         Displays task and user overview reports.
@@ -187,4 +548,108 @@ class ReportGenerator:
             with open(config["user_overview_file"], "r") as file:
                 print(file.read())  # Print entire file content
         except FileNotFoundError:
-            print("Could not find 'user_overview.txt'.")
\ No newline at end of file
+            print("Could not find 'user_overview.txt'.")
+
+
+class ReportSnapshot(ReportGenerator):
+
+    def __init__(self, report_gen):
+        # Copies of the fields, so later edits to the live tasks
+        # cannot change a report while it is being generated. Plain
+        # tuples are the quickest to take; they are turned into
+        # TaskRecords when first used, on the report's own thread.
+        self._rows = tuple(map(_record_fields, report_gen.tasks))
+        self.users = tuple(report_gen.users)
+        total, users = report_gen.archived_counts()
+        self._archived = total, dict(users)
+        self.archive = None
+        self.version = report_gen.data_version()
+        self.taken = datetime.datetime.now()
+
+    @functools.cached_property
+    def tasks(self):
+        tasks = tuple(itertools.starmap(TaskRecord, self._rows))
+        del self._rows
+        return tasks
+
+    def data_version(self):
+        return self.version
+
+    def archived_counts(self):
+        return self._archived
+
+    def snapshot(self):
+        return self
+
+
+class ReportJob:
+
+    def __init__(self, report_gen):
+        # Usually a ReportSnapshot, so nothing it reads changes
+        self.report_gen = report_gen
+        self.version = report_gen.data_version() \
+            if hasattr(report_gen, "data_version") else None
+        # Fraction of the work done, from 0 to 1
+        self.progress = 0.0
+        self.cancelled = False
+        self.error = None
+        self._processed = 0
+        self._expected = 1
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name="report-job")
+
+    def start(self):
+        self.report_gen.job = self
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            # The reports scan the tasks three times in all
+            self._expected = 3 * len(getattr(self.report_gen, "tasks",
+                                             ())) or 1
+            self.report_gen.generate()
+            self.progress = 1.0
+        except ReportCancelled:
+            self.cancelled = True
+        except Exception as error:
+            self.error = error
+        finally:
+            # A generator used again directly (as the remote one is)
+            # reports its own results once the job is over
+            if self.report_gen.job is self:
+                self.report_gen.job = None
+
+    def track(self, tasks):
+        """
+        Yields tasks from a sequence, updating progress and stopping
+        with ReportCancelled if the job was cancelled.
+        """
+        for start in range(0, len(tasks), PROGRESS_STEP):
+            if self._cancel.is_set():
+                raise ReportCancelled()
+            chunk = tasks[start:start + PROGRESS_STEP]
+            yield from chunk
+            self._processed += len(chunk)
+            self.progress = min(1.0, self._processed / self._expected)
+
+    def cancel(self):
+        """
+        Asks the job to stop; files already written are kept.
+        """
+        self._cancel.set()
+
+    def done(self):
+        return not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """
+        Waits for the job to finish. Returns True if it has.
+        """
+        self._thread.join(timeout)
+        return self.done()
+
+    @property
+    def succeeded(self):
+        return self.done() and not self.cancelled and self.error is None
@@ -0,0 +1,336 @@
+"""
+stress_test.py
+
+Stress test for several sessions sharing the same data files.
+
+For each writer count, a seeded dataset is generated (see
+data_generator.py) and that many processes are started at once. Each
+makes a random mix of adds, completes, edits (due date changes),
+deletes and user registrations through TaskManager and UserManager,
+holding the file's lock (TaskManager.locked()) for each change.
+
+Each writer only changes the tasks it added itself and keeps its own
+record of how they should end up, so the final files can be checked
+exactly: every writer's tasks must be present once with its last
+changes, deleted tasks must stay deleted, the generated tasks must be
+untouched and every registered user must be there.
+
+Throughput and p50/p99 latency per operation, including the time
+spent waiting for the lock, are reported for each writer count.
+With --unsafe the writers make their changes without the lock, which
+shows the updates lost when sessions save over each other.
+
+Command line:
+    python stress_test.py --writers 1 2 4 8 --operations 200
+    python stress_test.py --writers 4 --unsafe
+"""
+
+import argparse
+import collections
+import contextlib
+import datetime
+import json
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from data_generator import generate_dataset  # noqa: E402
+from load_generator import percentile  # noqa: E402
+from task_manager_build import Task, TaskManager, read_task_file  # noqa: E402
+from user_manager import User, UserManager  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+DEFAULT_WRITERS = (1, 2, 4, 8)
+
+# Operation -> relative frequency
+OPERATIONS = {"add": 4, "complete": 2, "edit": 2, "delete": 1,
+              "register": 1}
+
+# Seconds to wait for all writers to finish
+TIMEOUT = 600
+
+
+class Writer:
+    """
+    One session making random changes, run in its own process.
+    """
+
+    def __init__(self, number, task_file, user_file, seed, locked=True):
+        self.number = number
+        self.username = f"stress{number}"
+        self.rng = random.Random(seed * 1000 + number)
+        self.locked = locked
+        self.task_manager = TaskManager(task_file, lazy=False,
+                                        cache_budget=0)
+        self.user_manager = UserManager(user_file)
+        # Title -> [date_due, completed] of this writer's tasks
+        self.expected = {}
+        self.registered = []
+        # Changes to tasks that were no longer in memory
+        self.missing = 0
+        self.added = 0
+
+    def run(self, operations, barrier):
+        latencies = {name: [] for name in OPERATIONS}
+        barrier.wait()
+        for _ in range(operations):
+            name = self.rng.choices(list(OPERATIONS),
+                                    list(OPERATIONS.values()))[0]
+            if not self.expected and name not in ("add", "register"):
+                name = "add"
+            started = time.perf_counter()
+            manager = self.user_manager if name == "register" else \
+                self.task_manager
+            with manager.locked() if self.locked else \
+                    contextlib.nullcontext():
+                getattr(self, name)()
+            latencies[name].append(time.perf_counter() - started)
+        return {"writer": self.number, "username": self.username,
+                "latencies": latencies, "expected": self.expected,
+                "registered": self.registered, "missing": self.missing}
+
+    def _find(self, title):
+        """
+        Returns (position, task) of one of this writer's tasks, or
+        None if it is not in memory.
+        """
+        for position, task in self.task_manager.select(user=self.username):
+            if task.title == title:
+                return position, task
+        self.missing += 1
+        return None
+
+    def _random_date(self):
+        day = datetime.date(2024, 1, 1) + \
+            datetime.timedelta(days=self.rng.randrange(730))
+        return day.strftime(config["date_format_display"])
+
+    def add(self):
+        title = f"Task {self.number}-{self.added}"
+        self.added += 1
+        due = self._random_date()
+        self.task_manager.add_task(Task(self.username, title,
+                                        f"Stress test task {title}",
+                                        "01 Jan 2024", due))
+        self.expected[title] = [due, "No"]
+
+    def complete(self):
+        title = self.rng.choice(list(self.expected))
+        found = self._find(title)
+        if found is not None:
+            self.task_manager.complete_task(found[1])
+            self.task_manager.save_tasks()
+        self.expected[title][1] = "Yes"
+
+    def edit(self):
+        title = self.rng.choice(list(self.expected))
+        due = self._random_date()
+        found = self._find(title)
+        if found is not None:
+            self.task_manager.reschedule_task(found[1], due)
+            self.task_manager.save_tasks()
+        self.expected[title][0] = due
+
+    def delete(self):
+        title = self.rng.choice(list(self.expected))
+        found = self._find(title)
+        if found is not None:
+            self.task_manager.delete_task(found[0])
+        del self.expected[title]
+
+    def register(self):
+        username = f"{self.username}_user{len(self.registered)}"
+        self.user_manager.add_user(User(username, "stress"))
+        self.registered.append(username)
+
+
+def run_writer(number, task_file, user_file, seed, locked, operations,
+               barrier, results):
+    """
+    Runs one Writer and puts its results on the results queue.
+    """
+    try:
+        writer = Writer(number, task_file, user_file, seed, locked)
+        results.put(writer.run(operations, barrier))
+    except Exception as error:
+        barrier.abort()
+        results.put({"writer": number, "error": repr(error)})
+
+
+def check_final_state(task_file, user_file, original_tasks,
+                      original_users, results):
+    """
+    Compares the files with what every writer expects.
+    Returns {problem: count}; all counts are 0 if nothing was lost.
+    """
+    tasks = list(read_task_file(task_file))
+    writers = {result["username"]: result for result in results}
+    found = collections.Counter()
+    problems = {"lost": 0, "stale": 0, "resurrected": 0,
+                "duplicated": 0, "original_changed": 0,
+                "users_lost": 0}
+    remaining = []
+    for task in tasks:
+        result = writers.get(task.username)
+        if result is None:
+            remaining.append(task.to_file_string())
+            continue
+        key = (task.username, task.title)
+        found[key] += 1
+        if found[key] > 1:
+            problems["duplicated"] += 1
+            continue
+        expected = result["expected"].get(task.title)
+        if expected is None:
+            problems["resurrected"] += 1
+        elif [task.date_due, task.completed] != expected:
+            problems["stale"] += 1
+    for username, result in writers.items():
+        problems["lost"] += sum(1 for title in result["expected"]
+                                if (username, title) not in found)
+    problems["original_changed"] = sum(
+        (collections.Counter(original_tasks) -
+         collections.Counter(remaining)).values())
+
+    users = UserManager(user_file)
+    names = collections.Counter(user.username for user in users.users)
+    wanted = list(original_users)
+    for result in results:
+        wanted.extend(result["registered"])
+    problems["users_lost"] = sum(1 for name in wanted if not names[name])
+    problems["duplicated"] += sum(count - 1 for count in names.values()
+                                  if count > 1)
+    return problems
+
+
+def run_stress(writers, operations, tasks=1000, seed=0, locked=True,
+               data_dir=None):
+    """
+    Runs writers processes of operations changes each against a fresh
+    dataset of tasks tasks. Returns throughput, latency percentiles
+    per operation and the problems found in the final files.
+    """
+    with tempfile.TemporaryDirectory() as scratch:
+        directory = os.path.join(data_dir or scratch, str(writers))
+        task_file, user_file, usernames = generate_dataset(
+            directory, tasks, seed=seed)
+        for path in (task_file, user_file):
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path + ".lock")
+        original_tasks = [task.to_file_string()
+                          for task in read_task_file(task_file)]
+
+        barrier = multiprocessing.Barrier(writers + 1)
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(
+            target=run_writer,
+            args=(number, task_file, user_file, seed, locked, operations,
+                  barrier, queue))
+            for number in range(writers)]
+        for process in processes:
+            process.start()
+        # A writer that failed to start breaks the barrier; its error
+        # is reported below
+        with contextlib.suppress(threading.BrokenBarrierError):
+            barrier.wait(TIMEOUT)
+        started = time.perf_counter()
+        results = [queue.get(timeout=TIMEOUT) for _ in processes]
+        elapsed = time.perf_counter() - started
+        for process in processes:
+            process.join()
+
+        errors = [result["error"] for result in results
+                  if "error" in result]
+        if errors:
+            raise RuntimeError(f"Writer failed: {errors[0]}")
+        problems = check_final_state(task_file, user_file,
+                                     original_tasks, usernames, results)
+
+    latencies = collections.defaultdict(list)
+    for result in results:
+        for name, values in result["latencies"].items():
+            latencies[name].extend(values)
+    total = sum(len(values) for values in latencies.values())
+    report = {"writers": writers, "locked": locked,
+              "operations": total, "seconds": elapsed,
+              "ops_per_second": total / elapsed if elapsed else 0.0,
+              "missing": sum(result["missing"] for result in results),
+              "problems": problems,
+              "consistent": not any(problems.values()),
+              "latency": {}}
+    for name in OPERATIONS:
+        values = sorted(latencies[name])
+        report["latency"][name] = {
+            "count": len(values),
+            "p50": percentile(values, 0.50),
+            "p99": percentile(values, 0.99)}
+    return report
+
+
+def print_reports(reports):
+    print(f"\n{'Writers':>7}{'Ops/s':>9}  "
+          + "".join(f"{name + ' p50/p99 ms':>24}" for name in OPERATIONS)
+          + "  Result")
+    for report in reports:
+        cells = "".join(
+            f"{latency['p50'] * 1000:>15.2f}/{latency['p99'] * 1000:<8.2f}"
+            for latency in report["latency"].values())
+        lost = {name: count for name, count in report["problems"].items()
+                if count}
+        result = "consistent" if report["consistent"] else \
+            ", ".join(f"{count} {name}" for name, count in lost.items())
+        print(f"{report['writers']:>7}{report['ops_per_second']:>9.0f}  "
+              f"{cells}  {result}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run concurrent writers "
+                                                 "against shared data "
+                                                 "files.")
+    parser.add_argument("--writers", type=int, nargs="+",
+                        default=list(DEFAULT_WRITERS))
+    parser.add_argument("--operations", type=int, default=200,
+                        help="changes made by each writer")
+    parser.add_argument("--tasks", type=int, default=1000,
+                        help="tasks in the generated dataset")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--unsafe", action="store_true",
+                        help="make changes without taking the lock")
+    parser.add_argument("--data-dir",
+                        help="keep the final data files in this directory")
+    parser.add_argument("--output", help="write results as JSON here")
+    args = parser.parse_args()
+
+    data_dir = os.path.join(INVOCATION_DIR, args.data_dir) \
+        if args.data_dir else None
+    reports = []
+    for writers in args.writers:
+        print(f"Running {writers} writer(s)...", file=sys.stderr)
+        reports.append(run_stress(writers, args.operations, args.tasks,
+                                  args.seed, not args.unsafe, data_dir))
+    print_reports(reports)
+
+    if args.output:
+        path = os.path.join(INVOCATION_DIR, args.output)
+        with open(path, "w") as f:
+            json.dump(reports, f, indent=2)
+        print(f"\nResults written to {path}")
+    if not all(report["consistent"] for report in reports):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+task_archive.py
+
+Defines the TaskArchive class.
+
+TaskArchive: Cold storage for old completed tasks. Tasks are appended
+to a gzip-compressed segment next to the task file and are never
+rewritten. Per-user counts are kept in a small JSON file alongside, so
+reports can include archived tasks without decompressing the archive.
+"""
+
+import gzip
+import json
+import os
+from task_manager_build import Task
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+
+def archive_paths(task_file):
+    """
+    Returns the (archive, aggregates) file paths for a task file.
+    """
+    root = os.path.splitext(task_file)[0]
+    return f"{root}_archive.txt.gz", f"{root}_archive.json"
+
+
+class TaskArchive:
+
+    def __init__(self, task_file=config["task_file"]):
+        self.file_path, self.stats_path = archive_paths(task_file)
+        self._stats = None
+
+    def stats(self):
+        """
+        Returns the archive aggregates: {"total": n, "users": {name: n}}.
+        Rebuilt from the archive itself if the aggregates file is missing.
+        """
+        if self._stats is None:
+            try:
+                with open(self.stats_path, "r") as f:
+                    self._stats = json.load(f)
+            except FileNotFoundError:
+                self._stats = {"total": 0, "users": {}}
+                if os.path.exists(self.file_path):
+                    for task in self.iter_tasks():
+                        self._count(task)
+                    self._save_stats()
+        return self._stats
+
+    def user_counts(self):
+        return self.stats()["users"]
+
+    @property
+    def total(self):
+        return self.stats()["total"]
+
+    def _count(self, task):
+        users = self._stats["users"]
+        users[task.username] = users.get(task.username, 0) + 1
+        self._stats["total"] += 1
+
+    def _save_stats(self):
+        # Write to a temporary file first so the aggregates are never
+        # left half-written
+        temp_path = self.stats_path + ".tmp"
+        with open(temp_path, "w") as f:
+            json.dump(self._stats, f)
+        os.replace(temp_path, self.stats_path)
+
+    def append(self, tasks):
+        """
+        Appends completed tasks to the archive and updates the
+        aggregates. Each call adds one gzip member to the file.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        self.stats()
+        with gzip.open(self.file_path, "at") as f:
+            f.write("".join(task.to_file_string() + "\n"
+                            for task in tasks))
+        for task in tasks:
+            self._count(task)
+        self._save_stats()
+
+    def iter_tasks(self):
+        """
+        Yields the archived tasks, oldest first, decompressing as it goes.
+        """
+        try:
+            with gzip.open(self.file_path, "rt") as f:
+                for line in f:
+                    fields = [field.strip()
+                              for field in line.strip().split(",")]
+                    if len(fields) == 6:
+                        yield Task(*fields)
+        except FileNotFoundError:
+            return
@@ -0,0 +1,375 @@
+"""
+task_cache.py
+
+Defines the PagedTaskList and CachedTask classes.
+
+PagedTaskList: A list of the tasks in a task file that keeps only a
+bounded number of them in memory. Tasks are read in pages of
+PAGE_SIZE lines through the file's offset index (see task_index.py)
+when first used, and the least recently used pages are dropped once
+the budget is reached. A task tells the list when it is first changed
+and is then kept until the list is saved, when it is written back
+along with the unchanged lines copied from the old file.
+
+CachedTask: A LazyTask read by a PagedTaskList, which reports its
+first change to the list.
+
+TaskManager uses a PagedTaskList as self.tasks when "task_cache_budget" in
+config.json is above 0, so the menus work on it like a normal list.
+"""
+
+import array
+import collections
+import os
+from collections.abc import MutableSequence
+from task_index import TaskFileIndex
+from task_manager_build import LazyTask, _FIELD_INDEX
+from instrumentation import stats
+
+# Task lines read from the file at a time
+PAGE_SIZE = 256
+
+# Tasks not (yet) in the file are numbered from here, above any line
+PENDING_ROWS = 1 << 62
+
+
+class RowMap:
+    """
+    The rows of the tasks read from one version of the task file.
+    Saving renumbers the rows, so the old map then records where each
+    row moved and points on to the new one.
+    """
+
+    __slots__ = ("tasks", "moved", "successor")
+
+    def __init__(self, tasks):
+        self.tasks = tasks
+        # Old row -> new row (-1 if deleted); None if rows did not move
+        self.moved = None
+        self.successor = None
+
+    def changed(self, task):
+        """
+        Passes a task changed for the first time to the list it now
+        belongs to.
+        """
+        rows, row = self, task._row
+        while rows.successor is not None:
+            if rows.moved is not None:
+                row = rows.moved[row] if row < len(rows.moved) else -1
+                if row < 0:
+                    return  # deleted when the list was saved
+            rows = rows.successor
+        if rows.tasks is None:
+            return  # the list was reloaded from the file
+        object.__setattr__(task, "_rows", rows)
+        object.__setattr__(task, "_row", row)
+        rows.tasks.task_changed(task)
+
+
+class CachedTask(LazyTask):
+    """
+    A LazyTask read by a PagedTaskList. It tells the list when a field
+    is first set, so the change is saved even if its page is dropped
+    while the task is held elsewhere.
+    """
+
+    __slots__ = ("_rows", "_row")
+
+    def __init__(self, line, rows, row):
+        # Pages are read a few hundred tasks at a time, so the slots
+        # are set directly rather than through __setattr__
+        _set_line(self, line)
+        _set_modified(self, False)
+        _set_rows(self, rows)
+        _set_row(self, row)
+
+    def __setattr__(self, name, value):
+        first_change = name in _FIELD_INDEX and not self._modified
+        super().__setattr__(name, value)
+        if first_change:
+            self._rows.changed(self)
+
+
+_set_line = LazyTask._line.__set__
+_set_modified = LazyTask._modified.__set__
+_set_rows = CachedTask._rows.__set__
+_set_row = CachedTask._row.__set__
+
+
+class PagedTaskList(MutableSequence):
+
+    def __init__(self, file_path, budget):
+        self.file_path = file_path
+        self.index = TaskFileIndex(file_path).open()
+        self.max_pages = max(1, budget // PAGE_SIZE)
+        # Page number -> tasks, least recently used first
+        self._pages = collections.OrderedDict()
+        # Changed tasks, and tasks whose changes cannot be tracked
+        # (plain Task objects), by row; kept until saved
+        self._held = {}
+        self._row_map = RowMap(self)
+        # Added or replaced tasks not in the file, by row
+        self._pending = {}
+        self._next_pending = PENDING_ROWS
+        # Position -> row, once tasks were inserted or removed;
+        # None while position N is line N of the file
+        self._order = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.write_backs = 0
+
+    # ------------------------------------------------------------------
+    # Paging
+    # ------------------------------------------------------------------
+
+    def _load_page(self, number):
+        start = number * PAGE_SIZE
+        lines = self.index.read_lines(
+            start, min(start + PAGE_SIZE, len(self.index)))
+        rows, held = self._row_map, self._held
+        page = [held.get(row) or CachedTask(line, rows, row)
+                for row, line in enumerate(lines, start)] \
+            if held else [CachedTask(line, rows, row)
+                          for row, line in enumerate(lines, start)]
+        if stats.enabled:
+            stats.count("PagedTaskList.page_in", rows=len(page),
+                        bytes_read=sum(map(len, lines)))
+        self._pages[number] = page
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+            self.evictions += 1
+        return page
+
+    def task_changed(self, task):
+        """
+        Keeps a task read from row task._row that was just changed
+        until the next save, in place of its unchanged line.
+        """
+        row = task._row
+        self._held[row] = task
+        # Another copy may have been read since; this one now counts
+        number, slot = divmod(row, PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is not None and slot < len(page):
+            page[slot] = task
+
+    def _task(self, row):
+        if row >= PENDING_ROWS:
+            return self._pending[row]
+        number, slot = divmod(row, PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is None:
+            self.misses += 1
+            page = self._load_page(number)
+        else:
+            self.hits += 1
+            self._pages.move_to_end(number)
+        return page[slot]
+
+    def _cached(self, row):
+        """
+        Returns the task object for row if one is in memory, else None.
+        """
+        task = self._pending.get(row)
+        if task is not None:
+            return task
+        number, slot = divmod(row, PAGE_SIZE)
+        page = self._pages.get(number)
+        if page is not None:
+            return page[slot]
+        return self._held.get(row)
+
+    def _rows(self):
+        if self._order is None:
+            self._order = array.array("Q", range(len(self.index)))
+        return self._order
+
+    def _new_row(self, task):
+        row = self._next_pending
+        self._next_pending += 1
+        self._pending[row] = task
+        return row
+
+    def cache_info(self):
+        return {"pages": len(self._pages), "held": len(self._held),
+                "max_pages": self.max_pages, "hits": self.hits,
+                "misses": self.misses, "evictions": self.evictions,
+                "write_backs": self.write_backs}
+
+    # ------------------------------------------------------------------
+    # List interface
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        if self._order is None:
+            return len(self.index)
+        return len(self._order)
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        length = len(self)
+        if position < 0:
+            position += length
+        if not 0 <= position < length:
+            raise IndexError("task index out of range")
+        if self._order is None:
+            return self._task(position)
+        return self._task(self._order[position])
+
+    def __iter__(self):
+        if self._order is not None:
+            for row in self._order:
+                yield self._task(row)
+            return
+        # In file order, so a page at a time
+        number = 0
+        while number * PAGE_SIZE < len(self.index):
+            page = self._pages.get(number)
+            if page is None:
+                self.misses += 1
+                page = self._load_page(number)
+            else:
+                self.hits += 1
+                self._pages.move_to_end(number)
+            self.hits += len(page) - 1
+            yield from page
+            number += 1
+
+    def __setitem__(self, position, task):
+        if isinstance(position, slice):
+            # Rarely used, so done as a delete and inserts
+            positions = range(*position.indices(len(self)))
+            if position.step not in (None, 1):
+                raise ValueError("extended slice assignment "
+                                 "is not supported")
+            del self[position]
+            for offset, item in enumerate(task):
+                self.insert(positions.start + offset, item)
+            return
+        rows = self._rows()
+        rows[position] = self._new_row(task)
+
+    def __delitem__(self, position):
+        rows = self._rows()
+        del rows[position]
+
+    def insert(self, position, task):
+        rows = self._rows()
+        row = self._new_row(task)
+        if position >= len(rows):
+            rows.append(row)
+        else:
+            rows.insert(position, row)
+
+    def delete_many(self, positions):
+        """
+        Removes the tasks at the given positions in one pass.
+        """
+        positions = set(positions)
+        self._order = array.array("Q", (
+            row for position, row in enumerate(self._rows())
+            if position not in positions))
+
+    def append_written(self, tasks):
+        """
+        Adds tasks that were just appended to the task file, indexing
+        the new lines instead of holding the tasks as pending.
+        """
+        start = len(self.index)
+        self.index.refresh()
+        rows = range(start, len(self.index))
+        if self._order is not None:
+            self._order.extend(rows)
+        for row, task in zip(rows, tasks):
+            # Changes to plain tasks cannot be tracked, so they are
+            # held and written on every save
+            self._held[row] = task
+            # A page loaded before it was full is extended in place
+            page = self._pages.get(row // PAGE_SIZE)
+            if page is not None:
+                page.append(task)
+
+    def reload(self):
+        """
+        Drops the tasks in memory, including unsaved changes, and
+        reads the task file again, for when another process saved it.
+        """
+        self._row_map.tasks = None
+        self._row_map = RowMap(self)
+        self._pages.clear()
+        self._held.clear()
+        self._pending.clear()
+        self._order = None
+        self.index.open()
+
+    # ------------------------------------------------------------------
+    # Writing back
+    # ------------------------------------------------------------------
+
+    def save(self, header):
+        """
+        Writes the list to the task file. Lines of tasks that are not
+        in memory are copied from the old file. The file is replaced
+        rather than truncated, as the old one is still memory-mapped.
+        """
+        temp_path = self.file_path + ".tmp"
+        written = {}
+        changed = 0
+        index = self.index
+        rows = self._order if self._order is not None \
+            else range(len(index))
+        # Where each old row moved, for tasks still held elsewhere
+        moved = None
+        if self._order is not None:
+            moved = array.array("q", [-1]) * len(index)
+            for position, row in enumerate(rows):
+                if row < PENDING_ROWS:
+                    moved[row] = position
+        with open(temp_path, "w") as f:
+            f.write(header)
+            position = 0
+            while position < len(rows):
+                row = rows[position]
+                task = self._cached(row)
+                if task is not None:
+                    if getattr(task, "_modified", True):
+                        changed += 1
+                    line = task.to_file_string()
+                    f.write(line + "\n")
+                    written[position] = (task, line)
+                    position += 1
+                    continue
+                # Copy a run of following lines that are not in memory
+                end = position + 1
+                while end < len(rows) and end - position < PAGE_SIZE and \
+                        rows[end] == row + end - position and \
+                        self._cached(rows[end]) is None:
+                    end += 1
+                f.writelines(line + "\n" for line in index.read_lines(
+                    row, row + end - position))
+                position = end
+        self.write_backs += changed
+        index.close()
+        os.replace(temp_path, self.file_path)
+        index.build()
+
+        # Tasks still in use now refer to their new line
+        old_map, self._row_map = self._row_map, RowMap(self)
+        old_map.tasks, old_map.moved = None, moved
+        old_map.successor = self._row_map
+        self._pages.clear()
+        self._held.clear()
+        self._pending.clear()
+        self._order = None
+        for position, (task, line) in written.items():
+            if isinstance(task, CachedTask):
+                object.__setattr__(task, "_rows", self._row_map)
+                object.__setattr__(task, "_row", position)
+            if isinstance(task, LazyTask):
+                object.__setattr__(task, "_line", line)
+                object.__setattr__(task, "_modified", False)
+            else:
+                self._held[position] = task
@@ -0,0 +1,311 @@
+"""
+task_client.py
+
+Thin clients for the local task server (see task_server.py).
+
+TaskClient: Sends JSON requests to the server over one kept-alive
+    HTTP connection.
+RemoteTaskManager, RemoteUserManager, RemoteReportGenerator:
+    Drop-in replacements for TaskManager, UserManager and
+    ReportGenerator, so the menus in main.py can run against a shared
+    server instead of reading and writing the data files themselves.
+"""
+
+import contextlib
+import http.client
+import json
+import os
+from task_manager_build import Task, TaskManager
+from user_manager import User, UserManager
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+TASK_FIELDS = ("username", "title", "description", "date_add",
+               "date_due", "completed")
+
+
+class TaskClient:
+
+    def __init__(self, host=config["server_host"],
+                 port=config["server_port"], timeout=30):
+        self.host = host
+        self.port = port
+        self.timeout = timeout
+        self._connection = None
+
+    def request(self, method, path, data=None):
+        """
+        Sends a request and returns (status, decoded JSON payload).
+        Reconnects once if the kept-alive connection has dropped.
+        """
+        body = json.dumps(data).encode("utf-8") \
+            if data is not None else None
+        headers = {"Content-Type": "application/json"}
+        for attempt in range(2):
+            reused = self._connection is not None
+            if self._connection is None:
+                self._connection = http.client.HTTPConnection(
+                    self.host, self.port, timeout=self.timeout)
+            try:
+                self._connection.request(method, path, body=body,
+                                         headers=headers)
+                response = self._connection.getresponse()
+                payload = json.loads(response.read() or b"{}")
+            except (http.client.RemoteDisconnected, BrokenPipeError,
+                    ConnectionResetError):
+                self.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            if response.getheader("Connection", "").lower() == "close":
+                self.close()
+            return response.status, payload
+
+    def close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def report_error(status, data):
+    """
+    Prints a server error message.
+    Returns True if the response was successful.
+    """
+    if status < 400:
+        return True
+    print(f"\nServer error ({status}): {data.get('error', 'unknown')}")
+    return False
+
+
+class RemoteTaskManager(TaskManager):
+
+    def __init__(self, client):
+        self.client = client
+        self.file_path = None
+        self.tasks = []
+        # (server index, task, file string as last seen) per task
+        self._snapshot = []
+        self.load_tasks()
+
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        The server applies changes one at a time and rejects changes
+        to tasks modified since they were fetched, so no lock is held.
+        """
+        yield self
+
+    def load_tasks(self):
+        """
+        Fetches the current task list from the server.
+        """
+        status, data = self.client.request("GET", "/tasks")
+        if not report_error(status, data):
+            return
+        self.tasks = []
+        self._snapshot = []
+        for item in data["tasks"]:
+            task = Task(*(item[field] for field in TASK_FIELDS))
+            self.tasks.append(task)
+            self._snapshot.append((item["index"], task,
+                                   task.to_file_string()))
+
+    def save_tasks(self):
+        """
+        Sends the tasks changed or removed since the last load to the
+        server, then reloads. Changes to tasks another session has
+        modified in the meantime are rejected by the server.
+        """
+        current = {id(task) for task in self.tasks}
+        for index, task, original in self._snapshot:
+            if id(task) in current and task.to_file_string() != original:
+                status, data = self.client.request(
+                    "PATCH", f"/tasks/{index}",
+                    {"expect": original, "username": task.username,
+                     "date_due": task.date_due,
+                     "completed": task.completed})
+                report_error(status, data)
+        # Delete from the end so earlier indexes stay valid
+        for index, task, original in reversed(self._snapshot):
+            if id(task) not in current:
+                status, data = self.client.request(
+                    "DELETE", f"/tasks/{index}", {"expect": original})
+                report_error(status, data)
+        self.load_tasks()
+
+    def add_task(self, task):
+        """
+        Sends a new task to the server.
+        """
+        status, data = self.client.request(
+            "POST", "/tasks",
+            {field: getattr(task, field) for field in TASK_FIELDS})
+        if report_error(status, data):
+            self.tasks.append(task)
+            self._snapshot.append((data["index"], task,
+                                   task.to_file_string()))
+
+    def delete_task(self, task):
+        """
+        Deletes the task at the given index on the server.
+        """
+        selected = self.tasks[task]
+        for index, known, original in self._snapshot:
+            if known is selected:
+                status, data = self.client.request(
+                    "DELETE", f"/tasks/{index}", {"expect": original})
+                report_error(status, data)
+                break
+        self.load_tasks()
+        return selected
+
+    def reassign_tasks(self, from_user, to_user, completed=None,
+                       due_before=None, due_after=None, text=None):
+        """
+        Reassigns matching tasks on the server in one operation.
+        """
+        status, data = self.client.request("POST", "/tasks/reassign", {
+            "from_user": from_user, "to_user": to_user,
+            "completed": completed, "due_before": due_before,
+            "due_after": due_after, "text": text})
+        self.load_tasks()
+        return data["count"] if report_error(status, data) else 0
+
+    def complete_tasks(self, user=None, due_before=None, due_after=None,
+                       text=None):
+        """
+        Completes matching tasks on the server in one operation.
+        """
+        status, data = self.client.request("POST", "/tasks/complete", {
+            "user": user, "due_before": due_before,
+            "due_after": due_after, "text": text})
+        self.load_tasks()
+        return data["count"] if report_error(status, data) else 0
+
+    def archive_completed(self, max_age_days=config["archive_after_days"]):
+        """
+        Archives old completed tasks on the server.
+        """
+        status, data = self.client.request(
+            "POST", "/tasks/archive", {"max_age_days": max_age_days})
+        self.load_tasks()
+        return data["count"] if report_error(status, data) else 0
+
+    def view_all_tasks(self):
+        self.load_tasks()
+        super().view_all_tasks()
+
+    def view_user_tasks(self, username):
+        self.load_tasks()
+        super().view_user_tasks(username)
+
+    def view_completed_tasks(self):
+        self.load_tasks()
+        super().view_completed_tasks()
+
+
+class RemoteUserManager(UserManager):
+
+    def __init__(self, client):
+        self.client = client
+        self.file_path = None
+        self.users = []
+        self.read_users()
+
+    @contextlib.contextmanager
+    def locked(self):
+        # The server adds users one at a time
+        yield self
+
+    def read_users(self):
+        """
+        Fetches the registered usernames from the server.
+        Passwords never leave the server.
+        """
+        status, data = self.client.request("GET", "/users")
+        if not report_error(status, data):
+            return None
+        self.users = [User(username, None) for username in data["users"]]
+        return self.users
+
+    def authenticate(self, username, password):
+        status, data = self.client.request(
+            "POST", "/auth", {"username": username, "password": password})
+        return status == 200
+
+    def save_users(self):
+        # The server saves users as soon as they are added
+        pass
+
+    def add_user(self, user):
+        status, data = self.client.request(
+            "POST", "/users",
+            {"username": user.username, "password": user.password})
+        if report_error(status, data):
+            self.read_users()
+
+
+class RemoteReportGenerator:
+
+    # ReportJob waiting on the server, if any
+    job = None
+
+    def __init__(self, client):
+        self.client = client
+
+    def snapshot(self):
+        # The server generates from its own data
+        return self
+
+    def generate(self):
+        status, data = self.client.request("POST", "/reports")
+        if report_error(status, data) and self.job is None:
+            print("\nReports successfully generated: 'task_overview.txt'"
+                  " and 'user_overview.txt'")
+        return data
+
+    def write_aging_report(self):
+        """
+        Has the server write its aging report.
+        Returns the report text and figures, or None on error.
+        """
+        status, data = self.client.request("POST", "/reports/aging")
+        if not report_error(status, data):
+            return None
+        print("\nAging report generated: 'task_aging.txt' and "
+              "'task_aging.json'")
+        return data
+
+    def display_aging_report(self):
+        data = self.write_aging_report()
+        if data is not None:
+            print("\nTASK AGING\n" + "═" * 40)
+            print(data["aging_report_file"])
+
+    def display_approximate_statistics(self, sample_size=None):
+        # The server only produces exact reports
+        return False
+
+    def display_statistics(self):
+        """
+        Displays the task and user overview reports held by the server.
+        """
+        status, data = self.client.request("GET", "/reports")
+        if not report_error(status, data):
+            return
+        if data.get("task_overview_file") is None or \
+                data.get("user_overview_file") is None:
+            print("\nReports not found. Generating reports first...")
+            data = self.generate()
+
+        print("\nTASK OVERVIEW\n" + "═" * 40)
+        print(data.get("task_overview_file") or
+              "Could not find 'task_overview.txt'.")
+        print("\nUSER OVERVIEW\n" + "═" * 40)
+        print(data.get("user_overview_file") or
+              "Could not find 'user_overview.txt'.")
@@ -0,0 +1,273 @@
+"""
+task_index.py
+
+Defines the TaskFileIndex class.
+
+TaskFileIndex: A sidecar file (tasks.txt.idx) holding the byte offset
+of every task line in a task file. With it, task N is read straight
+from a memory map of the task file without loading the other tasks.
+
+The index is built once, extended when tasks are appended, and
+rebuilt if the task file was rewritten. Task numbers match positions
+in TaskManager.tasks: the header and invalid lines are not indexed.
+
+Command line:
+    python task_index.py tasks.txt 41       # print task 41 (0-based)
+"""
+
+import array
+import hashlib
+import json
+import locale
+import mmap
+import os
+import struct
+import sys
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from task_manager_build import Task, LazyTask  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+MAGIC = b"TASKIDX1"
+
+# Magic, indexed file size, file mtime (ns), digest of the bytes just
+# before the indexed size (used to tell an append from a rewrite)
+HEADER = struct.Struct("<8sQQ16s")
+
+TAIL_BYTES = 64
+
+
+class TaskFileIndex:
+
+    def __init__(self, task_file=config["task_file"]):
+        self.task_file = task_file
+        self.index_file = task_file + ".idx"
+        self.encoding = locale.getpreferredencoding(False)
+        self.offsets = array.array("Q")
+        self._indexed_size = 0
+        self._file = None
+        self._map = None
+
+    # ------------------------------------------------------------------
+    # Building and validation
+    # ------------------------------------------------------------------
+
+    def _tail_digest(self, data, size):
+        tail = data[max(0, size - TAIL_BYTES):size]
+        return hashlib.blake2b(tail, digest_size=16).digest()
+
+    def _scan(self, data, start, end):
+        """
+        Appends the offsets of the valid task lines between start and
+        end. Only complete (newline-terminated) lines are indexed,
+        except for a final line at the end of the file.
+        Returns the position scanning stopped at.
+        """
+        position = start
+        offsets = self.offsets
+        while position < end:
+            newline = data.find(b"\n", position, end)
+            line_end = end if newline == -1 else newline
+            line = data[position:line_end]
+            is_header = position == 0 and b"username" in line.lower()
+            if not is_header and line.count(b",") == 5:
+                offsets.append(position)
+            if newline == -1:
+                return end
+            position = newline + 1
+        return position
+
+    def _open_map(self):
+        self.close()
+        size = os.path.getsize(self.task_file)
+        if size == 0:
+            return None, 0
+        self._file = open(self.task_file, "rb")
+        self._map = mmap.mmap(self._file.fileno(), 0,
+                              access=mmap.ACCESS_READ)
+        return self._map, size
+
+    def _write(self, data, size, start_count=0):
+        """
+        Saves the header and the offsets from start_count onwards.
+        """
+        header = HEADER.pack(MAGIC, size,
+                             os.stat(self.task_file).st_mtime_ns,
+                             self._tail_digest(data, size)
+                             if data is not None else bytes(16))
+        mode = "r+b" if start_count and os.path.exists(self.index_file) \
+            else "wb"
+        with open(self.index_file, mode) as f:
+            f.write(header)
+            if mode == "r+b":
+                f.seek(HEADER.size + start_count * self.offsets.itemsize)
+                self.offsets[start_count:].tofile(f)
+                # Offsets beyond these are from before a shorter refresh
+                f.truncate()
+            else:
+                self.offsets.tofile(f)
+
+    def build(self):
+        """
+        Indexes the whole task file and saves the sidecar.
+        """
+        data, size = self._open_map()
+        self.offsets = array.array("Q")
+        if data is not None:
+            self._scan(data, 0, size)
+        self._indexed_size = size
+        self._write(data, size)
+        return self
+
+    def open(self):
+        """
+        Loads the sidecar, extending it if tasks were appended and
+        rebuilding it if the task file was otherwise changed.
+        """
+        try:
+            with open(self.index_file, "rb") as f:
+                magic, size, mtime, digest = HEADER.unpack(
+                    f.read(HEADER.size))
+                offsets = array.array("Q")
+                offsets.frombytes(f.read())
+        except (FileNotFoundError, struct.error):
+            return self.build()
+        if magic != MAGIC:
+            return self.build()
+
+        stat = os.stat(self.task_file)
+        data, current_size = self._open_map()
+        if current_size < size or (current_size == size and
+                                   stat.st_mtime_ns != mtime):
+            return self.build()
+        if size and (data is None or
+                     self._tail_digest(data, size) != digest):
+            return self.build()
+
+        self.offsets = offsets
+        self._indexed_size = size
+        if current_size > size:
+            self.refresh()
+        return self
+
+    def refresh(self):
+        """
+        Indexes lines appended to the task file since the last scan.
+        """
+        data, size = self._open_map()
+        if size < self._indexed_size:
+            return self.build()
+        if size == self._indexed_size:
+            return self
+        count = len(self.offsets)
+        start = self._indexed_size
+        # A previous last line without a newline may have been
+        # extended, so it is scanned again; it was only indexed if it
+        # already looked like a task
+        if count and start and data[start - 1:start] != b"\n":
+            start = data.rfind(b"\n", 0, start) + 1
+            if self.offsets[-1] >= start:
+                self.offsets.pop()
+                count -= 1
+        self._scan(data, start, size)
+        self._indexed_size = size
+        self._write(data, size, count)
+        return self
+
+    def invalidate(self):
+        """
+        Removes the sidecar, for example after the task file was
+        rewritten. It is rebuilt on next use.
+        """
+        self.close()
+        self.offsets = array.array("Q")
+        self._indexed_size = 0
+        try:
+            os.remove(self.index_file)
+        except FileNotFoundError:
+            pass
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    # ------------------------------------------------------------------
+    # Random access
+    # ------------------------------------------------------------------
+
+    def __len__(self):
+        return len(self.offsets)
+
+    def read_line(self, number):
+        """
+        Returns line number (0-based) as text, without the newline.
+        """
+        if self._map is None:
+            self._open_map()
+        start = self.offsets[number]
+        end = self._map.find(b"\n", start)
+        if end == -1:
+            end = len(self._map)
+        return self._map[start:end].decode(self.encoding).rstrip("\r")
+
+    def read_lines(self, start, stop):
+        """
+        Returns task lines start to stop - 1 (0-based) with one read.
+        """
+        if start >= stop:
+            return []
+        if self._map is None:
+            self._open_map()
+        begin = self.offsets[start]
+        end = self._map.find(b"\n", self.offsets[stop - 1])
+        if end == -1:
+            end = len(self._map)
+        lines = self._map[begin:end].decode(self.encoding).split("\n")
+        # Lines between indexed ones are invalid and were never indexed
+        return [line.rstrip("\r") for line in lines
+                if line.count(",") == 5]
+
+    def get(self, number, lazy=True):
+        """
+        Returns task number (0-based) read directly from the file.
+        """
+        line = self.read_line(number)
+        if lazy:
+            return LazyTask(line)
+        return Task(*(field.strip() for field in line.split(",")))
+
+    def page(self, start, count, lazy=True):
+        """
+        Returns up to count tasks starting at task number start.
+        """
+        return [self.get(number, lazy)
+                for number in range(start, min(start + count, len(self)))]
+
+
+def main():
+    if len(sys.argv) != 3:
+        print("Usage: python task_index.py TASK_FILE TASK_NUMBER")
+        sys.exit(1)
+    index = TaskFileIndex(os.path.join(INVOCATION_DIR, sys.argv[1])).open()
+    try:
+        print(index.get(int(sys.argv[2]), lazy=False))
+    except IndexError:
+        print(f"There are only {len(index)} tasks.")
+    finally:
+        index.close()
+
+
+if __name__ == "__main__":
+    main()
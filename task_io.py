@@ -0,0 +1,272 @@
+"""
+task_io.py
+
+Bulk import and export of tasks.
+
+import_tasks: Streams tasks from a CSV or JSONL file, validates them
+    and adds the whole batch with a single write to the task file.
+export_tasks: Streams tasks to a CSV or JSONL file.
+
+Command line:
+    python task_io.py import new_tasks.csv [--skip-invalid]
+    python task_io.py export tasks.jsonl
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sys
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from task_manager_build import Task, TaskManager, read_task_file  # noqa: E402
+from user_manager import UserManager  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+TASK_FIELDS = ("username", "title", "description", "date_add",
+               "date_due", "completed")
+
+FORMATS = {".csv": "csv", ".jsonl": "jsonl", ".ndjson": "jsonl"}
+
+
+def detect_format(path, fmt=None):
+    """
+    Returns 'csv' or 'jsonl', from fmt if given, else the file extension.
+    """
+    if fmt:
+        return fmt
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in FORMATS:
+        raise ValueError(f"Cannot tell the format of '{path}'. "
+                         f"Use a .csv or .jsonl file, or pass a format.")
+    return FORMATS[extension]
+
+
+def read_rows(file, fmt):
+    """
+    Yields (line number, row dictionary) pairs from an open CSV or
+    JSONL file. CSV files must start with a header row naming the
+    task fields.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(file, skipinitialspace=True)
+        for row in reader:
+            yield reader.line_num, row
+    else:
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    row = json.loads(line)
+                except json.JSONDecodeError as exc:
+                    row = exc
+                yield number, row
+
+
+class DateNormaliser:
+    """
+    Converts dates in either configured format to the display format.
+    Results are cached, since bulk files repeat the same few dates.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, value):
+        try:
+            return self._cache[value]
+        except KeyError:
+            pass
+        result = None
+        for date_format in (config["date_format_display"],
+                            config["date_format_input"]):
+            try:
+                parsed = datetime.datetime.strptime(value, date_format)
+            except ValueError:
+                continue
+            result = parsed.strftime(config["date_format_display"])
+            break
+        self._cache[value] = result
+        return result
+
+
+def row_to_task(row, user_manager, normalise_date, today):
+    """
+    Validates one imported row and returns a Task.
+    Raises ValueError describing the first problem found.
+    """
+    if not isinstance(row, dict):
+        raise ValueError("row is not a JSON object")
+
+    values = {}
+    for field in ("username", "title", "description"):
+        value = row.get(field)
+        if not isinstance(value, str) or not value.strip():
+            raise ValueError(f"missing {field}")
+        values[field] = value.strip()
+
+    if not user_manager.has_user(values["username"]):
+        raise ValueError(f"unknown user '{values['username']}'")
+
+    for field in ("date_add", "date_due"):
+        value = row.get(field)
+        if not value and field == "date_add":
+            values[field] = today
+            continue
+        date = normalise_date(value.strip()) \
+            if isinstance(value, str) else None
+        if date is None:
+            raise ValueError(f"invalid {field} '{value}'")
+        values[field] = date
+
+    completed = row.get("completed") or "No"
+    if not isinstance(completed, str) or \
+            completed.strip().lower() not in ("yes", "no"):
+        raise ValueError(f"completed must be Yes or No, "
+                         f"not '{completed}'")
+    values["completed"] = completed.strip().capitalize()
+
+    # The task file is comma-separated, one task per line
+    for field in ("title", "description"):
+        if any(character in values[field]
+               for character in (",", "\n", "\r")):
+            raise ValueError(f"{field} cannot contain commas "
+                             f"or line breaks")
+
+    return Task(**values)
+
+
+def import_tasks(path, task_manager, user_manager, fmt=None,
+                 skip_invalid=False):
+    """
+    Imports tasks from a CSV or JSONL file.
+
+    Every row is validated first. If any row is invalid nothing is
+    imported, unless skip_invalid is set, in which case the valid rows
+    are imported. The batch is written to the task file in one go.
+    Returns (number of tasks imported, list of error messages).
+    """
+    fmt = detect_format(path, fmt)
+    normalise_date = DateNormaliser()
+    today = datetime.date.today().strftime(config["date_format_display"])
+    tasks = []
+    errors = []
+
+    with open(path, "r", newline="", encoding="utf-8") as file:
+        for number, row in read_rows(file, fmt):
+            if isinstance(row, Exception):
+                errors.append(f"line {number}: invalid JSON ({row.msg})")
+                continue
+            try:
+                tasks.append(row_to_task(row, user_manager,
+                                         normalise_date, today))
+            except ValueError as exc:
+                errors.append(f"line {number}: {exc}")
+
+    if errors and not skip_invalid:
+        return 0, errors
+    with task_manager.locked():
+        task_manager.add_tasks(tasks)
+    return len(tasks), errors
+
+
+def export_tasks(tasks, path, fmt=None):
+    """
+    Writes tasks to a CSV or JSONL file one at a time, so any
+    iterable of tasks can be exported without building a copy.
+    Use '-' as the path to write to standard output.
+    Returns the number of tasks written.
+    """
+    fmt = detect_format(path, fmt) if path != "-" else (fmt or "jsonl")
+    file = sys.stdout if path == "-" else \
+        open(path, "w", newline="", encoding="utf-8")
+    count = 0
+    try:
+        if fmt == "csv":
+            writer = csv.writer(file)
+            writer.writerow(TASK_FIELDS)
+            for task in tasks:
+                writer.writerow([getattr(task, field)
+                                 for field in TASK_FIELDS])
+                count += 1
+        else:
+            for task in tasks:
+                file.write(json.dumps({field: getattr(task, field)
+                                       for field in TASK_FIELDS}) + "\n")
+                count += 1
+    finally:
+        if file is not sys.stdout:
+            file.close()
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import or export "
+                                                 "tasks.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser("import", help="import tasks "
+                                          "from a CSV or JSONL file")
+    import_parser.add_argument("path")
+    import_parser.add_argument("--format", choices=("csv", "jsonl"))
+    import_parser.add_argument("--skip-invalid", action="store_true",
+                               help="import the valid rows even if "
+                                    "some rows are invalid")
+
+    export_parser = subparsers.add_parser("export", help="export tasks "
+                                          "to a CSV or JSONL file")
+    export_parser.add_argument("path", help="output file, or - for "
+                                            "standard output")
+    export_parser.add_argument("--format", choices=("csv", "jsonl"))
+
+    parser.add_argument("--task-file",
+                        help=f"default: the app's {config['task_file']}")
+    parser.add_argument("--user-file",
+                        help=f"default: the app's {config['user_file']}")
+    args = parser.parse_args()
+    # Paths given are relative to where the command was run; the
+    # defaults are the app's own files, like the menus use
+    for name, default in (("path", None),
+                          ("task_file", config["task_file"]),
+                          ("user_file", config["user_file"])):
+        value = getattr(args, name)
+        if value is None:
+            setattr(args, name, default)
+        elif value != "-":
+            setattr(args, name, os.path.join(INVOCATION_DIR, value))
+
+    try:
+        if args.command == "import":
+            imported, errors = import_tasks(
+                args.path, TaskManager(args.task_file),
+                UserManager(args.user_file), args.format,
+                args.skip_invalid)
+            for error in errors[:20]:
+                print(error, file=sys.stderr)
+            if len(errors) > 20:
+                print(f"... and {len(errors) - 20} more errors",
+                      file=sys.stderr)
+            print(f"Imported {imported} tasks.", file=sys.stderr)
+            if errors and not args.skip_invalid:
+                print("Nothing was imported. Fix the errors or use "
+                      "--skip-invalid.", file=sys.stderr)
+                sys.exit(1)
+        else:
+            count = export_tasks(read_task_file(args.task_file),
+                                 args.path, args.format)
+            print(f"Exported {count} tasks.", file=sys.stderr)
+    except (OSError, ValueError) as exc:
+        print(f"Error: {exc}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
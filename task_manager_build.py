@@ -4,12 +4,25 @@ task_manager.py
 Defines Task and TaskManager classes.
 
 Task: Represents individual tasks with relevant attributes and methods.
+LazyTask: A Task read from a file line that decodes its fields
+on first access.
 TaskManager: Manages reading, writing, 
 and displaying tasks from tasks.txt.
 """
 
 import os
 import json
+import bisect
+import contextlib
+import datetime
+import functools
+import heapq
+import itertools
+import sys
+from change_feed import (TASK_ADDED, TASK_ARCHIVED, TASK_COMPLETED,
+                         TASK_DELETED, TASK_REASSIGNED, TASK_RESCHEDULED)
+from file_lock import FileLock
+from instrumentation import stats, timed
 
 # Ensure the current directory is set correctly
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -18,17 +31,38 @@ with open("config.json", "r") as f:
     config = json.load(f)
 
 
+def _no_interning(value):
+    return value
+
+
+# Usernames, dates and status repeat across many tasks, so one shared
+# copy of each is kept instead of a new string per task
+intern_string = sys.intern if config["intern_strings"] else _no_interning
+
+
+def use_interning(enabled):
+    """
+    Turns string interning for newly created tasks on or off.
+    """
+    global intern_string
+    intern_string = sys.intern if enabled else _no_interning
+
+
 class Task:
 
+    # No per-task __dict__, to keep large task lists small
+    __slots__ = ("username", "title", "description", "date_add",
+                 "date_due", "completed")
+
     def __init__(self, username, title, description, date_add, 
                  date_due, completed="No"):
         # Assign task details to object properties
-        self.username = username
+        self.username = intern_string(username)
         self.title = title
         self.description = description
-        self.date_add = date_add
-        self.date_due = date_due
-        self.completed = completed.capitalize()
+        self.date_add = intern_string(date_add)
+        self.date_due = intern_string(date_due)
+        self.completed = intern_string(completed.capitalize())
 
     def mark_complete(self):
         """
@@ -55,13 +89,172 @@ class Task:
                 f"\nCompleted: {self.completed}")
 
 
+@functools.lru_cache(maxsize=65536)
+def date_ordinal(date_string):
+    """
+    Returns the day number of a date in the display format, or None
+    if it cannot be parsed. Cached, as tasks share few distinct dates.
+    """
+    try:
+        return datetime.datetime.strptime(
+            date_string, config["date_format_display"]).toordinal()
+    except (TypeError, ValueError):
+        return None
+
+
+def to_ordinal(value):
+    """
+    Converts a date, datetime or date string (display or input
+    format) to a day number. Raises ValueError for invalid dates.
+    """
+    if isinstance(value, datetime.date):
+        return value.toordinal()
+    ordinal = date_ordinal(value)
+    if ordinal is None:
+        try:
+            ordinal = datetime.datetime.strptime(
+                value, config["date_format_input"]).toordinal()
+        except (TypeError, ValueError):
+            raise ValueError(f"Invalid date: {value!r}")
+    return ordinal
+
+
+def is_completed(task):
+    """
+    Returns True if the task is marked as completed.
+    """
+    return str(task.completed).lower() in ("true", "yes")
+
+
+def _date_sort_key(date_string):
+    # Tasks with invalid dates sort after all valid dates
+    ordinal = date_ordinal(date_string)
+    return (ordinal is None, ordinal or 0)
+
+
+# Fields accepted by TaskManager.query(order_by=...)
+SORT_KEYS = {
+    "username": lambda task: task.username,
+    "title": lambda task: task.title.lower(),
+    "date_add": lambda task: _date_sort_key(task.date_add),
+    "date_due": lambda task: _date_sort_key(task.date_due),
+    "completed": is_completed,
+}
+
+
+class LazyTask(Task):
+    """
+    A task that keeps the raw line it was read from. Fields are only
+    split out and stripped when first accessed, and a task that was
+    never changed is written back as its original line.
+    """
+
+    __slots__ = ("_line", "_modified")
+
+    def __init__(self, line):
+        # line is a task file line without its trailing newline
+        self._line = line
+        self._modified = False
+
+    def __getattr__(self, name):
+        # Only called while the field's slot is still empty
+        index = _FIELD_INDEX.get(name)
+        if index is None:
+            raise AttributeError(
+                f"'LazyTask' object has no attribute '{name}'")
+        value = self._line.split(",")[index].strip()
+        if name == "completed":
+            value = value.capitalize()
+        if name in _INTERNED_FIELDS:
+            value = intern_string(value)
+        object.__setattr__(self, name, value)
+        return value
+
+    def __setattr__(self, name, value):
+        if name in _FIELD_INDEX:
+            object.__setattr__(self, "_modified", True)
+        object.__setattr__(self, name, value)
+
+    def to_file_string(self):
+        if not self._modified:
+            return self._line
+        return super().to_file_string()
+
+
+# Field name -> position in a task file line
+_FIELD_INDEX = {name: index for index, name in enumerate(
+    ("username", "title", "description", "date_add", "date_due",
+     "completed"))}
+
+_INTERNED_FIELDS = frozenset(("username", "date_add", "date_due",
+                              "completed"))
+
+
+def read_task_file(file_path, lazy=False):
+    """
+    Yields a Task for each valid line of a task file, skipping the
+    header. Lines without exactly six fields are ignored.
+    With lazy=True, LazyTask records are returned instead.
+    """
+    with open(file_path, "r") as f:
+        for i, line in enumerate(f):
+            if i == 0 and "username" in line.lower():
+                continue  # skip header
+            if lazy:
+                if line.count(",") == 5:
+                    yield LazyTask(line.rstrip("\r\n"))
+                continue
+            fields = [field.strip()
+                      for field in line.strip().split(",")]
+            if len(fields) == 6:
+                yield Task(*fields)
+
+
 class TaskManager:
 
-    def __init__(self, file_path=config["task_file"]):
+    # Lookup indexes used by query(), rebuilt when self.tasks changes
+    _indexed_list = None
+    _indexed_count = 0
+    _by_user = None
+    _by_status = None
+    _by_due = None
+    # Access path chosen by the most recent query
+    last_plan = None
+    # Compressed store of old completed tasks, if any
+    archive = None
+    # Sidecar line-offset index of the task file, once opened
+    file_index = None
+    # True when self.tasks is a PagedTaskList (see task_cache.py)
+    paged = False
+    # ChangeFeed that changes are published to, if any
+    change_feed = None
+    # Events for single-task changes, published once they are saved
+    _unsaved_events = ()
+    # Number of changes made to the tasks, recorded in reports
+    version = 0
+    # State of the task file when this process last held its lock
+    # (see locked())
+    _file_state = None
+
+    def __init__(self, file_path=config["task_file"],
+                 lazy=config["lazy_tasks"],
+                 cache_budget=config["task_cache_budget"]):
+        # Imported here as task_archive itself imports Task
+        from task_archive import TaskArchive
         self.file_path = file_path
+        # Load LazyTask records instead of fully decoded tasks
+        self.lazy = lazy
+        # With a budget, at most about that many tasks are held in
+        # memory and the rest are read from the file when used
+        self.cache_budget = cache_budget
         self.tasks = []
+        self.archive = TaskArchive(file_path)
+        # Taken before loading, so the first locked() only reloads if
+        # the file changed since
+        self._file_state = FileLock(file_path).peek()
         self.load_tasks()
 
+    @timed("TaskManager.load_tasks")
     def load_tasks(self):
         """
         Reads tasks from 'tasks.txt' and loads them into self.tasks.
@@ -69,43 +262,505 @@ class TaskManager:
         date_add, date_due, completed
         """
         try:
-            with open(self.file_path, "r") as f:
-                for i, line in enumerate(f):
-                    if i == 0 and "username" in line.lower():
-                        continue  # skip header
-                    fields = [field.strip() 
-                          for field in line.strip().split(",")]
-                    if len(fields) == 6:
-                        self.tasks.append(Task(*fields))
+            if self.cache_budget > 0:
+                self._load_paged()
+                return
+            count = len(self.tasks)
+            self.tasks.extend(read_task_file(self.file_path, self.lazy))
         except FileNotFoundError:
             # Handle missing file gracefully
             print("tasks.txt not found")
+            return
+        if stats.enabled:
+            stats.count("TaskManager.load_tasks",
+                        rows=len(self.tasks) - count,
+                        bytes_read=os.path.getsize(self.file_path))
+
+    def reload_tasks(self):
+        """
+        Replaces the tasks in memory with those in the task file.
+        The list is updated in place, as reports hold a reference to
+        it.
+        """
+        if self.paged:
+            self.tasks.reload()
+        else:
+            if self.file_index is not None:
+                self.file_index.close()
+                self.file_index = None
+            del self.tasks[:]
+            self.load_tasks()
+        self._invalidate_indexes()
 
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Holds the task file's lock for changes shared with other
+        processes, so none of them saves over another's work. Tasks
+        saved by another process since this one last held the lock
+        are reloaded first.
+        """
+        with FileLock(self.file_path) as lock:
+            if lock.state() != self._file_state:
+                self.reload_tasks()
+                self.version += 1
+            version = self.version
+            try:
+                yield self
+            finally:
+                if self.version != version:
+                    lock.changed()
+            self._file_state = lock.state()
+
+    def _load_paged(self):
+        # Imported here as task_cache itself imports LazyTask
+        from task_cache import PagedTaskList
+        if not os.path.exists(self.file_path):
+            raise FileNotFoundError(self.file_path)
+        self.tasks = PagedTaskList(self.file_path, self.cache_budget)
+        # The cache reads through the same offset index
+        self.file_index = self.tasks.index
+        self.paged = True
+
+    @timed("TaskManager.save_tasks")
     def save_tasks(self):
         """
         Saves all tasks to 'tasks.txt', overwriting the file.
         """
-        with open(self.file_path, "w") as f:
-            f.write("username, title, description, date_add, "
-                    "date_due, Completed\n")
-            for task in self.tasks:
-                f.write(task.to_file_string() + "\n")
+        header = ("username, title, description, date_add, "
+                  "date_due, Completed\n")
+        if self.paged:
+            self.tasks.save(header)
+        else:
+            with open(self.file_path, "w") as f:
+                f.write(header)
+                for task in self.tasks:
+                    f.write(task.to_file_string() + "\n")
+            self._invalidate_file_index()
+        # Tasks may have been edited in place before saving
+        self._invalidate_indexes()
+        self.version += 1
+        if self._unsaved_events:
+            for kind, data in self._unsaved_events:
+                self.change_feed.publish(kind, **data)
+            self._unsaved_events = []
+        if stats.enabled:
+            stats.count("TaskManager.save_tasks", rows=len(self.tasks),
+                        bytes_written=os.path.getsize(self.file_path),
+                        rewrites=1, path=self.file_path)
 
+    @timed("TaskManager.add_task")
     def add_task(self, task):
         """
         Adds a new task to the list and saves it to the file.
         """
-        self.tasks.append(task)
+        if not self.paged:
+            self.tasks.append(task)
+            self._index_appended(task)
+        line = task.to_file_string() + "\n"
+        with open(self.file_path, "a") as f:
+            f.write(line)
+        if self.paged:
+            self.tasks.append_written([task])
+        else:
+            self._refresh_file_index()
+        self.version += 1
+        self._publish(TASK_ADDED, [task])
+        if stats.enabled:
+            stats.count("TaskManager.add_task", rows=1,
+                        bytes_written=len(line.encode()),
+                        path=self.file_path)
+
+    @timed("TaskManager.add_tasks")
+    def add_tasks(self, tasks):
+        """
+        Adds a batch of tasks and appends them to the file
+        in a single write.
+        """
+        tasks = list(tasks)
+        if not tasks:
+            return
+        if not self.paged:
+            self.tasks.extend(tasks)
         with open(self.file_path, "a") as f:
-            f.write(task.to_file_string() + "\n") 
+            data = "".join(task.to_file_string() + "\n"
+                           for task in tasks)
+            f.write(data)
+        if self.paged:
+            self.tasks.append_written(tasks)
+        else:
+            self._refresh_file_index()
+        self.version += 1
+        self._publish(TASK_ADDED, tasks)
+        if stats.enabled:
+            stats.count("TaskManager.add_tasks", rows=len(tasks),
+                        bytes_written=len(data.encode()),
+                        path=self.file_path)
 
+    @timed("TaskManager.delete_task")
     def delete_task(self, task):
         """
         Deletes a task at the given index from the task list 
-        and updates the file.
+        and updates the file. Returns the deleted task.
+        """
+        deleted = self.tasks.pop(task)
+        self.save_tasks()
+        self._publish(TASK_DELETED, [deleted], position=task)
+        return deleted
+
+    def complete_task(self, task):
+        """
+        Marks one task as complete. The change is published when
+        save_tasks() is next called.
+        """
+        task.mark_complete()
+        self._stage(TASK_COMPLETED, task)
+
+    def reassign_task(self, task, username):
+        """
+        Assigns one task to another user. The change is published when
+        save_tasks() is next called.
+        """
+        previous, task.username = task.username, username
+        self._stage(TASK_REASSIGNED, task, from_user=previous)
+
+    def reschedule_task(self, task, date_due):
+        """
+        Changes one task's due date. The change is published when
+        save_tasks() is next called.
+        """
+        previous, task.date_due = task.date_due, date_due
+        self._stage(TASK_RESCHEDULED, task, previous_due=previous)
+
+    @timed("TaskManager.reassign_tasks")
+    def reassign_tasks(self, from_user, to_user, completed=None,
+                       due_before=None, due_after=None, text=None):
+        """
+        Reassigns from_user's tasks matching the filters (see query)
+        to to_user, then saves once. Returns the number reassigned.
         """
-        self.tasks.pop(task)
+        selected = list(self.query(user=from_user, completed=completed,
+                                   due_before=due_before,
+                                   due_after=due_after, text=text))
+        for task in selected:
+            task.username = to_user
+        if selected:
+            self.save_tasks()
+            self._publish(TASK_REASSIGNED, selected, from_user=from_user)
+        return len(selected)
+
+    @timed("TaskManager.complete_tasks")
+    def complete_tasks(self, user=None, due_before=None, due_after=None,
+                       text=None):
+        """
+        Marks every open task matching the filters (see query) as
+        complete, then saves once. Returns the number completed.
+        """
+        selected = list(self.query(user=user, completed=False,
+                                   due_before=due_before,
+                                   due_after=due_after, text=text))
+        for task in selected:
+            task.mark_complete()
+        if selected:
+            self.save_tasks()
+            self._publish(TASK_COMPLETED, selected)
+        return len(selected)
+
+    @timed("TaskManager.archive_completed")
+    def archive_completed(self, max_age_days=config["archive_after_days"],
+                          today=None):
+        """
+        Moves completed tasks due at least max_age_days ago into the
+        archive and rewrites the task file without them.
+        Returns the number of tasks archived.
+
+        Tasks are written to the archive before the task file is saved,
+        so an interruption can leave a task in both, but never in neither.
+        """
+        cutoff = (today or datetime.date.today()).toordinal() - max_age_days
+        keep = []
+        move = []
+        moved_positions = []
+        for position, task in enumerate(self.tasks):
+            due = date_ordinal(task.date_due)
+            # Same test as the reports, so their totals do not change
+            if task.completed.lower() == "yes" and due is not None \
+                    and due <= cutoff:
+                move.append(task)
+                moved_positions.append(position)
+            elif not self.paged:
+                keep.append(task)
+        if not move:
+            return 0
+        self.archive.append(move)
+        if self.paged:
+            self.tasks.delete_many(moved_positions)
+        else:
+            # Update in place, as reports hold a reference to this list
+            self.tasks[:] = keep
         self.save_tasks()
+        self._publish(TASK_ARCHIVED, move)
+        return len(move)
+
+    # ------------------------------------------------------------------
+    # Change events
+    # ------------------------------------------------------------------
+
+    def _event_data(self, task, extra):
+        data = {"task_file": self.file_path}
+        data.update((name, getattr(task, name)) for name in _FIELD_INDEX)
+        data.update(extra)
+        return data
+
+    def _publish(self, kind, tasks, **extra):
+        if self.change_feed is not None:
+            self.change_feed.publish_many(
+                kind, [self._event_data(task, extra) for task in tasks])
+
+    def _stage(self, kind, task, **extra):
+        self.version += 1
+        # The query indexes hold the changed field's old value
+        self._invalidate_indexes()
+        if self.change_feed is not None:
+            if not self._unsaved_events:
+                self._unsaved_events = []
+            self._unsaved_events.append(
+                (kind, self._event_data(task, extra)))
+
+    # ------------------------------------------------------------------
+    # Querying
+    # ------------------------------------------------------------------
+
+    def task_file_index(self):
+        """
+        Returns the line-offset index of the task file, building the
+        sidecar file on first use.
+        """
+        if self.file_index is None:
+            # Imported here as task_index itself imports Task
+            from task_index import TaskFileIndex
+            self.file_index = TaskFileIndex(self.file_path).open()
+        return self.file_index
+
+    def _refresh_file_index(self):
+        # Only index appended lines if the index is in use
+        if self.file_index is not None:
+            self.file_index.refresh()
+
+    def _invalidate_file_index(self):
+        if self.file_index is not None:
+            self.file_index.invalidate()
+            self.file_index = None
+        elif os.path.exists(self.file_path + ".idx"):
+            os.remove(self.file_path + ".idx")
+
+    def locate_task(self, task):
+        """
+        Returns the position of task in self.tasks or, if the tasks
+        were reloaded since it was read, of a task with the same
+        fields. Returns None if it is no longer there.
+        """
+        line = task.to_file_string()
+        match = None
+        for position, candidate in self.select(user=task.username):
+            if candidate is task:
+                return position
+            if match is None and candidate.to_file_string() == line:
+                match = position
+        return match
+
+    def fetch_task(self, number):
+        """
+        Reads task number (0-based) straight from the task file.
+        """
+        return self.task_file_index().get(number, self.lazy)
+
+    def task_page(self, start, count):
+        """
+        Reads up to count tasks from the task file, starting at task
+        number start, without touching the rest of the file.
+        """
+        return self.task_file_index().page(start, count, self.lazy)
+
+    def _invalidate_indexes(self):
+        self._indexed_list = None
+
+    def _current_indexes(self):
+        """
+        Returns the username and completion indexes, rebuilding them
+        if the task list was replaced or has changed size.
+        """
+        if self._indexed_list is not self.tasks or \
+                self._indexed_count != len(self.tasks):
+            by_user = {}
+            by_status = {True: [], False: []}
+            for position, task in enumerate(self.tasks):
+                by_user.setdefault(task.username, []).append(position)
+                by_status[is_completed(task)].append(position)
+            self._by_user = by_user
+            self._by_status = by_status
+            self._by_due = None
+            self._indexed_list = self.tasks
+            self._indexed_count = len(self.tasks)
+        return self._by_user, self._by_status
+
+    def _due_index(self):
+        """
+        Returns (due date ordinal, position) pairs sorted by due date,
+        for tasks with a valid due date. Built on first use.
+        """
+        self._current_indexes()
+        if self._by_due is None:
+            pairs = []
+            for position, task in enumerate(self.tasks):
+                ordinal = date_ordinal(task.date_due)
+                if ordinal is not None:
+                    pairs.append((ordinal, position))
+            pairs.sort()
+            self._by_due = pairs
+        return self._by_due
+
+    def _index_appended(self, task):
+        """
+        Adds a task just appended to self.tasks to the indexes,
+        if they are up to date.
+        """
+        if self._indexed_list is not self.tasks or \
+                self._indexed_count != len(self.tasks) - 1:
+            self._invalidate_indexes()
+            return
+        position = len(self.tasks) - 1
+        self._by_user.setdefault(task.username, []).append(position)
+        self._by_status[is_completed(task)].append(position)
+        if self._by_due is not None:
+            ordinal = date_ordinal(task.date_due)
+            if ordinal is not None:
+                bisect.insort(self._by_due, (ordinal, position))
+        self._indexed_count += 1
+
+    def _plan(self, user, completed, before, after):
+        """
+        Picks the access path that yields the fewest candidate tasks.
+        Returns (candidate positions in file order, path name).
+        """
+        total = len(self.tasks)
+        # Indexes over a paged list would read every task into memory
+        if self.paged or (user is None and completed is None and
+                          before is None and after is None):
+            return range(total), "scan"
+
+        by_user, by_status = self._current_indexes()
+        options = [(total, lambda: range(total), "scan")]
+        if user is not None:
+            positions = by_user.get(user, [])
+            options.append((len(positions),
+                            lambda positions=positions: positions, "user"))
+        if completed is not None:
+            positions = by_status[bool(completed)]
+            options.append((len(positions),
+                            lambda positions=positions: positions,
+                            "status"))
+
+        # Sorting by due date costs more than a scan the first time,
+        # so only build that index when nothing selective is available
+        if (before is not None or after is not None) and \
+                (self._by_due is not None or
+                 min(option[0] for option in options) > total // 4):
+            by_due = self._due_index()
+            low = bisect.bisect_right(by_due, (after, total)) \
+                if after is not None else 0
+            high = bisect.bisect_left(by_due, (before, -1)) \
+                if before is not None else len(by_due)
+            high = max(low, high)
+            options.append((high - low, lambda: sorted(
+                position for _, position in by_due[low:high]), "due"))
+
+        cost, candidates, path = min(options, key=lambda option: option[0])
+        return candidates(), path
+
+    def select(self, user=None, completed=None, due_before=None,
+               due_after=None, text=None, order_by=None, limit=None,
+               offset=0):
+        """
+        Like query(), but yields (position, task) pairs, where position
+        is the task's index in self.tasks.
+        """
+        if order_by is not None and order_by.lstrip("-") not in SORT_KEYS:
+            raise ValueError(f"Cannot order by {order_by!r}. Choose "
+                             f"from: {', '.join(SORT_KEYS)}")
+        before = to_ordinal(due_before) if due_before is not None else None
+        after = to_ordinal(due_after) if due_after is not None else None
+        needle = text.lower() if text else None
+
+        candidates, self.last_plan = self._plan(user, completed,
+                                                before, after)
+        if stats.enabled:
+            stats.count("TaskManager.query", rows=len(candidates))
+        tasks = self.tasks
+        # A scan iterates the list itself, which a paged list can do
+        # a page at a time
+        scanned = enumerate(tasks) if self.last_plan == "scan" else \
+            ((position, tasks[position]) for position in candidates)
+
+        def matches():
+            for position, task in scanned:
+                if user is not None and task.username != user:
+                    continue
+                if completed is not None and \
+                        is_completed(task) != bool(completed):
+                    continue
+                if before is not None or after is not None:
+                    due = date_ordinal(task.date_due)
+                    if due is None or \
+                            (before is not None and due >= before) or \
+                            (after is not None and due <= after):
+                        continue
+                if needle and needle not in task.title.lower() and \
+                        needle not in task.description.lower():
+                    continue
+                yield position, task
+
+        if order_by is None:
+            stop = offset + limit if limit is not None else None
+            return itertools.islice(matches(), offset, stop)
+
+        descending = order_by.startswith("-")
+        sort_key = SORT_KEYS[order_by.lstrip("-")]
+
+        def key(pair):
+            return sort_key(pair[1])
+
+        if limit is not None:
+            # Keep only the top offset + limit tasks in a heap
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            ordered = pick(offset + limit, matches(), key=key)
+        else:
+            ordered = sorted(matches(), key=key, reverse=descending)
+        return iter(ordered[offset:])
+
+    def query(self, user=None, completed=None, due_before=None,
+              due_after=None, text=None, order_by=None, limit=None,
+              offset=0):
+        """
+        Returns an iterator over the tasks matching every given filter.
+
+        user       : only tasks assigned to this username
+        completed  : True for completed tasks, False for open ones
+        due_before : only tasks due before this date (exclusive)
+        due_after  : only tasks due after this date (exclusive)
+        text       : case-insensitive text in the title or description
+        order_by   : field to sort by, prefixed with '-' for descending
+                     (username, title, date_add, date_due, completed)
+        limit      : return at most this many tasks
+        offset     : skip this many matching tasks first
+
+        Dates may be date objects or strings in either configured
+        format. Tasks are returned in file order unless order_by is
+        given.
+        """
+        return (task for _, task in self.select(
+            user, completed, due_before, due_after, text, order_by,
+            limit, offset))
 
     def display_task(self, task, index=None):
         """
@@ -122,32 +777,38 @@ class TaskManager:
         print(f"Completed   : {task.completed}")
         print("-" * 40)
 
+    @timed("TaskManager.view_all_tasks")
     def view_all_tasks(self):
         """
         Displays all tasks in the system.
         """
-        for index, task in enumerate(self.tasks, start=1):
+        for index, task in enumerate(self.query(), start=1):
             self.display_task(task, index)
 
+    @timed("TaskManager.view_user_tasks")
     def view_user_tasks(self, username):
         """
         Displays all tasks assigned to a specific user.
         """
-        user_tasks = [task for task in self.tasks 
-                      if task.username == username]
+        user_tasks = list(self.query(user=username))
         if not user_tasks:
             print(f"No tasks found for {username}")
         for index, task in enumerate(user_tasks, start=1):
             self.display_task(task, index)
 
+    @timed("TaskManager.view_completed_tasks")
     def view_completed_tasks(self):
         """
         Displays all tasks marked as completed.
         """
         completed_found = False  
-        for index, task in enumerate(self.tasks, start=1):
-            if str(task.completed).lower() in ['true', 'yes']:
+        for position, task in self.select(completed=True):
+            completed_found = True
+            self.display_task(task, position + 1)
+        if self.archive is not None:
+            for number, task in enumerate(self.archive.iter_tasks(),
+                                          start=1):
                 completed_found = True
-                self.display_task(task, index)
+                self.display_task(task, f"A{number} (archived)")
         if not completed_found:
             print("No completed tasks found.")
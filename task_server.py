@@ -0,0 +1,561 @@
+"""
+task_server.py
+
+Defines the TaskServer class.
+
+TaskServer: Wraps TaskManager, UserManager and ReportGenerator in a
+local asyncio server so many terminal sessions share one in-memory
+store. Requests and responses are JSON over HTTP/1.1. All changes go
+through a single writer, so the data files are only ever written by
+one coroutine at a time. The writer holds the files' locks for each
+change, reloading first what menu sessions saved in the meantime.
+
+Run with: python task_server.py [--host HOST] [--port PORT]
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import datetime
+import json
+import os
+import urllib.parse
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from change_feed import ChangeFeed  # noqa: E402
+from task_manager_build import Task, TaskManager, to_ordinal  # noqa: E402
+from user_manager import User, UserManager  # noqa: E402
+from report_generator import ReportGenerator  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+# Largest request body accepted, in bytes
+MAX_BODY_SIZE = 1024 * 1024
+
+STATUS_TEXT = {
+    200: "OK",
+    201: "Created",
+    400: "Bad Request",
+    401: "Unauthorized",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    409: "Conflict",
+    413: "Payload Too Large",
+    500: "Internal Server Error",
+}
+
+TASK_FIELDS = ("username", "title", "description", "date_add",
+               "date_due", "completed")
+
+
+class RequestError(Exception):
+    """
+    Raised by request handlers to send an error status to the client.
+    """
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+def task_to_dict(task, index):
+    """
+    Returns a JSON-ready dictionary for a task at the given position.
+    """
+    return {
+        "index": index,
+        "username": task.username,
+        "title": task.title,
+        "description": task.description,
+        "date_add": task.date_add,
+        "date_due": task.date_due,
+        "completed": task.completed,
+    }
+
+
+def check_field(name, value):
+    """
+    Validates a single task or user field received from a client.
+    Fields are stored comma-separated, one record per line, so commas
+    and line breaks cannot be stored.
+    """
+    if not isinstance(value, str) or not value.strip():
+        raise RequestError(400, f"'{name}' must be a non-empty string")
+    if "," in value or "\n" in value or "\r" in value:
+        raise RequestError(400, f"'{name}' cannot contain commas "
+                                f"or line breaks")
+    return value.strip()
+
+
+def check_date(name, value):
+    """
+    Validates a date field against the configured display format.
+    """
+    value = check_field(name, value)
+    try:
+        datetime.datetime.strptime(value, config["date_format_display"])
+    except ValueError:
+        raise RequestError(400, f"'{name}' must use the format "
+                                f"{config['date_format_display']}")
+    return value
+
+
+class TaskServer:
+
+    def __init__(self, task_manager, user_manager, report_gen,
+                 host=config["server_host"], port=config["server_port"]):
+        self.task_manager = task_manager
+        self.user_manager = user_manager
+        self.report_gen = report_gen
+        self.host = host
+        self.port = port
+        # Every change is queued and applied by one writer coroutine
+        self._write_queue = None
+        # File I/O runs on this thread so the event loop stays free
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="task-writer")
+        self._routes = [
+            ("GET", ("health",), self.handle_health),
+            ("POST", ("auth",), self.handle_auth),
+            ("GET", ("users",), self.handle_list_users),
+            ("POST", ("users",), self.handle_add_user),
+            ("GET", ("tasks",), self.handle_list_tasks),
+            ("POST", ("tasks",), self.handle_add_task),
+            ("PATCH", ("tasks", None), self.handle_update_task),
+            ("DELETE", ("tasks", None), self.handle_delete_task),
+            ("POST", ("tasks", None, "complete"),
+             self.handle_complete_task),
+            ("POST", ("tasks", "reassign"), self.handle_reassign_tasks),
+            ("POST", ("tasks", "complete"), self.handle_complete_tasks),
+            ("POST", ("tasks", "archive"), self.handle_archive_tasks),
+            ("GET", ("reports",), self.handle_get_reports),
+            ("POST", ("reports",), self.handle_generate_reports),
+            ("POST", ("reports", "aging"), self.handle_aging_report),
+        ]
+
+    # ------------------------------------------------------------------
+    # Server lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """
+        Starts listening and launches the single writer coroutine.
+        Returns the asyncio server object.
+        """
+        self._write_queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._write_loop())
+        return await asyncio.start_server(self.handle_connection,
+                                          self.host, self.port,
+                                          backlog=4096)
+
+    async def serve_forever(self):
+        """
+        Runs the server until it is cancelled.
+        """
+        server = await self.start()
+        address = server.sockets[0].getsockname()
+        print(f"Task server listening on http://{address[0]}:"
+              f"{address[1]}")
+        async with server:
+            await server.serve_forever()
+
+    async def _write_loop(self):
+        """
+        Applies queued changes one at a time, in arrival order.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            operation, args, future = await self._write_queue.get()
+            try:
+                result = await loop.run_in_executor(
+                    self._executor, self._locked, operation, args)
+            except Exception as exc:
+                if not future.cancelled():
+                    future.set_exception(exc)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+
+    async def submit(self, operation, *args):
+        """
+        Queues a change for the writer and waits for its result.
+        """
+        future = asyncio.get_running_loop().create_future()
+        await self._write_queue.put((operation, args, future))
+        return await future
+
+    # ------------------------------------------------------------------
+    # HTTP handling
+    # ------------------------------------------------------------------
+
+    async def handle_connection(self, reader, writer):
+        """
+        Serves HTTP requests on one connection until the client
+        closes it or asks for the connection to be closed.
+        """
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                method, target, version = \
+                    request_line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get("content-length", 0))
+                if length > MAX_BODY_SIZE:
+                    status, payload = 413, {"error": "Request too large"}
+                    body = None
+                else:
+                    body = await reader.readexactly(length) \
+                        if length else b""
+                    status, payload = await self.dispatch(method, target,
+                                                          body)
+
+                keep_alive = (version == "HTTP/1.1" and
+                              headers.get("connection", "").lower()
+                              != "close" and body is not None)
+                data = json.dumps(payload).encode("utf-8")
+                writer.write(
+                    f"{version} {status} {STATUS_TEXT[status]}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}"
+                    f"\r\n\r\n".encode("latin-1") + data)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, ValueError, asyncio.IncompleteReadError):
+            # Malformed request or client went away mid-request
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, target, body):
+        """
+        Routes a request to its handler.
+        Returns a (status, payload) pair.
+        """
+        url = urllib.parse.urlsplit(target)
+        parts = tuple(part for part in url.path.split("/") if part)
+        query = dict(urllib.parse.parse_qsl(url.query))
+
+        path_found = False
+        for route_method, pattern, handler in self._routes:
+            if len(pattern) != len(parts) or not all(
+                    p is None or p == part
+                    for p, part in zip(pattern, parts)):
+                continue
+            path_found = True
+            if route_method != method:
+                continue
+            params = [part for p, part in zip(pattern, parts) if p is None]
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise RequestError(400, "Request body must be "
+                                            "a JSON object")
+                return await handler(data, query, *params)
+            except json.JSONDecodeError:
+                return 400, {"error": "Request body is not valid JSON"}
+            except RequestError as exc:
+                return exc.status, {"error": exc.message}
+            except Exception as exc:
+                return 500, {"error": str(exc)}
+
+        if path_found:
+            return 405, {"error": f"{method} not allowed on {url.path}"}
+        return 404, {"error": f"No such endpoint: {url.path}"}
+
+    # ------------------------------------------------------------------
+    # Request handlers
+    # ------------------------------------------------------------------
+
+    async def handle_health(self, data, query):
+        return 200, {"ok": True}
+
+    async def handle_auth(self, data, query):
+        username = data.get("username", "")
+        password = data.get("password", "")
+        if not self.user_manager.authenticate(username, password):
+            raise RequestError(401, "Invalid username or password")
+        return 200, {"ok": True,
+                     "admin": username == config["admin_username"]}
+
+    async def handle_list_users(self, data, query):
+        users = list(self.user_manager.users)
+        return 200, {"users": [user.username for user in users]}
+
+    async def handle_add_user(self, data, query):
+        username = check_field("username", data.get("username"))
+        password = check_field("password", data.get("password"))
+        created = await self.submit(self._add_user, username, password)
+        if not created:
+            raise RequestError(409, "That username already exists")
+        return 201, {"username": username}
+
+    async def handle_list_tasks(self, data, query):
+        completed = query.get("completed")
+        if completed is not None:
+            if completed.lower() not in ("yes", "no"):
+                raise RequestError(400, "'completed' must be yes or no")
+            completed = completed.lower() == "yes"
+        # On the writer's thread, so a long scan neither blocks other
+        # clients nor runs while a change is half made
+        tasks = await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._list_tasks, query.get("user"),
+            completed)
+        return 200, {"tasks": tasks}
+
+    async def handle_add_task(self, data, query):
+        fields = {name: check_field(name, data.get(name))
+                  for name in ("username", "title", "description")}
+        for name in ("date_add", "date_due"):
+            fields[name] = check_date(name, data.get(name))
+        fields["completed"] = check_field("completed",
+                                          data.get("completed", "No"))
+        if not any(user.username == fields["username"]
+                   for user in self.user_manager.users):
+            raise RequestError(400, f"Unknown user: {fields['username']}")
+        index = await self.submit(self._add_task, Task(**fields))
+        return 201, {"index": index}
+
+    async def handle_update_task(self, data, query, index):
+        changes = {}
+        if "username" in data:
+            changes["username"] = check_field("username",
+                                              data["username"])
+        if "date_due" in data:
+            changes["date_due"] = check_date("date_due", data["date_due"])
+        if "completed" in data:
+            changes["completed"] = check_field(
+                "completed", data["completed"]).capitalize()
+            if changes["completed"] not in ("Yes", "No"):
+                raise RequestError(400, "'completed' must be Yes or No")
+        task = await self.submit(self._update_task, self.parse_index(index),
+                                 data.get("expect"), changes)
+        return 200, {"task": task}
+
+    async def handle_complete_task(self, data, query, index):
+        task = await self.submit(self._update_task, self.parse_index(index),
+                                 data.get("expect"), {"completed": "Yes"})
+        return 200, {"task": task}
+
+    async def handle_delete_task(self, data, query, index):
+        task = await self.submit(self._delete_task, self.parse_index(index),
+                                 data.get("expect"))
+        return 200, {"task": task}
+
+    async def handle_reassign_tasks(self, data, query):
+        from_user = check_field("from_user", data.get("from_user"))
+        to_user = check_field("to_user", data.get("to_user"))
+        if not any(user.username == to_user
+                   for user in self.user_manager.users):
+            raise RequestError(400, f"Unknown user: {to_user}")
+        filters = self.parse_filters(data, ("completed", "due_before",
+                                            "due_after", "text"))
+        count = await self.submit(self.task_manager.reassign_tasks,
+                                  from_user, to_user, *filters)
+        return 200, {"count": count}
+
+    async def handle_complete_tasks(self, data, query):
+        filters = self.parse_filters(data, ("user", "due_before",
+                                            "due_after", "text"))
+        count = await self.submit(self.task_manager.complete_tasks,
+                                  *filters)
+        return 200, {"count": count}
+
+    async def handle_archive_tasks(self, data, query):
+        days = data.get("max_age_days", config["archive_after_days"])
+        if not isinstance(days, int) or days < 0:
+            raise RequestError(400, "'max_age_days' must be a "
+                                    "non-negative integer")
+        count = await self.submit(self.task_manager.archive_completed,
+                                  days)
+        return 200, {"count": count}
+
+    def parse_filters(self, data, names):
+        """
+        Validates bulk operation filters, returned in the given order.
+        """
+        filters = []
+        for name in names:
+            value = data.get(name)
+            if value is not None:
+                if name == "completed" and not isinstance(value, bool):
+                    raise RequestError(400, "'completed' must be "
+                                            "true or false")
+                if name in ("due_before", "due_after"):
+                    try:
+                        to_ordinal(value)
+                    except ValueError:
+                        raise RequestError(400, f"Invalid date for "
+                                                f"'{name}'")
+                if name in ("user", "text") and not isinstance(value, str):
+                    raise RequestError(400, f"'{name}' must be a string")
+            filters.append(value)
+        return filters
+
+    async def handle_get_reports(self, data, query):
+        reports = {}
+        for key in ("task_overview_file", "user_overview_file"):
+            try:
+                with open(config[key], "r") as file:
+                    reports[key] = file.read()
+            except FileNotFoundError:
+                reports[key] = None
+        return 200, reports
+
+    async def handle_generate_reports(self, data, query):
+        await self.submit(self.report_gen.generate)
+        return await self.handle_get_reports(data, query)
+
+    async def handle_aging_report(self, data, query):
+        aging = await self.submit(self.report_gen.write_aging_report)
+        with open(config["aging_report_file"], "r") as file:
+            return 200, {"aging": aging,
+                         "aging_report_file": file.read()}
+
+    def parse_index(self, value):
+        try:
+            return int(value)
+        except ValueError:
+            raise RequestError(400, f"Invalid task index: {value}")
+
+    # ------------------------------------------------------------------
+    # Writer operations (run one at a time on the writer thread)
+    # ------------------------------------------------------------------
+
+    def _locked(self, operation, args):
+        """
+        Runs one writer operation holding the task and user files'
+        locks, so changes saved by menu sessions are reloaded first
+        and not written over.
+        """
+        # Always tasks before users; other sessions take only one
+        with self.task_manager.locked(), self.user_manager.locked():
+            return operation(*args)
+
+    def _find_task(self, index, expect):
+        """
+        Returns the task at index, checking it still matches the
+        version the client last saw.
+        """
+        if not 0 <= index < len(self.task_manager.tasks):
+            raise RequestError(404, f"No task at index {index}")
+        task = self.task_manager.tasks[index]
+        if expect is not None and task.to_file_string() != expect:
+            raise RequestError(409, "Task was changed by another session")
+        return task
+
+    def _list_tasks(self, user, completed):
+        # select() can answer from the user and status indexes
+        return [task_to_dict(task, index) for index, task
+                in self.task_manager.select(user=user,
+                                            completed=completed)]
+
+    def _add_user(self, username, password):
+        if any(user.username == username
+               for user in self.user_manager.users):
+            return False
+        self.user_manager.add_user(User(username, password))
+        return True
+
+    def _add_task(self, task):
+        self.task_manager.add_task(task)
+        return len(self.task_manager.tasks) - 1
+
+    def _update_task(self, index, expect, changes):
+        task = self._find_task(index, expect)
+        # Clients send every field they allow editing, so only the
+        # ones that differ are changed (and published)
+        changes = {name: value for name, value in changes.items()
+                   if value != getattr(task, name)}
+        if changes.get("completed") == "No":
+            raise RequestError(400, "Completed tasks cannot be reopened")
+        if not changes:
+            return task_to_dict(task, index)
+        # Through TaskManager so that the changes are published
+        if "username" in changes:
+            self.task_manager.reassign_task(task, changes["username"])
+        if "date_due" in changes:
+            self.task_manager.reschedule_task(task, changes["date_due"])
+        if "completed" in changes:
+            self.task_manager.complete_task(task)
+        self.task_manager.save_tasks()
+        return task_to_dict(task, index)
+
+    def _delete_task(self, index, expect):
+        task = self._find_task(index, expect)
+        self.task_manager.delete_task(index)
+        return task_to_dict(task, index)
+
+
+def raise_file_limit():
+    """
+    Raises the open file limit as far as allowed so the server can
+    hold thousands of connections. Not available on every platform.
+    """
+    try:
+        import resource
+    except ImportError:
+        return
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or hard > soft:
+        target = 65536 if hard == resource.RLIM_INFINITY \
+            else min(hard, 65536)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+        except (ValueError, OSError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local task "
+                                                 "server.")
+    parser.add_argument("--host", default=config["server_host"])
+    parser.add_argument("--port", type=int, default=config["server_port"])
+    parser.add_argument("--task-file",
+                        help=f"default: the app's {config['task_file']}")
+    parser.add_argument("--user-file",
+                        help=f"default: the app's {config['user_file']}")
+    args = parser.parse_args()
+
+    # Paths given are relative to where the command was run; the
+    # defaults are the app's own files, like the menus use
+    raise_file_limit()
+    task_manager = TaskManager(
+        os.path.join(INVOCATION_DIR, args.task_file) if args.task_file
+        else config["task_file"])
+    user_manager = UserManager(
+        os.path.join(INVOCATION_DIR, args.user_file) if args.user_file
+        else config["user_file"])
+    change_feed = ChangeFeed()
+    task_manager.change_feed = user_manager.change_feed = change_feed
+    report_gen = ReportGenerator(task_manager, user_manager)
+    server = TaskServer(task_manager, user_manager, report_gen,
+                        args.host, args.port)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        print("\nTask server stopped.")
+    finally:
+        change_feed.close()
+
+
+if __name__ == "__main__":
+    main()
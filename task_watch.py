@@ -0,0 +1,205 @@
+"""
+task_watch.py
+
+Defines the TaskWatcher class.
+
+TaskWatcher: A live version of the task overview. It remembers how far
+into the task file it has read, and on each poll parses only the lines
+appended since, updating running totals in place. The overview is
+redrawn once a second until interrupted with Ctrl+C.
+
+If the file shrinks or is rewritten (for example by save_tasks), the
+totals are rebuilt from the start of the file.
+
+Command line:
+    python task_watch.py
+    python task_watch.py --task-file other_tasks.txt --interval 0.5
+"""
+
+import argparse
+import collections
+import datetime
+import json
+import os
+import sys
+import time
+
+# Paths given on the command line are relative to where the command was
+# run, which the imports below change
+INVOCATION_DIR = os.getcwd()
+
+from report_generator import overdue_cutoff  # noqa: E402
+from task_archive import TaskArchive  # noqa: E402
+from task_manager_build import date_ordinal  # noqa: E402
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+# Bytes before the read offset compared on each poll to notice rewrites
+TAIL_BYTES = 64
+
+# Users listed on the dashboard, most open tasks first
+TOP_USERS = 10
+
+CLEAR_SCREEN = "\033[2J\033[H"
+
+
+class TaskWatcher:
+
+    def __init__(self, file_path=config["task_file"]):
+        self.file_path = file_path
+        self.reset()
+
+    def reset(self):
+        """
+        Clears the running totals so the file is read from the start.
+        """
+        self.offset = 0
+        self._tail = b""
+        self._mtime = None
+        # Start of a line whose newline has not been written yet
+        self._partial = b""
+        self.total = 0
+        self.completed = 0
+        # Incomplete tasks per due day number, overall and per user
+        self.open_due = collections.Counter()
+        self.user_open_due = collections.defaultdict(collections.Counter)
+        self.user_open = collections.Counter()
+        self.user_totals = collections.Counter()
+        self.archive = TaskArchive(self.file_path)
+
+    def _rewritten(self, f, size, mtime):
+        # Shrunk, changed without growing, or changed before the offset
+        if size < self.offset:
+            return True
+        if size == self.offset:
+            return mtime != self._mtime and self.offset > 0
+        f.seek(self.offset - len(self._tail))
+        return f.read(len(self._tail)) != self._tail
+
+    def poll(self):
+        """
+        Reads and counts any complete lines added since the last poll.
+        Returns the number of tasks ingested.
+        """
+        try:
+            f = open(self.file_path, "rb")
+        except FileNotFoundError:
+            return 0
+        with f:
+            stat = os.fstat(f.fileno())
+            if self._rewritten(f, stat.st_size, stat.st_mtime_ns):
+                self.reset()
+            if stat.st_size == self.offset:
+                self._mtime = stat.st_mtime_ns
+                return 0
+            f.seek(self.offset)
+            data = f.read()
+        # Only the file's first line can be the header
+        at_start = self.offset == len(self._partial)
+        data = self._partial + data
+        self.offset = stat.st_size
+        self._mtime = stat.st_mtime_ns
+        self._tail = data[-TAIL_BYTES:]
+
+        lines = data.split(b"\n")
+        self._partial = lines.pop()
+        if at_start and lines and b"username" in lines[0].lower():
+            lines.pop(0)
+        return sum(self.ingest(line.decode(errors="replace"))
+                   for line in lines)
+
+    def ingest(self, line):
+        """
+        Adds one task line to the running totals.
+        Returns 1 if the line was a valid task, else 0.
+        """
+        fields = [field.strip() for field in line.strip().split(",")]
+        if len(fields) != 6:
+            return 0
+        username, date_due, status = fields[0], fields[4], \
+            fields[5].lower()
+        self.total += 1
+        self.user_totals[username] += 1
+        if status == "yes":
+            self.completed += 1
+        elif status == "no":
+            ordinal = date_ordinal(date_due)
+            if ordinal is not None:
+                self.open_due[ordinal] += 1
+                self.user_open_due[username][ordinal] += 1
+                self.user_open[username] += 1
+        return 1
+
+    def overdue(self, due_counts, cutoff):
+        # Distinct due dates are few, so this stays cheap
+        return sum(count for ordinal, count in due_counts.items()
+                   if ordinal < cutoff)
+
+    def render(self, now=None):
+        """
+        Returns the dashboard text.
+        """
+        now = now or datetime.datetime.now()
+        cutoff = overdue_cutoff(now)
+        archived = self.archive.total
+        total = self.total + archived
+        completed = self.completed + archived
+        uncompleted = total - completed
+        overdue = self.overdue(self.open_due, cutoff)
+        incomplete_percentage = uncompleted / total * 100 if total else 0
+        overdue_percentage = overdue / total * 100 if total else 0
+
+        lines = [f"=== Live Task Overview ({now:%H:%M:%S}) ===", "",
+                 f"Total number of tasks             : {total}",
+                 f"Total number of completed tasks   : {completed}",
+                 f"Total number of uncompleted tasks : {uncompleted}",
+                 f"Total number of overdue tasks     : {overdue}",
+                 f"Percentage of incomplete tasks    : "
+                 f"{incomplete_percentage:.2f}%",
+                 f"Percentage of overdue tasks       : "
+                 f"{overdue_percentage:.2f}%",
+                 "", "Users with the most open tasks:"]
+        for username, open_tasks in self.user_open.most_common(TOP_USERS):
+            overdue = self.overdue(self.user_open_due[username], cutoff)
+            lines.append(f"  - {username:<16}: {open_tasks} open, "
+                         f"{overdue} overdue, "
+                         f"{self.user_totals[username]} total")
+        lines.append("\nWatching for new tasks. Press Ctrl+C to stop.")
+        return "\n".join(lines)
+
+    def run(self, interval=1.0, output=sys.stdout):
+        """
+        Polls the task file and redraws the dashboard every interval
+        seconds until interrupted.
+        """
+        try:
+            while True:
+                started = time.monotonic()
+                self.poll()
+                output.write(CLEAR_SCREEN + self.render() + "\n")
+                output.flush()
+                time.sleep(max(0.0, interval -
+                               (time.monotonic() - started)))
+        except KeyboardInterrupt:
+            print("\nStopped watching.")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show a live overview "
+                                                 "of the task file.")
+    parser.add_argument("--task-file",
+                        help=f"default: the app's {config['task_file']}")
+    parser.add_argument("--interval", type=float, default=1.0,
+                        help="seconds between redraws (default 1)")
+    args = parser.parse_args()
+    task_file = os.path.join(INVOCATION_DIR, args.task_file) \
+        if args.task_file else config["task_file"]
+    TaskWatcher(task_file).run(args.interval)
+
+
+if __name__ == "__main__":
+    main()
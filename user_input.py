@@ -1,9 +1,16 @@
 from task_manager_build import Task, TaskManager
 from user_manager import User, UserManager
+import contextlib
 import datetime
 import os
 import json
 
+try:
+    import readline
+except ImportError:
+    # Tab completion is not available on every platform
+    readline = None
+
 # Ensure the current directory is set correctly
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
 
@@ -11,6 +18,66 @@ with open("config.json", "r") as f:
     config = json.load(f)
 
 
+# Most usernames listed when an entered name is not found
+COMPLETION_LIMIT = 10
+
+
+@contextlib.contextmanager
+def username_completion(user_manager):
+    """
+    Completes registered usernames with Tab while prompting,
+    where readline is available.
+    """
+    if readline is None:
+        yield
+        return
+    matches = []
+
+    def complete(text, state):
+        nonlocal matches
+        if state == 0:
+            matches = user_manager.find_users(text, COMPLETION_LIMIT * 5)
+        return matches[state] if state < len(matches) else None
+
+    previous = readline.get_completer()
+    readline.set_completer(complete)
+    readline.parse_and_bind("tab: complete")
+    try:
+        yield
+    finally:
+        readline.set_completer(previous)
+
+
+def input_existing_username(user_manager, prompt):
+    """
+    Prompts until a registered username is entered. For an unknown
+    name, usernames starting with it or close to it are offered, and
+    a single candidate can be accepted directly.
+    """
+    with username_completion(user_manager):
+        while True:
+            username = input(prompt).strip()
+            if user_manager.has_user(username):
+                return username
+
+            candidates = user_manager.find_users(
+                username, COMPLETION_LIMIT + 1) if username else []
+            if not candidates:
+                candidates = user_manager.suggest_usernames(username)
+            if not candidates:
+                print("\nUsername not found. Please try again.")
+            elif len(candidates) == 1:
+                answer = input(f"\nUsername not found. Did you mean "
+                               f"'{candidates[0]}'? (y/n): ")
+                if answer.strip().lower() == 'y':
+                    return candidates[0]
+            else:
+                more = ", ..." if len(candidates) > COMPLETION_LIMIT \
+                    else ""
+                print("\nUsername not found. Did you mean: "
+                      + ", ".join(candidates[:COMPLETION_LIMIT]) + more)
+
+
 def register_new(user_manager):
     """
     Adds a new user if the username is unique and 
@@ -22,8 +89,7 @@ def register_new(user_manager):
         new_username = input('\nEnter a new username: ').strip()
 
         # Check if username already exists in user list
-        if any(user.username == new_username 
-                                for user in user_manager.users):
+        if user_manager.has_user(new_username):
             print("That username already exists. "
                   "Please choose another.")
             continue
@@ -36,9 +102,13 @@ def register_new(user_manager):
         if new_password != repeat_password:
             print("Passwords do not match. Please try again.")
         else:
-            user = User(new_username, new_password)
-            user_manager.add_user(user)
-            user_manager.save_users()
+            with user_manager.locked():
+                # Another session may have taken the name meanwhile
+                if user_manager.has_user(new_username):
+                    print("That username already exists. "
+                          "Please choose another.")
+                    continue
+                user_manager.add_user(User(new_username, new_password))
 
             print("New user registered successfully!\n")
             break
@@ -75,8 +145,7 @@ def view_user_tasks_input(task_manager,username):
     while True:
         # Display user's tasks
         task_manager.view_user_tasks(username)
-        user_tasks = [task for task in task_manager.tasks if 
-                      task.username == username]
+        user_tasks = list(task_manager.query(user=username))
 
         # Prompt for task selection
         try:
@@ -105,53 +174,65 @@ def view_user_tasks_input(task_manager,username):
 
         option = input("\nEnter choice: ").strip()
 
+        # The changes are collected first and made under the task
+        # file's lock, so prompts never hold it
+        new_user = new_due = None
         if option == '1':
-            # Mark the task as complete
-            selected_task.completed = "Yes"
-            print("Task marked as complete.")
-        
+            pass
         elif option == '2':
             # Prevent editing of completed tasks
             if selected_task.completed == "Yes":
                 print("Task already completed. Cannot edit.")
-            else:
-                # Edit assigned user
-                new_user = input("Enter new username "
-                                 "(or press Enter to skip): ").strip()
-                if new_user:
-                    selected_task.username = new_user
-
-                # Edit due date with validation
-                while True:
-                    new_due = input("Enter new due date (dd:mm:yyyy) "
+                continue
+            # Edit assigned user
+            new_user = input("Enter new username "
+                             "(or press Enter to skip): ").strip()
+
+            # Edit due date with validation
+            while True:
+                new_due = input("Enter new due date (dd:mm:yyyy) "
                                 "(or press Enter to skip): ").strip()
-                    if new_due == "":
-                        break
-                    try:
-                        due_date = \
-                        datetime.datetime.strptime(new_due, 
-                                        config["date_format_input"])
-
-                        selected_task.date_due = \
-                        due_date.strftime(
-                                    config["date_format_display"])
-
-                        break
-                    except ValueError:
-                        print("❌ Invalid date format. " 
-                        "Please use dd:mm:yyyy.")
-        
+                if new_due == "":
+                    break
+                try:
+                    due_date = datetime.datetime.strptime(
+                        new_due, config["date_format_input"])
+                    new_due = due_date.strftime(
+                        config["date_format_display"])
+                    break
+                except ValueError:
+                    print("❌ Invalid date format. "
+                          "Please use dd:mm:yyyy.")
         elif option == '-1':
             break
         else:
             print("Invalid selection.")
+            continue
+
+        with task_manager.locked():
+            position = task_manager.locate_task(selected_task)
+            if position is None:
+                print("\nThis task was changed or deleted by another "
+                      "session. Please select it again.")
+                continue
+            task = task_manager.tasks[position]
+            if option == '1':
+                # Mark the task as complete
+                task_manager.complete_task(task)
+                print("Task marked as complete.")
+            else:
+                if new_user:
+                    task_manager.reassign_task(task, new_user)
+                if new_due:
+                    task_manager.reschedule_task(task, new_due)
 
-        print(f"\n[DEBUG] Total tasks in memory before saving: {len(task_manager.tasks)}")
-        for t in task_manager.tasks:
-            print(f" - {t.username} | {t.title} | {t.completed}")
+            print(f"\n[DEBUG] Total tasks in memory before saving: "
+                  f"{len(task_manager.tasks)}")
+            for t in task_manager.tasks:
+                print(f" - {t.username} | {t.title} | {t.completed}")
 
-        # Update tasks.txt with changes
-        task_manager.save_tasks()
+            # Update tasks.txt with changes
+            task_manager.save_tasks()
 
 
 def add_task_input(task_manager, user_manager):
@@ -159,17 +240,11 @@ def add_task_input(task_manager, user_manager):
     Assigns a new task to an existing user and writes it to file.
     """
     while True:
-        # Ask for the username the task is being assigned to
-        input_username = input('\nPlease enter the username for '
-                               'which the task is being assigned: ')
-
-        # Check if the username exists in the user list
-        user_found = any(user.username == input_username 
-                         for user in user_manager.users)
-
-        if not user_found:
-            print("\nUsername not found. Please try again.")
-            continue  # Prompt again if username is invalid
+        # Ask for the username the task is being assigned to,
+        # offering matches until an existing one is entered
+        input_username = input_existing_username(
+            user_manager, '\nPlease enter the username for '
+                          'which the task is being assigned: ')
 
         # Collect task title and description
         input_title = input("\nPlease enter the title of the task: ")
@@ -199,7 +274,8 @@ def add_task_input(task_manager, user_manager):
         # Create and add task
         task = Task(input_username, input_title, input_description,
                      formatted_add, formatted_due)
-        task_manager.add_task(task)
+        with task_manager.locked():
+            task_manager.add_task(task)
 
         print("\nTask successfully assigned.")
         break
@@ -217,21 +293,164 @@ def delete_task_input(task_manager):
 
     # Display task titles with assigned users
     print("\nAvailable Tasks:\n")
+    listed = []
     for index, task in enumerate(task_manager.tasks, start=1):
         print(f"{index}. {task.title} (Assigned to: {task.username})")
+        listed.append(task)
 
     try:
         # Prompt for task number to delete
         choice =    \
             int(input("\nEnter the number of the task to delete: "))
+    except ValueError:
+        print("\nPlease enter a valid number.")
+        return
 
-        # Validate selection range and update
-        if 1 <= choice <= len(task_manager.tasks):
-            deleted_task = task_manager.tasks.pop(choice - 1)
-            task_manager.save_tasks()
-            print(f"\nTask '{deleted_task.title}' "
-                  f"deleted successfully.")
+    # Validate selection range and update
+    if not 1 <= choice <= len(listed):
+        print("\nInvalid selection. No task deleted.")
+        return
+    with task_manager.locked():
+        # Other sessions may have moved or removed the task meanwhile
+        position = task_manager.locate_task(listed[choice - 1])
+        if position is None:
+            print("\nThis task was changed or deleted by another "
+                  "session. No task deleted.")
+            return
+        deleted_task = task_manager.delete_task(position)
+    print(f"\nTask '{deleted_task.title}' "
+          f"deleted successfully.")
+
+
+def get_optional_date(prompt):
+    """
+    Prompts for an optional date in dd:mm:yyyy format.
+    Returns the date in display format, or None if skipped.
+    """
+    while True:
+        value = input(prompt).strip()
+        if value == "":
+            return None
+        try:
+            date = datetime.datetime.strptime(value,
+                                              config["date_format_input"])
+            return date.strftime(config["date_format_display"])
+        except ValueError:
+            print("Invalid date format. Please use dd:mm:yyyy.")
+
+
+def bulk_update_input(task_manager, user_manager):
+    """
+    Allows admin to reassign or complete many tasks at once.
+    All changes are saved with a single write.
+    """
+    print("\nBulk update")
+    print("1  - Reassign tasks from one user to another")
+    print("2  - Mark matching tasks as complete")
+    print("-1 - Return to menu")
+    option = input("\nEnter choice: ").strip()
+
+    if option == '1':
+        from_user = input_existing_username(
+            user_manager, "\nReassign tasks from username: ")
+        to_user = input_existing_username(
+            user_manager, "Reassign tasks to username: ")
+        if from_user == to_user:
+            print("\nBoth usernames are the same. No tasks reassigned.")
+            return
+        open_only = input("Only reassign tasks that are not completed? "
+                          "(y/n): ").strip().lower() == 'y'
+        filters = {"user": from_user,
+                   "completed": False if open_only else None}
+        count = sum(1 for _ in task_manager.query(**filters))
+        if count == 0:
+            print(f"\nNo matching tasks found for {from_user}.")
+            return
+        confirm = input(f"Reassign {count} task(s) from {from_user} "
+                        f"to {to_user}? (y/n): ").strip().lower()
+        if confirm == 'y':
+            with task_manager.locked():
+                count = task_manager.reassign_tasks(
+                    from_user, to_user, completed=filters["completed"])
+            print(f"\n{count} task(s) reassigned to {to_user}.")
         else:
-            print("\nInvalid selection. No task deleted.")
-    except ValueError:
-        print("\nPlease enter a valid number.")
\ No newline at end of file
+            print("\nNo tasks reassigned.")
+
+    elif option == '2':
+        user = input("\nOnly tasks for username "
+                     "(or press Enter for all users): ").strip() or None
+        due_before = get_optional_date("Only tasks due before "
+                                       "(dd:mm:yyyy, or press Enter "
+                                       "to skip): ")
+        text = input("Only tasks containing text "
+                     "(or press Enter to skip): ").strip() or None
+        filters = {"user": user, "due_before": due_before, "text": text}
+        count = sum(1 for _ in task_manager.query(completed=False,
+                                                  **filters))
+        if count == 0:
+            print("\nNo matching open tasks found.")
+            return
+        confirm = input(f"Mark {count} task(s) as complete? "
+                        f"(y/n): ").strip().lower()
+        if confirm == 'y':
+            with task_manager.locked():
+                count = task_manager.complete_tasks(**filters)
+            print(f"\n{count} task(s) marked as complete.")
+        else:
+            print("\nNo tasks changed.")
+
+    elif option != '-1':
+        print("Invalid selection.")
+
+
+def archive_tasks_input(task_manager):
+    """
+    Allows admin to move old completed tasks into the archive.
+    """
+    default_days = config["archive_after_days"]
+    while True:
+        value = input(f"\nArchive completed tasks due more than how many "
+                      f"days ago? (press Enter for {default_days}): "
+                      ).strip()
+        if value == "":
+            days = default_days
+            break
+        try:
+            days = int(value)
+            if days >= 0:
+                break
+        except ValueError:
+            pass
+        print("Please enter a whole number of days.")
+
+    with task_manager.locked():
+        count = task_manager.archive_completed(days)
+    if count:
+        print(f"\n{count} completed task(s) moved to the archive.")
+    else:
+        print("\nNo completed tasks old enough to archive.")
+
+
+def switch_workspace_input(workspaces):
+    """
+    Lists the workspaces and asks which one to switch to.
+    Returns the chosen name, or None to stay in the current one.
+    """
+    names = workspaces.names()
+    print("\nWorkspaces:")
+    for number, name in enumerate(names, start=1):
+        state = "open" if workspaces.is_open(name) else "not loaded"
+        print(f"{number}  - {name} ({state})")
+    while True:
+        value = input("\nEnter workspace number "
+                      "or -1 to return to menu: ").strip()
+        try:
+            number = int(value)
+        except ValueError:
+            print("Please enter a valid number.")
+            continue
+        if number == -1:
+            return None
+        if 1 <= number <= len(names):
+            return names[number - 1]
+        print("Invalid selection.")
@@ -10,6 +10,12 @@ Classes:
 """
 import os
 import json
+import bisect
+import contextlib
+import difflib
+from change_feed import USER_REGISTERED
+from file_lock import FileLock
+from instrumentation import stats, timed
 
 # Ensure the current directory is set correctly
 os.chdir(os.path.dirname(os.path.abspath(__file__)))
@@ -32,11 +38,27 @@ class User:
 
 class UserManager:
 
+    # Username -> User lookup and sorted usernames, rebuilt whenever
+    # self.users changes size
+    _index = None
+    _sorted_names = None
+    _indexed_count = 0
+    # ChangeFeed that new users are published to, if any
+    change_feed = None
+    # Number of users added, recorded in reports
+    version = 0
+    # State of the user file when this process last held its lock
+    _file_state = None
+
     def __init__(self, file_path=config["user_file"]):
         self.file_path = file_path
         self.users = []
+        # Taken before reading, so the first locked() only rereads if
+        # the file changed since
+        self._file_state = FileLock(file_path).peek()
         self.read_users()
 
+    @timed("UserManager.read_users")
     def read_users(self):
         """
         Reads users from 'user.txt' and loads them into self.users.
@@ -53,20 +75,89 @@ class UserManager:
                         username, password = fields
                         # Create a User and add it to the users list
                         self.users.append(User(username, password))
+            if stats.enabled:
+                stats.count("UserManager.read_users", rows=len(self.users),
+                            bytes_read=os.path.getsize(self.file_path))
             return self.users
         except FileNotFoundError:
             # Handle missing file gracefully
             print("\nuser.txt file not found.")
             return None
 
+    @contextlib.contextmanager
+    def locked(self):
+        """
+        Holds the user file's lock for changes shared with other
+        processes. Users saved by another process since this one last
+        held the lock are reloaded first.
+        """
+        with FileLock(self.file_path) as lock:
+            if lock.state() != self._file_state:
+                # In place, as reports hold a reference to the list
+                del self.users[:]
+                self._index = None
+                self.read_users()
+            version = self.version
+            try:
+                yield self
+            finally:
+                if self.version != version:
+                    lock.changed()
+            self._file_state = lock.state()
+
+    @timed("UserManager.authenticate")
     def authenticate(self, username, password):
         """
         Checks if the given credentials match any user in the system.
         Returns True if a match is found, else False.
         """
+        if stats.enabled:
+            stats.count("UserManager.authenticate", rows=len(self.users))
         return any(user.username == username and 
                    user.password == password for user in self.users)
 
+    def has_user(self, username):
+        """
+        Returns True if a user with the given username is registered.
+        """
+        return username in self._current_index()
+
+    def _current_index(self):
+        if self._index is None or self._indexed_count != len(self.users):
+            self._index = {user.username: user for user in self.users}
+            self._sorted_names = sorted(self._index)
+            self._indexed_count = len(self.users)
+        return self._index
+
+    def find_users(self, prefix, limit=None):
+        """
+        Returns the registered usernames starting with prefix, in
+        sorted order, found by bisecting the sorted usernames.
+        """
+        self._current_index()
+        names = self._sorted_names
+        start = bisect.bisect_left(names, prefix)
+        end = bisect.bisect_left(names, prefix + "\U0010ffff", start)
+        if limit is not None:
+            end = min(end, start + limit)
+        return names[start:end]
+
+    def suggest_usernames(self, username, count=3):
+        """
+        Returns up to count registered usernames similar to username,
+        closest first. Names with the same first letter are compared
+        first; all names only if none of those are close.
+        """
+        if username:
+            matches = difflib.get_close_matches(
+                username, self.find_users(username[0]), count)
+            if matches:
+                return matches
+        self._current_index()
+        return difflib.get_close_matches(username, self._sorted_names,
+                                         count)
+
+    @timed("UserManager.save_users")
     def save_users(self):
         """
         Saves the current user list to 'user.txt'.
@@ -75,10 +166,26 @@ class UserManager:
         with open(self.file_path, "w") as f:
             for user in self.users:
                 f.write(f"{user.username}, {user.password}\n")
+        if stats.enabled:
+            stats.count("UserManager.save_users", rows=len(self.users),
+                        bytes_written=os.path.getsize(self.file_path),
+                        rewrites=1, path=self.file_path)
 
+    @timed("UserManager.add_user")
     def add_user(self, user):
         """
         Adds a new User object to the system and saves it to the file.
         """
         self.users.append(user)
-        self.save_users()
\ No newline at end of file
+        self.version += 1
+        # Keep the lookup indexes current rather than rebuilding them
+        if self._index is not None and \
+                self._indexed_count == len(self.users) - 1:
+            if user.username not in self._index:
+                bisect.insort(self._sorted_names, user.username)
+            self._index[user.username] = user
+            self._indexed_count += 1
+        self.save_users()
+        if self.change_feed is not None:
+            self.change_feed.publish(USER_REGISTERED,
+                                     username=user.username)
@@ -0,0 +1,143 @@
+"""
+workspaces.py
+
+Defines the WorkspaceManager class.
+
+WorkspaceManager: Gives access to the named task lists (workspaces)
+registered under "workspaces" in config.json, each with its own task
+file. A workspace's TaskManager is only created when it is first
+used, and only the most recently used ones are kept open.
+Cross-workspace reports read each workspace's file in turn, so only
+one task is held in memory at a time for workspaces that are not open.
+"""
+
+import collections
+import json
+import os
+from report_generator import overdue_cutoff
+from task_archive import TaskArchive
+from task_manager_build import TaskManager, date_ordinal, read_task_file
+from instrumentation import stats, timed
+
+# Ensure the current directory is set correctly
+os.chdir(os.path.dirname(os.path.abspath(__file__)))
+
+with open("config.json", "r") as f:
+    config = json.load(f)
+
+
+class WorkspaceManager:
+
+    def __init__(self, workspaces=None,
+                 cache_size=config["workspace_cache_size"],
+                 change_feed=None):
+        # Workspace name -> task file
+        self.workspaces = dict(workspaces or config["workspaces"])
+        self.cache_size = max(1, cache_size)
+        # Given to each TaskManager opened, to publish its changes
+        self.change_feed = change_feed
+        # Open TaskManagers, least recently used first
+        self._open = collections.OrderedDict()
+
+    def names(self):
+        return list(self.workspaces)
+
+    def is_open(self, name):
+        return name in self._open
+
+    def open(self, name):
+        """
+        Returns the TaskManager for a workspace, loading it on first
+        use. Raises KeyError for an unknown workspace.
+        """
+        if name in self._open:
+            self._open.move_to_end(name)
+            return self._open[name]
+        task_manager = TaskManager(self.workspaces[name])
+        task_manager.change_feed = self.change_feed
+        self._open[name] = task_manager
+        while len(self._open) > self.cache_size:
+            # Changes are saved as they are made, so closing a
+            # workspace only frees its memory
+            _, evicted = self._open.popitem(last=False)
+            if evicted.file_index is not None:
+                evicted.file_index.close()
+        return task_manager
+
+    def iter_tasks(self, name):
+        """
+        Yields a workspace's tasks: from memory if it is open,
+        otherwise read one at a time from its file.
+        """
+        if name in self._open:
+            yield from self._open[name].tasks
+            return
+        try:
+            yield from read_task_file(self.workspaces[name], lazy=True)
+        except FileNotFoundError:
+            return
+
+    def workspace_statistics(self, name, cutoff):
+        """
+        Returns (tasks, completed, overdue, open tasks per user) for one
+        workspace, including its archived tasks.
+        """
+        total = completed = overdue = 0
+        open_tasks = collections.Counter()
+        for task in self.iter_tasks(name):
+            total += 1
+            status = task.completed.lower()
+            if status == "yes":
+                completed += 1
+            elif status == "no":
+                open_tasks[task.username] += 1
+                ordinal = date_ordinal(task.date_due)
+                if ordinal is not None and ordinal < cutoff:
+                    overdue += 1
+        archived = TaskArchive(self.workspaces[name]).total
+        return total + archived, completed + archived, overdue, open_tasks
+
+    @timed("WorkspaceManager.write_report")
+    def write_report(self):
+        """
+        Writes workspace_overview.txt with statistics for every
+        workspace and open tasks per user across all of them.
+        """
+        cutoff = overdue_cutoff()
+        totals = [0, 0, 0]
+        user_open = collections.Counter()
+        sections = []
+        for name in self.workspaces:
+            total, completed, overdue, open_tasks = \
+                self.workspace_statistics(name, cutoff)
+            for i, value in enumerate((total, completed, overdue)):
+                totals[i] += value
+            user_open.update(open_tasks)
+            sections.append(
+                f"Workspace: {name} ({self.workspaces[name]})\n"
+                f"  - Tasks                          : {total}\n"
+                f"  - Completed tasks                : {completed}\n"
+                f"  - Uncompleted tasks              : "
+                f"{total - completed}\n"
+                f"  - Overdue tasks                  : {overdue}\n\n")
+
+        total, completed, overdue = totals
+        with open(config["workspace_report_file"], "w") as f:
+            f.write("=== Workspace Overview ===\n\n"
+                    f"Total number of workspaces     : "
+                    f"{len(self.workspaces)}\n"
+                    f"Total number of tasks          : {total}\n"
+                    f"Total number of completed tasks: {completed}\n"
+                    f"Total number of overdue tasks  : {overdue}\n\n"
+                    + "".join(sections)
+                    + "Open tasks per user across workspaces:\n"
+                    + "".join(f"  - {username:<16}: {count}\n"
+                              for username, count
+                              in sorted(user_open.items())))
+        if stats.enabled:
+            stats.count("WorkspaceManager.write_report", rows=total,
+                        bytes_written=os.path.getsize(
+                            config["workspace_report_file"]),
+                        rewrites=1, path=config["workspace_report_file"])
+        print(f"\nWorkspace report generated: "
+              f"'{config['workspace_report_file']}'")